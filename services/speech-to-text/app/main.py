@@ -1,40 +1,86 @@
 """录音转文字应用主模块"""
 
 import time
+import json
 import asyncio
+import numpy as np
 from pathlib import Path
-from typing import Optional
+from urllib.parse import quote
+from typing import Optional, AsyncIterator, Callable, List
+from datetime import datetime
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends
-from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from fastapi import FastAPI, File, UploadFile, Form, Query, Request, HTTPException, Depends, BackgroundTasks, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from loguru import logger
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from shared.config import settings
-from shared.utils import FileManager, SenseVoiceClient, setup_logger, get_access_logger
+from shared.utils import FileManager, SenseVoiceClient, ResultCache, JobStore, JobQueue, HotwordRegistry, AccessLogMiddleware, setup_logger, get_access_logger
+from shared.utils.audio_stream import (
+    STREAMABLE_EXTENSIONS,
+    is_ffmpeg_available,
+    predecode_to_pcm,
+    decode_audio_bytes_stream
+)
+from shared.utils.job_queue import JOB_COMPLETED, FINISHED_STATUSES
+from shared.utils.hotwords import parse_keywords
+from shared.utils.transcript_export import EXPORT_FORMATS, SUBTITLE_FORMATS, export_etag, export_transcript
+from shared.utils.metrics import SSE_BYTES, ACTIVE_STREAMS, ERRORS, render_metrics
 from shared.models import (
     TranscriptionRequest,
     TranscriptionResponse,
     UploadResponse,
     ErrorResponse,
     HealthResponse,
-    SystemInfo
+    SystemInfo,
+    TaskStatus,
+    ReadinessResponse,
+    HotwordListInfo
 )
 
 # 全局变量
 file_manager: Optional[FileManager] = None
 sensevoice_client: Optional[SenseVoiceClient] = None
+result_cache: Optional[ResultCache] = None
+hotword_registry: Optional[HotwordRegistry] = None
+job_queue: Optional[JobQueue] = None
 scheduler: Optional[AsyncIOScheduler] = None
+model_load_task: Optional[asyncio.Task] = None
 app_start_time = time.time()
 
 
+def create_sensevoice_client(**overrides) -> SenseVoiceClient:
+    """按配置创建SenseVoice客户端（延迟加载模型），overrides 覆盖对应的构造参数"""
+    options = dict(
+        model_dir=settings.SENSEVOICE_MODEL_DIR,
+        device=settings.SENSEVOICE_DEVICE,
+        batch_size=settings.SENSEVOICE_BATCH_SIZE,
+        quantize=settings.SENSEVOICE_QUANTIZE,
+        cache_dir=settings.SENSEVOICE_CACHE_DIR,
+        executor_type=settings.SENSEVOICE_EXECUTOR_TYPE,
+        executor_workers=settings.SENSEVOICE_EXECUTOR_WORKERS,
+        inmemory_input=settings.SENSEVOICE_INMEMORY_INPUT,
+        batch_max_wait_ms=settings.SENSEVOICE_BATCH_MAX_WAIT_MS,
+        vad_segmentation=settings.SENSEVOICE_VAD_SEGMENTATION,
+        lazy_load=True,
+        backend=settings.SENSEVOICE_BACKEND,
+        vad_model_dir=settings.SENSEVOICE_VAD_MODEL_DIR,
+        intra_op_threads=settings.SENSEVOICE_INTRA_OP_THREADS,
+        inter_op_threads=settings.SENSEVOICE_INTER_OP_THREADS,
+        parallel_chunks=settings.SENSEVOICE_PARALLEL_CHUNKS,
+        cpu_affinity=settings.SENSEVOICE_CPU_AFFINITY
+    )
+    options.update(overrides)
+    return SenseVoiceClient(**options)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
-    global file_manager, sensevoice_client, scheduler
+    global file_manager, sensevoice_client, result_cache, hotword_registry, scheduler, model_load_task
     
     # 初始化日志系统
     setup_logger()
@@ -51,15 +97,30 @@ async def lifespan(app: FastAPI):
         )
         logger.info("文件管理器初始化成功")
         
-        # 初始化SenseVoice本地模型客户端
-        sensevoice_client = SenseVoiceClient(
-            model_dir=settings.SENSEVOICE_MODEL_DIR,
-            device=settings.SENSEVOICE_DEVICE,
-            batch_size=settings.SENSEVOICE_BATCH_SIZE,
-            quantize=settings.SENSEVOICE_QUANTIZE,
-            cache_dir=settings.SENSEVOICE_CACHE_DIR
+        # 初始化转录结果缓存
+        if settings.result_cache_enabled:
+            result_cache = ResultCache(
+                cache_dir=settings.result_cache_dir,
+                max_size=settings.result_cache_max_size
+            )
+            logger.info("转录结果缓存初始化成功")
+        
+        # 初始化热词表注册中心
+        hotword_registry = HotwordRegistry(
+            store_dir=settings.hotword_dir,
+            max_cached=settings.hotword_cache_size,
+            max_words=settings.hotword_max_words
         )
-        logger.info("SenseVoice本地模型客户端初始化成功")
+        
+        # 初始化SenseVoice本地模型客户端（多工作进程部署时连接共享推理进程）
+        sensevoice_client = create_sensevoice_client(
+            result_cache=result_cache,
+            inference_server=settings.inference_server,
+            inference_authkey=(settings.inference_authkey or "").encode()
+        )
+        
+        # 在后台加载模型，服务立即开始响应（就绪前依赖模型的接口返回503）
+        model_load_task = asyncio.create_task(load_models())
         
         # 初始化定时任务调度器
         scheduler = AsyncIOScheduler()
@@ -90,7 +151,19 @@ async def lifespan(app: FastAPI):
         scheduler.shutdown()
         logger.info("定时任务调度器已关闭")
     
+    if model_load_task and not model_load_task.done():
+        model_load_task.cancel()
+    
+    if job_queue:
+        await job_queue.stop()
+    
+    if sensevoice_client:
+        sensevoice_client.close()
+        logger.info("SenseVoice推理执行器已关闭")
+    
     logger.info("录音转文字服务已关闭")
+    # 等待后台日志队列写完
+    await logger.complete()
 
 
 # 创建FastAPI应用
@@ -110,17 +183,106 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 以JSON行记录请求耗时与响应大小（logs/requests.log）
+app.add_middleware(AccessLogMiddleware)
+
 # 挂载静态文件
 static_dir = Path(__file__).parent / "static"
 if static_dir.exists():
     app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
 
+class RequestBodyStreamingResponse(StreamingResponse):
+    """边读取请求体边返回的流式响应
+    
+    StreamingResponse 会并发调用 receive() 监听客户端断开，从而抢占尚未读取的
+    请求体数据。此响应只负责推送数据，客户端断开由请求体读取（ClientDisconnect）感知。
+    """
+    
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+class ReleasingStreamingResponse(StreamingResponse):
+    """结束时执行释放回调的流式响应
+    
+    客户端在开始迭代响应体前断开时，生成器的 finally 不会执行；
+    release 在响应结束时（无论是否正常完成）调用，需可重复调用。
+    """
+    
+    def __init__(self, content, release: Callable[[], None], **kwargs):
+        super().__init__(content, **kwargs)
+        self.release = release
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
+
+
+async def metered_sse(events: AsyncIterator[str], kind: str) -> AsyncIterator[str]:
+    """统计SSE流式响应的发送字节数与进行中的流数"""
+    sent = 0
+    ACTIVE_STREAMS.labels(kind=kind).inc()
+    try:
+        async for event in events:
+            sent += len(event.encode("utf-8"))
+            yield event
+    finally:
+        ACTIVE_STREAMS.labels(kind=kind).dec()
+        SSE_BYTES.observe(sent)
+
+
+async def load_models():
+    """后台加载并预热模型，就绪后启动转录任务队列"""
+    global job_queue
+    try:
+        await sensevoice_client.load(
+            warmup_runs=settings.SENSEVOICE_WARMUP_RUNS,
+            warmup_duration=settings.SENSEVOICE_WARMUP_DURATION
+        )
+        logger.info("SenseVoice本地模型客户端初始化成功")
+        
+        # 初始化转录任务队列
+        queue = JobQueue(
+            store=JobStore(settings.job_db_path, lease_time=settings.job_lease_time),
+            sensevoice_client=sensevoice_client,
+            file_manager=file_manager,
+            workers=settings.job_workers,
+            max_pending=settings.job_max_pending,
+            # 多工作进程部署时由启动脚本统一重新排队，单个工作进程重启后其遗留任务按租约过期重新领取
+            requeue_on_start=settings.inference_server is None
+        )
+        await queue.start()
+        job_queue = queue
+        
+        logger.info(f"服务已就绪，启动耗时: {time.time() - app_start_time:.2f}秒")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.exception(f"模型后台加载失败: {str(e)}")
+
+
 async def cleanup_files():
     """清理过期文件的定时任务"""
     if file_manager:
-        deleted_count = file_manager.cleanup_old_files(settings.file_retention_time)
+        # 多工作进程部署时，其他进程中未结束的任务引用的文件同样需要保留
+        keep = await job_queue.active_file_ids() if job_queue else None
+        # 在工作线程中清理，避免删除大量文件时阻塞事件循环
+        deleted_count = await asyncio.to_thread(
+            file_manager.cleanup_old_files,
+            settings.file_retention_time,
+            keep,
+            settings.file_disk_high_water
+        )
         logger.info(f"定时清理完成，删除了 {deleted_count} 个过期文件")
+    
+    if job_queue:
+        deleted_jobs = await job_queue.cleanup(settings.job_retention_time)
+        logger.info(f"定时清理完成，删除了 {deleted_jobs} 个过期任务记录")
 
 
 def get_file_manager() -> FileManager:
@@ -131,27 +293,85 @@ def get_file_manager() -> FileManager:
 
 
 def get_sensevoice_client() -> SenseVoiceClient:
-    """获取SenseVoice客户端依赖"""
+    """获取SenseVoice客户端依赖，模型就绪前返回503"""
     if sensevoice_client is None:
         raise HTTPException(status_code=500, detail="SenseVoice客户端未初始化")
+    if not sensevoice_client.is_model_ready():
+        raise_not_ready()
     return sensevoice_client
 
 
+def raise_not_ready():
+    """模型尚未就绪时的统一响应"""
+    if sensevoice_client is not None and sensevoice_client.status == "failed":
+        raise HTTPException(status_code=503, detail=f"模型加载失败: {sensevoice_client.load_error}")
+    raise HTTPException(status_code=503, detail="模型正在加载，请稍后重试", headers={"Retry-After": "10"})
+
+
+def get_hotword_registry() -> HotwordRegistry:
+    """获取热词表注册中心依赖"""
+    if hotword_registry is None:
+        raise HTTPException(status_code=500, detail="热词表注册中心未初始化")
+    return hotword_registry
+
+
+async def resolve_keywords(registry: HotwordRegistry, keywords: Optional[str], hotword_id: Optional[str]) -> Optional[str]:
+    """合并请求中的关键词与引用的热词表，每个请求只解析一次"""
+    try:
+        return await asyncio.to_thread(registry.resolve, keywords, hotword_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"热词表不存在: {hotword_id}")
+
+
+def get_job_queue() -> JobQueue:
+    """获取转录任务队列依赖，任务队列在模型就绪后启动"""
+    if job_queue is None:
+        raise_not_ready()
+    return job_queue
+
+
+def job_to_status(job: dict, include_result: bool = True) -> TaskStatus:
+    """将任务记录转换为任务状态响应"""
+    return TaskStatus(
+        task_id=job["job_id"],
+        status=job["status"],
+        file_id=job["file_id"],
+        file_name=job["file_name"],
+        progress=job["progress"],
+        result=job["result"] if include_result else None,
+        error=job["error"],
+        processing_time=job["processing_time"],
+        created_time=datetime.fromtimestamp(job["created_time"]),
+        updated_time=datetime.fromtimestamp(job["updated_time"])
+    )
+
+
+def content_disposition(filename: str) -> str:
+    """附件下载响应头，非ASCII文件名按RFC 5987编码"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """检查 If-None-Match 请求头是否匹配ETag（弱比较）"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
 @app.get("/", response_class=FileResponse)
 async def index():
     """首页"""
     static_dir = Path(__file__).parent / "static"
     index_file = static_dir / "index.html"
     
-    # 添加调试信息
-    logger.info(f"Index route called. Static dir: {static_dir}, exists: {static_dir.exists()}")
-    logger.info(f"Index file: {index_file}, exists: {index_file.exists()}")
-    
     if index_file.exists():
-        logger.info("Returning FileResponse for index.html")
         return FileResponse(index_file)
     else:
-        logger.info("Index.html not found, returning JSON response")
+        logger.debug("index.html不存在: {}，返回服务信息", index_file)
         return JSONResponse(
             content={
                 "name": settings.app_name,
@@ -173,6 +393,33 @@ async def health_check():
     )
 
 
+@app.get("/ready", response_model=ReadinessResponse, responses={503: {"model": ReadinessResponse}})
+async def readiness_check():
+    """就绪检查：模型加载并预热完成后返回200，之前返回503
+    
+    与 /health 不同，/health 只表示进程存活，可用于负载均衡判断是否转发转录请求。
+    """
+    ready = sensevoice_client is not None and sensevoice_client.is_model_ready() and job_queue is not None
+    readiness = ReadinessResponse(
+        ready=ready,
+        status="ready" if ready else (sensevoice_client.status if sensevoice_client else "loading"),
+        error=sensevoice_client.load_error if sensevoice_client else None,
+        timestamp=int(time.time()),
+        uptime=time.time() - app_start_time
+    )
+    return JSONResponse(status_code=200 if ready else 503, content=readiness.model_dump())
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus指标"""
+    rendered = render_metrics()
+    if rendered is None:
+        raise HTTPException(status_code=503, detail="prometheus_client未安装，指标不可用")
+    content, content_type = rendered
+    return Response(content=content, media_type=content_type)
+
+
 @app.get("/info", response_model=SystemInfo)
 async def system_info():
     """系统信息"""
@@ -184,21 +431,26 @@ async def system_info():
         device_info = sensevoice_client.get_device_info()
     
     return SystemInfo(
-        app_name=settings.APP_NAME,
-        version=settings.APP_VERSION,
-        debug=settings.DEBUG,
-        upload_dir=str(settings.UPLOAD_DIR),
-        max_file_size=settings.MAX_FILE_SIZE,
-        allowed_extensions=list(settings.ALLOWED_EXTENSIONS),
+        app_name=settings.app_name,
+        version=settings.app_version,
+        debug=settings.debug,
+        upload_dir=str(settings.upload_dir),
+        max_file_size=settings.max_file_size,
+        allowed_extensions=list(settings.allowed_extensions),
         supported_languages=["zh", "en", "ja", "ko", "yue", "auto"],
         model_info=model_info,
-        device_info=device_info
+        device_info=device_info,
+        cache_info=result_cache.get_stats() if result_cache else {},
+        job_info=await job_queue.get_stats() if job_queue else {},
+        hotword_info=hotword_registry.get_stats() if hotword_registry else {}
     )
 
 
 @app.post("/upload", response_model=UploadResponse)
 async def upload_audio(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(..., description="音频文件"),
+    predecode: bool = Form(default=False, description="上传后在后台预解码为16kHz PCM，之后按file_id转录时跳过解码"),
     fm: FileManager = Depends(get_file_manager)
 ):
     """上传音频文件"""
@@ -223,11 +475,19 @@ async def upload_audio(
         
         access_logger.info(f"文件上传成功 - 文件ID: {file_path.name}, 大小: {file_info.get('size', 0)} 字节")
         
+        message = "文件上传成功"
+        if predecode:
+            if is_ffmpeg_available():
+                background_tasks.add_task(predecode_to_pcm, file_path, fm.get_pcm_path(file_path))
+                message = "文件上传成功，正在后台预解码"
+            else:
+                logger.warning("ffmpeg不可用，跳过预解码")
+        
         return UploadResponse(
             success=True,
             file_id=file_path.name,
             file_info=file_info,
-            message="文件上传成功"
+            message=message
         )
         
     except HTTPException:
@@ -241,41 +501,79 @@ async def upload_audio(
 
 @app.post("/transcribe-stream")
 async def transcribe_audio_stream(
-    file: UploadFile = File(..., description="音频文件"),
+    file: Optional[UploadFile] = File(None, description="音频文件，与file_id二选一"),
+    file_id: Optional[str] = Form(None, description="/upload 返回的文件ID，与file二选一，复用已上传的文件"),
     keywords: Optional[str] = Form(None, description="关键词，用逗号分隔"),
     language: str = Form(default="zh-CN", description="语言代码"),
     chunk_duration: float = Form(default=30.0, description="音频块时长（秒）"),
+    delta: bool = Form(default=False, description="增量模式：事件只返回本块文本及偏移，完整文本仅在最后一个事件中返回"),
+    word_timestamps: bool = Form(default=False, description="事件中附带词级时间戳(words)"),
+    hotword_id: Optional[str] = Form(None, description="/hotwords 返回的热词表ID，与keywords合并使用"),
     fm: FileManager = Depends(get_file_manager),
-    sv_client: SenseVoiceClient = Depends(get_sensevoice_client)
+    sv_client: SenseVoiceClient = Depends(get_sensevoice_client),
+    registry: HotwordRegistry = Depends(get_hotword_registry)
 ):
-    """流式转录音频文件"""
+    """流式转录音频文件
+    
+    可直接上传音频文件（转录完成后删除），也可通过file_id转录 /upload 已保存的文件，
+    避免重复上传；已保存的文件转录后保留，由定时清理任务删除。
+    每个事件携带本块在音频中的起止时间与语音段(秒)，可直接用于生成字幕。
+    """
     access_logger = get_access_logger()
-    access_logger.info(f"流式转录请求 - 文件名: {file.filename}, 语言: {language}, 关键词: {keywords}")
     
-    file_path = None
+    if (file is None) == (file_id is None):
+        raise HTTPException(status_code=400, detail="请提供音频文件或file_id中的一个")
+    
+    if file_id is not None:
+        file_path = fm.resolve_file_id(file_id)
+        if file_path is None:
+            raise HTTPException(status_code=404, detail=f"文件不存在或已过期: {file_id}")
+        file_name = file_path.name
+        # 在返回响应前标记文件正在使用，防止开始转录前被定时清理删除
+        fm.pin_file(file_name)
+        if not file_path.is_file():
+            fm.unpin_file(file_name)
+            raise HTTPException(status_code=404, detail=f"文件不存在或已过期: {file_id}")
+        pinned = [file_name]
+    else:
+        file_path = None
+        file_name = file.filename
+        pinned = []
+    
+    def release_pin():
+        """取消文件使用标记，只执行一次"""
+        while pinned:
+            fm.unpin_file(pinned.pop())
+    
+    access_logger.info(f"流式转录请求 - 文件名: {file_name}, 语言: {language}, 关键词: {keywords}, 热词表: {hotword_id}")
+    try:
+        keywords = await resolve_keywords(registry, keywords, hotword_id)
+    except BaseException:
+        release_pin()
+        raise
     
     async def generate_stream():
         nonlocal file_path
         try:
             # 记录请求信息
-            logger.info(f"开始流式转录 - 文件名: {file.filename}, 语言: {language}, 块时长: {chunk_duration}s")
-            
-            # 流式保存文件
-            file_path = await fm.save_upload_file_stream(file, file.filename)
-            
-            if file_path is None:
-                error_msg = "文件保存失败，请检查文件格式和大小"
-                logger.error(error_msg)
-                import json
-                error_result = {
-                    "success": False,
-                    "error": error_msg,
-                    "timestamp": int(time.time())
-                }
-                yield f"data: {json.dumps(error_result, ensure_ascii=False)}\n\n"
-                return
+            logger.info(f"开始流式转录 - 文件名: {file_name}, 语言: {language}, 块时长: {chunk_duration}s")
             
-            logger.info(f"流式转录文件保存成功 - 路径: {file_path}")
+            if file_id is None:
+                # 流式保存文件
+                file_path = await fm.save_upload_file_stream(file, file.filename)
+                
+                if file_path is None:
+                    error_msg = "文件保存失败，请检查文件格式和大小"
+                    logger.error(error_msg)
+                    error_result = {
+                        "success": False,
+                        "error": error_msg,
+                        "timestamp": int(time.time())
+                    }
+                    yield f"data: {json.dumps(error_result, ensure_ascii=False)}\n\n"
+                    return
+                
+                logger.info(f"流式转录文件保存成功 - 路径: {file_path}")
             
             # 流式转录音频
             chunk_count = 0
@@ -283,22 +581,24 @@ async def transcribe_audio_stream(
                 file_path=file_path,
                 keywords=keywords,
                 language=language,
-                chunk_duration=chunk_duration
+                chunk_duration=chunk_duration,
+                delta=delta,
+                audio_hash=await fm.get_file_hash(file_path),
+                pcm_path=fm.find_pcm_file(file_path),
+                word_timestamps=word_timestamps
             ):
                 chunk_count += 1
-                logger.debug(f"流式转录块 {chunk_count} 完成")
-                import json
+                logger.debug("流式转录块 {} 完成", chunk_count)
                 yield f"data: {json.dumps(result, ensure_ascii=False)}\n\n"
             
             logger.info(f"流式转录完成 - 总块数: {chunk_count}")
-            access_logger.info(f"流式转录成功 - 文件: {file.filename}, 块数: {chunk_count}")
+            access_logger.info(f"流式转录成功 - 文件: {file_name}, 块数: {chunk_count}")
                 
         except Exception as e:
             error_msg = f"流式转录失败: {str(e)}"
             logger.exception(error_msg)  # 记录完整的堆栈跟踪
-            access_logger.error(f"流式转录失败 - 文件: {file.filename}, 错误: {str(e)}")
+            access_logger.error(f"流式转录失败 - 文件: {file_name}, 错误: {str(e)}")
             
-            import json
             error_result = {
                 "success": False,
                 "error": error_msg,
@@ -307,16 +607,19 @@ async def transcribe_audio_stream(
             yield f"data: {json.dumps(error_result, ensure_ascii=False)}\n\n"
         
         finally:
-            # 清理临时文件
-            if file_path and file_path.exists():
+            if file_id is not None:
+                release_pin()
+            # 清理本次请求上传的临时文件
+            elif file_path and file_path.exists():
                 try:
                     fm.delete_file(file_path)
                     logger.info(f"临时文件已清理: {file_path}")
                 except Exception as e:
                     logger.error(f"清理临时文件失败: {file_path}, 错误: {str(e)}")
     
-    return StreamingResponse(
-        generate_stream(),
+    return ReleasingStreamingResponse(
+        metered_sse(generate_stream(), "stream"),
+        release=release_pin,
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -327,27 +630,382 @@ async def transcribe_audio_stream(
     )
 
 
-@app.get("/download/{text}", response_class=FileResponse)
-async def download_text(text: str):
-    """下载转录文本"""
-    try:
-        # 创建临时文本文件
-        temp_dir = Path(settings.upload_dir)
-        temp_file = temp_dir / f"transcription_{int(time.time())}.txt"
-        
-        # 写入文本内容
-        with open(temp_file, 'w', encoding='utf-8') as f:
-            f.write(text)
-        
-        return FileResponse(
-            path=temp_file,
-            filename=f"转录文本_{int(time.time())}.txt",
-            media_type="text/plain"
+@app.post("/transcribe-stream/pipelined")
+async def transcribe_audio_pipelined(
+    request: Request,
+    filename: str = Query(..., description="音频文件名，用于校验格式"),
+    keywords: Optional[str] = Query(None, description="关键词，用逗号分隔"),
+    language: str = Query(default="zh-CN", description="语言代码"),
+    chunk_duration: float = Query(default=30.0, description="音频块时长（秒）"),
+    save_file: bool = Query(default=False, description="是否同时保存上传的音频文件"),
+    delta: bool = Query(default=False, description="增量模式：事件只返回本块文本及偏移，完整文本仅在最后一个事件中返回"),
+    word_timestamps: bool = Query(default=False, description="事件中附带词级时间戳(words)"),
+    hotword_id: Optional[str] = Query(None, description="/hotwords 返回的热词表ID，与keywords合并使用"),
+    fm: FileManager = Depends(get_file_manager),
+    sv_client: SenseVoiceClient = Depends(get_sensevoice_client),
+    registry: HotwordRegistry = Depends(get_hotword_registry)
+):
+    """边上传边转录
+    
+    请求体为原始音频数据（非multipart表单），服务端边接收边解码，
+    音频足够组成一个音频块时即开始推理，使网络传输、解码与推理重叠进行。
+    仅支持可顺序解码的格式（WAV、MP3、FLAC、OGG、AAC）。
+    """
+    access_logger = get_access_logger()
+    access_logger.info(f"边上传边转录请求 - 文件名: {filename}, 语言: {language}, 关键词: {keywords}, 热词表: {hotword_id}")
+    
+    if not fm.is_allowed_file(filename):
+        raise HTTPException(status_code=400, detail=f"不允许的文件类型: {filename}")
+    
+    extension = filename.rsplit('.', 1)[1].lower()
+    if extension not in STREAMABLE_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{extension} 格式不支持边上传边转录，请使用 /transcribe-stream"
         )
+    
+    if not is_ffmpeg_available():
+        raise HTTPException(status_code=503, detail="服务端未安装ffmpeg，无法边上传边转录")
+    
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > fm.max_file_size:
+        raise HTTPException(status_code=413, detail="文件大小超出限制")
+    
+    keywords = await resolve_keywords(registry, keywords, hotword_id)
+    save_path = fm.create_upload_path(filename) if save_file else None
+    
+    async def generate_stream():
+        chunk_count = 0
+        try:
+            byte_stream = fm.tee_upload_stream(request.stream(), filename, save_path)
+            async for result in sv_client.transcribe_byte_stream(
+                byte_stream=byte_stream,
+                file_name=filename,
+                keywords=keywords,
+                language=language,
+                chunk_duration=chunk_duration,
+                delta=delta,
+                word_timestamps=word_timestamps
+            ):
+                chunk_count += 1
+                if save_path is not None:
+                    result["file_id"] = save_path.name
+                yield f"data: {json.dumps(result, ensure_ascii=False)}\n\n"
+            
+            logger.info(f"边上传边转录完成 - 文件: {filename}, 块数: {chunk_count}")
+            access_logger.info(f"边上传边转录成功 - 文件: {filename}, 块数: {chunk_count}")
         
+        except Exception as e:
+            error_msg = f"边上传边转录失败: {str(e)}"
+            logger.exception(error_msg)
+            access_logger.error(f"边上传边转录失败 - 文件: {filename}, 错误: {str(e)}")
+            error_result = {
+                "success": False,
+                "error": error_msg,
+                "timestamp": int(time.time())
+            }
+            yield f"data: {json.dumps(error_result, ensure_ascii=False)}\n\n"
+    
+    return RequestBodyStreamingResponse(
+        metered_sse(generate_stream(), "pipelined"),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Headers": "*"
+        }
+    )
+
+
+LIVE_AUDIO_FORMATS = ("pcm", "webm", "ogg")
+HOTWORD_FILE_MAX_SIZE = 1024 * 1024  # 热词表文件最大大小(字节)
+
+
+@app.websocket("/ws/transcribe")
+async def websocket_transcribe(
+    websocket: WebSocket,
+    language: str = "zh-CN",
+    keywords: Optional[str] = None,
+    hotword_id: Optional[str] = None,
+    format: str = "pcm"
+):
+    """实时语音转录
+    
+    客户端发送二进制音频帧：format=pcm 时为16kHz单声道s16le PCM，
+    format=webm/ogg 时为浏览器MediaRecorder录制的Opus音频（需ffmpeg）。
+    发送文本消息 {"type": "stop"} 或断开连接表示音频结束。
+    服务端返回JSON事件：partial（当前语音段的临时结果）、final（语音段最终结果）、
+    end（全部音频转录完成）、error。
+    """
+    access_logger = get_access_logger()
+    await websocket.accept()
+    
+    if sensevoice_client is None or not sensevoice_client.is_model_ready():
+        await websocket.send_json({"type": "error", "error": "模型正在加载，请稍后重试"})
+        await websocket.close(code=1013)
+        return
+    if format not in LIVE_AUDIO_FORMATS:
+        await websocket.send_json({"type": "error", "error": f"不支持的音频格式: {format}，可选: {', '.join(LIVE_AUDIO_FORMATS)}"})
+        await websocket.close(code=1003)
+        return
+    if format != "pcm" and not is_ffmpeg_available():
+        await websocket.send_json({"type": "error", "error": "服务端未安装ffmpeg，请使用pcm格式"})
+        await websocket.close(code=1011)
+        return
+    
+    access_logger.info(f"实时转录连接 - 格式: {format}, 语言: {language}, 关键词: {keywords}, 热词表: {hotword_id}")
+    try:
+        keywords = await asyncio.to_thread(hotword_registry.resolve, keywords, hotword_id)
+    except KeyError:
+        await websocket.send_json({"type": "error", "error": f"热词表不存在: {hotword_id}"})
+        await websocket.close(code=1008)
+        return
+    session = await sensevoice_client.create_live_session(
+        language=language,
+        keywords=keywords,
+        partial_interval=settings.live_partial_interval,
+        max_segment_duration=settings.live_max_segment_duration
+    )
+    
+    async def receive_messages():
+        """持续读取客户端消息，音频帧为二进制，收到stop或连接断开时结束"""
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                yield message["bytes"]
+            elif message.get("text"):
+                try:
+                    if json.loads(message["text"]).get("type") == "stop":
+                        return
+                except (ValueError, AttributeError):
+                    logger.warning(f"忽略无法识别的实时转录消息: {message['text'][:100]}")
+    
+    async def receive_audio():
+        try:
+            if format == "pcm":
+                remainder = b""
+                async for data in receive_messages():
+                    data = remainder + data
+                    usable = len(data) - len(data) % 2
+                    remainder = data[usable:]
+                    session.push(np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32) / 32768.0)
+            else:
+                # 压缩音频经ffmpeg管道解码，使用较短的帧以降低延迟
+                async for frame in decode_audio_bytes_stream(receive_messages(), frame_seconds=0.1):
+                    session.push(frame)
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logger.error(f"实时转录音频接收失败: {str(e)}")
+        finally:
+            session.close()
+    
+    receive_task = asyncio.create_task(receive_audio())
+    ACTIVE_STREAMS.labels(kind="live").inc()
+    try:
+        async for event in session.events():
+            await websocket.send_json(event)
+        await websocket.close()
+        access_logger.info("实时转录完成")
+    except (WebSocketDisconnect, RuntimeError):
+        logger.info("实时转录客户端已断开")
     except Exception as e:
-        logger.error(f"下载文本时发生错误: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"下载失败: {str(e)}")
+        logger.exception(f"实时转录失败: {str(e)}")
+        ERRORS.labels(stage="live").inc()
+        try:
+            await websocket.send_json({"type": "error", "error": f"实时转录失败: {str(e)}"})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+    finally:
+        ACTIVE_STREAMS.labels(kind="live").dec()
+        receive_task.cancel()
+
+
+@app.post("/jobs", response_model=TaskStatus, status_code=202)
+async def create_job(
+    file: Optional[UploadFile] = File(None, description="音频文件，与file_id二选一"),
+    file_id: Optional[str] = Form(None, description="/upload 返回的文件ID，与file二选一"),
+    keywords: Optional[str] = Form(None, description="关键词，用逗号分隔"),
+    language: str = Form(default="zh-CN", description="语言代码"),
+    chunk_duration: float = Form(default=30.0, description="音频块时长（秒）"),
+    hotword_id: Optional[str] = Form(None, description="/hotwords 返回的热词表ID，与keywords合并使用"),
+    fm: FileManager = Depends(get_file_manager),
+    jq: JobQueue = Depends(get_job_queue),
+    registry: HotwordRegistry = Depends(get_hotword_registry)
+):
+    """提交异步转录任务
+    
+    任务进入队列后立即返回任务ID，通过 /jobs/{task_id} 轮询状态，
+    完成后通过 /jobs/{task_id}/result 获取转录结果。
+    """
+    access_logger = get_access_logger()
+    
+    if (file is None) == (file_id is None):
+        raise HTTPException(status_code=400, detail="请提供音频文件或file_id中的一个")
+    
+    if await jq.is_full():
+        raise HTTPException(status_code=503, detail="转录任务队列已满，请稍后重试")
+    
+    # 任务记录保存解析后的关键词，热词表之后被删除也不影响排队中的任务
+    keywords = await resolve_keywords(registry, keywords, hotword_id)
+    
+    if file is not None:
+        file_path = await fm.save_upload_file_stream(file, file.filename)
+        if file_path is None:
+            raise HTTPException(status_code=400, detail="文件上传失败，请检查文件格式和大小")
+        file_name = file.filename
+    else:
+        file_path = fm.resolve_file_id(file_id)
+        if file_path is None:
+            raise HTTPException(status_code=404, detail=f"文件不存在或已过期: {file_id}")
+        # 上传时保存的文件名格式为 {时间戳}_{原始文件名}
+        file_name = file_path.name.split('_', 1)[-1]
+    
+    job = await jq.submit(
+        file_id=file_path.name,
+        file_name=file_name,
+        language=language,
+        keywords=keywords,
+        chunk_duration=chunk_duration
+    )
+    access_logger.info(f"转录任务提交 - 任务ID: {job['job_id']}, 文件: {file_path.name}, 语言: {language}")
+    return job_to_status(job)
+
+
+@app.get("/jobs/{task_id}", response_model=TaskStatus)
+async def get_job(task_id: str, jq: JobQueue = Depends(get_job_queue)):
+    """查询转录任务状态"""
+    job = await jq.get(task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"任务不存在: {task_id}")
+    return job_to_status(job, include_result=False)
+
+
+@app.get("/jobs/{task_id}/result", response_model=TranscriptionResponse)
+async def get_job_result(task_id: str, jq: JobQueue = Depends(get_job_queue)):
+    """获取转录任务结果"""
+    job = await jq.get(task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"任务不存在: {task_id}")
+    if job["status"] not in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"任务尚未完成，当前状态: {job['status']}")
+    
+    return TranscriptionResponse(
+        success=job["status"] == JOB_COMPLETED,
+        task_id=job["job_id"],
+        transcription=job["result"],
+        processing_time=job["processing_time"],
+        file_name=job["file_name"],
+        timestamp=int(job["updated_time"]),
+        error=job["error"]
+    )
+
+
+@app.get("/jobs/{task_id}/export")
+async def export_job(
+    request: Request,
+    task_id: str,
+    format: str = Query(default="txt", description="导出格式：txt, srt, vtt, json"),
+    jq: JobQueue = Depends(get_job_queue)
+):
+    """导出转录任务结果
+    
+    由任务保存的转录结果直接生成响应内容，不写入临时文件。任务完成后结果不再变化，
+    响应带ETag，客户端携带 If-None-Match 重复下载时返回304。
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的导出格式: {format}，可选: {', '.join(EXPORT_FORMATS)}")
+    
+    job = await jq.get(task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"任务不存在: {task_id}")
+    if job["status"] != JOB_COMPLETED:
+        raise HTTPException(status_code=409, detail=f"任务未成功完成，当前状态: {job['status']}")
+    
+    etag = export_etag(job, format)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=3600"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    if format in SUBTITLE_FORMATS and job["chunks"] is None:
+        raise HTTPException(status_code=409, detail="该任务未保存时间信息，无法导出字幕，请重新提交任务")
+    
+    file_stem = Path(job["file_name"]).stem if job["file_name"] else task_id
+    headers["Content-Disposition"] = content_disposition(f"{file_stem}.{format}")
+    return StreamingResponse(export_transcript(job, format), media_type=EXPORT_FORMATS[format], headers=headers)
+
+
+@app.post("/hotwords", response_model=HotwordListInfo, status_code=201)
+async def create_hotword_list(
+    name: str = Form(..., description="热词表名称"),
+    words: Optional[str] = Form(None, description="关键词，用逗号或换行分隔，与file二选一"),
+    file: Optional[UploadFile] = File(None, description="UTF-8文本文件，每行一个关键词，与words二选一"),
+    registry: HotwordRegistry = Depends(get_hotword_registry)
+):
+    """上传热词表
+    
+    关键词经规范化、去重后保存，返回的ID可在转录请求中通过hotword_id引用；
+    相同名称与内容的热词表重复上传时返回同一ID。
+    """
+    if (words is None) == (file is None):
+        raise HTTPException(status_code=400, detail="请提供words或file中的一个")
+    
+    if file is not None:
+        content = await file.read(HOTWORD_FILE_MAX_SIZE + 1)
+        if len(content) > HOTWORD_FILE_MAX_SIZE:
+            raise HTTPException(status_code=413, detail="热词表文件大小超出限制")
+        try:
+            words = content.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="热词表文件须为UTF-8编码")
+    
+    try:
+        info = await asyncio.to_thread(registry.register, name.strip(), parse_keywords(words))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    get_access_logger().info(f"热词表上传 - ID: {info['id']}, 名称: {info['name']}, 关键词数: {info['count']}")
+    return HotwordListInfo(**info)
+
+
+@app.get("/hotwords", response_model=List[HotwordListInfo])
+async def list_hotword_lists(registry: HotwordRegistry = Depends(get_hotword_registry)):
+    """列出全部热词表（不含关键词）"""
+    return [HotwordListInfo(**info) for info in await asyncio.to_thread(registry.list)]
+
+
+@app.get("/hotwords/{hotword_id}", response_model=HotwordListInfo)
+async def get_hotword_list(hotword_id: str, registry: HotwordRegistry = Depends(get_hotword_registry)):
+    """查询热词表及其关键词"""
+    entry = await asyncio.to_thread(registry.get, hotword_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"热词表不存在: {hotword_id}")
+    return HotwordListInfo(count=len(entry["words"]), **entry)
+
+
+@app.delete("/hotwords/{hotword_id}", status_code=204)
+async def delete_hotword_list(hotword_id: str, registry: HotwordRegistry = Depends(get_hotword_registry)):
+    """删除热词表，已提交的转录任务不受影响"""
+    if not await asyncio.to_thread(registry.delete, hotword_id):
+        raise HTTPException(status_code=404, detail=f"热词表不存在: {hotword_id}")
+    return Response(status_code=204)
+
+
+@app.get("/download/{text}")
+async def download_text(text: str):
+    """下载转录文本
+    
+    文本直接作为响应内容返回，不写入文件。文本长度受URL长度限制，
+    异步任务的结果请使用 /jobs/{task_id}/export。
+    """
+    return Response(
+        content=text,
+        media_type=EXPORT_FORMATS["txt"],
+        headers={"Content-Disposition": content_disposition(f"转录文本_{int(time.time())}.txt")}
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+"""服务启动模块
+
+`WEB_WORKERS` 为1时等同于直接运行uvicorn；大于1时先启动共享推理进程加载模型，
+再启动多个HTTP工作进程。各工作进程通过本地Unix Socket将推理请求转发给推理进程，
+上传、解码与SSE推送可利用多个CPU核，模型只占用一份内存。
+
+用法: python -m app.server
+"""
+
+import os
+import shutil
+import signal
+import asyncio
+import secrets
+import tempfile
+import threading
+import multiprocessing
+
+import uvicorn
+from loguru import logger
+
+from shared.config import settings
+from shared.utils import JobStore, setup_logger
+from shared.utils.inference_server import serve_inference
+
+
+KEEP_ALIVE_TIMEOUT = 600  # HTTP长连接保持时间(秒)，流式转录期间连接需保持
+
+
+def _run_inference_server(address: str, authkey: bytes):
+    """共享推理进程入口：加载并预热模型后提供推理服务"""
+    # 终端中断信号由主进程统一处理，推理进程随主进程退出而停止
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    setup_logger()
+    from app.main import create_sensevoice_client
+
+    # 推理进程内固定使用线程池，并发推理数由 SENSEVOICE_EXECUTOR_WORKERS 控制
+    client = create_sensevoice_client(executor_type="thread")
+    asyncio.run(client.load(
+        warmup_runs=settings.SENSEVOICE_WARMUP_RUNS,
+        warmup_duration=settings.SENSEVOICE_WARMUP_DURATION
+    ))
+    serve_inference(client, address, authkey, max_concurrency=settings.SENSEVOICE_EXECUTOR_WORKERS)
+
+
+def _watch_inference_server(process: multiprocessing.Process, stopping: threading.Event):
+    """推理进程意外退出时终止整个服务，由容器编排负责重启"""
+    process.join()
+    if not stopping.is_set():
+        logger.error(f"共享推理进程异常退出，退出码: {process.exitcode}，正在停止服务")
+        os.kill(os.getpid(), signal.SIGTERM)
+
+
+def main():
+    setup_logger()
+    workers = max(1, settings.web_workers)
+    # 生产日志配置下请求日志由 AccessLogMiddleware 记录，关闭uvicorn逐请求的访问日志
+    access_log = settings.log_profile != "production"
+
+    if workers == 1:
+        uvicorn.run(
+            "app.main:app",
+            host=settings.host,
+            port=settings.port,
+            timeout_keep_alive=KEEP_ALIVE_TIMEOUT,
+            access_log=access_log
+        )
+        return
+
+    # 各工作进程共用任务数据库，上次运行中断的任务在工作进程启动前统一重新排队
+    store = JobStore(settings.job_db_path)
+    requeued = store.requeue_processing()
+    store.close()
+    if requeued:
+        logger.warning(f"{requeued} 个任务在上次运行中未完成，已重新排队")
+
+    address = os.path.join(tempfile.gettempdir(), f"sensevoice-inference-{os.getpid()}.sock")
+    authkey = secrets.token_hex(16)
+
+    # 各工作进程的Prometheus指标写入共享目录，/metrics 汇总所有进程的数据
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    owns_metrics_dir = not metrics_dir
+    if owns_metrics_dir:
+        metrics_dir = tempfile.mkdtemp(prefix="sensevoice-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+    else:
+        # 清除上次运行残留的指标文件
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
+
+    # 使用spawn启动推理进程，避免继承父进程状态
+    context = multiprocessing.get_context("spawn")
+    process = context.Process(
+        target=_run_inference_server,
+        args=(address, authkey.encode()),
+        name="sensevoice-inference",
+        daemon=True
+    )
+    process.start()
+    logger.info(f"共享推理进程已启动，PID: {process.pid}，HTTP工作进程数: {workers}")
+
+    stopping = threading.Event()
+    threading.Thread(target=_watch_inference_server, args=(process, stopping), daemon=True).start()
+
+    # HTTP工作进程由uvicorn启动，通过环境变量获取推理进程地址；推理进程就绪前 /ready 返回503
+    os.environ["INFERENCE_SERVER"] = address
+    os.environ["INFERENCE_AUTHKEY"] = authkey
+    try:
+        uvicorn.run(
+            "app.main:app",
+            host=settings.host,
+            port=settings.port,
+            workers=workers,
+            timeout_keep_alive=KEEP_ALIVE_TIMEOUT,
+            access_log=access_log
+        )
+    finally:
+        stopping.set()
+        process.terminate()
+        process.join(timeout=10)
+        if os.path.exists(address):
+            os.unlink(address)
+        if owns_metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+        logger.info("共享推理进程已停止")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""转录流水线性能基准测试
+
+用法（在服务目录下执行）:
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.compare baseline.json results.json
+    python -m benchmarks.loadtest --concurrency 16 --requests 64
+"""
@@ -0,0 +1,63 @@
+"""对比两次基准测试结果
+
+用法: python -m benchmarks.compare baseline.json current.json [--threshold 5] [--fail-on-regression]
+
+按各用例的中位耗时计算变化百分比，超过阈值的变慢标记为回退。
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+def _load(path: str) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def _short(commit: Optional[str]) -> str:
+    return commit[:8] if commit else "unknown"
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """打印对比表格，返回回退的用例名"""
+    if baseline.get("config") != current.get("config"):
+        print("警告: 两次测试参数不同，结果可能不可比", file=sys.stderr)
+
+    print(f"基准: {_short(baseline.get('git_commit'))}  当前: {_short(current.get('git_commit'))}")
+    print(f"{'用例':<20}{'基准(秒)':>12}{'当前(秒)':>12}{'变化':>10}")
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<20}{'-':>12}{result['median']:>12.4f}{'新增':>10}")
+            continue
+        change = (result["median"] - base["median"]) / base["median"] * 100 if base["median"] else 0.0
+        mark = ""
+        if change > threshold:
+            mark = "  回退"
+            regressions.append(name)
+        elif change < -threshold:
+            mark = "  提升"
+        print(f"{name:<20}{base['median']:>12.4f}{result['median']:>12.4f}{change:>+9.1f}%{mark}")
+    for name, reason in current.get("skipped", {}).items():
+        print(f"{name:<20}跳过: {reason}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="对比两次基准测试结果")
+    parser.add_argument("baseline", help="基准结果JSON")
+    parser.add_argument("current", help="当前结果JSON")
+    parser.add_argument("--threshold", type=float, default=5.0, help="视为变化的中位耗时变化百分比")
+    parser.add_argument("--fail-on-regression", action="store_true", help="存在回退时以非零状态码退出")
+    args = parser.parse_args(argv)
+
+    regressions = compare(_load(args.baseline), _load(args.current), args.threshold)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""/transcribe-stream 并发负载测试
+
+以N个并发客户端持续上传合成音频到 `/transcribe-stream`，统计首个事件延迟、
+事件间隔、端到端延迟分位数与吞吐量。测试期间以固定间隔请求 `/health`，
+其延迟反映服务端事件循环是否被阻塞。
+
+未指定 `--url` 时在本进程内启动服务（独立线程与事件循环），推理后端为桩模型，
+结果缓存关闭，上传与任务数据写入临时目录：
+    python -m benchmarks.loadtest --concurrency 16 --requests 64
+指定 `--url` 时对已运行的服务施压（注意结果缓存，每个请求的音频内容均不同）：
+    python -m benchmarks.loadtest --url http://localhost:8000 --concurrency 8
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import asyncio
+import argparse
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import soundfile as sf
+from loguru import logger
+
+from shared.utils.asr_backend import SAMPLE_RATE
+
+from .stub import StubSenseVoiceClient, register_stub_backend, synth_speech
+
+
+READY_TIMEOUT = 120.0  # 等待服务就绪的最长时间(秒)
+
+
+@dataclass
+class RequestResult:
+    """单个流式转录请求的计时结果(秒)"""
+
+    success: bool = False
+    error: Optional[str] = None
+    events: int = 0
+    first_event: Optional[float] = None
+    latency: Optional[float] = None
+    inter_arrivals: List[float] = field(default_factory=list)
+
+
+def _percentiles(values: List[float]) -> Dict[str, Any]:
+    if not values:
+        return {"count": 0}
+    data = np.asarray(values)
+    return {
+        "count": len(values),
+        "mean": float(data.mean()),
+        "p50": float(np.percentile(data, 50)),
+        "p90": float(np.percentile(data, 90)),
+        "p99": float(np.percentile(data, 99)),
+        "max": float(data.max())
+    }
+
+
+def _wav_bytes(duration: float, seed: int) -> bytes:
+    """生成内容各不相同的WAV数据，避免命中结果缓存"""
+    buffer = io.BytesIO()
+    sf.write(buffer, synth_speech(duration, seed=seed), SAMPLE_RATE, format="WAV")
+    return buffer.getvalue()
+
+
+async def _transcribe(client: Any, url: str, audio: bytes, args: argparse.Namespace) -> RequestResult:
+    """发送一个流式转录请求并记录各事件的到达时间"""
+    result = RequestResult()
+    started = time.perf_counter()
+    last = started
+    try:
+        async with client.stream(
+            "POST",
+            f"{url}/transcribe-stream",
+            files={"file": ("loadtest.wav", audio, "audio/wav")},
+            data={"language": args.language, "chunk_duration": str(args.chunk_duration)}
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                result.error = f"HTTP {response.status_code}: {response.text[:200]}"
+                return result
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                now = time.perf_counter()
+                if result.first_event is None:
+                    result.first_event = now - started
+                else:
+                    result.inter_arrivals.append(now - last)
+                last = now
+                result.events += 1
+                event = json.loads(line[len("data: "):])
+                if not event.get("success"):
+                    result.error = event.get("error", "转录失败")
+                    return result
+                if event.get("is_final"):
+                    result.success = True
+        result.latency = last - started
+        if not result.success and result.error is None:
+            result.error = "未收到最终事件"
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {str(e)}"
+    return result
+
+
+async def _probe_health(client: Any, url: str, interval: float, stop: asyncio.Event, latencies: List[float]):
+    """测试期间周期性请求 /health，记录响应延迟"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            await client.get(f"{url}/health")
+            latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            logger.warning(f"健康检查请求失败: {str(e)}")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _wait_ready(client: Any, url: str):
+    deadline = time.time() + READY_TIMEOUT
+    while time.time() < deadline:
+        try:
+            if (await client.get(f"{url}/ready")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f"服务未在 {READY_TIMEOUT:.0f} 秒内就绪: {url}")
+
+
+async def run_load(url: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """以固定并发数发送全部请求，返回统计报告"""
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency + 1, max_keepalive_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(args.timeout), limits=limits) as client:
+        await _wait_ready(client, url)
+
+        results: List[RequestResult] = []
+        next_index = 0
+
+        async def worker():
+            nonlocal next_index
+            while next_index < args.requests:
+                index = next_index
+                next_index += 1
+                audio = await asyncio.to_thread(_wav_bytes, args.duration, index)
+                results.append(await _transcribe(client, url, audio, args))
+
+        stop = asyncio.Event()
+        probe_latencies: List[float] = []
+        probe = asyncio.create_task(_probe_health(client, url, args.probe_interval, stop, probe_latencies))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+
+    succeeded = [result for result in results if result.success]
+    errors: Dict[str, int] = {}
+    for result in results:
+        if not result.success:
+            errors[result.error or "unknown"] = errors.get(result.error or "unknown", 0) + 1
+
+    return {
+        "config": {
+            "url": args.url,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "duration": args.duration,
+            "chunk_duration": args.chunk_duration,
+            "stub_rtf": None if args.url else args.stub_rtf,
+            "executor_workers": None if args.url else args.executor_workers
+        },
+        "elapsed": elapsed,
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "errors": errors,
+        "throughput": {
+            "requests_per_second": len(succeeded) / elapsed,
+            "audio_seconds_per_second": len(succeeded) * args.duration / elapsed
+        },
+        "time_to_first_event": _percentiles([r.first_event for r in succeeded if r.first_event is not None]),
+        "event_inter_arrival": _percentiles([gap for r in succeeded for gap in r.inter_arrivals]),
+        "latency": _percentiles([r.latency for r in succeeded if r.latency is not None]),
+        "health_latency": _percentiles(probe_latencies)
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_local_server(args: argparse.Namespace, workdir: str):
+    """在独立线程中启动使用桩模型的服务，返回 (服务地址, uvicorn服务, 线程)"""
+    import uvicorn
+    from shared.config import settings
+    from app import main as app_main
+
+    settings.upload_dir = os.path.join(workdir, "uploads")
+    settings.job_db_path = os.path.join(workdir, "jobs.db")
+    settings.result_cache_enabled = False
+    settings.SENSEVOICE_BACKEND = "stub"
+    settings.SENSEVOICE_WARMUP_RUNS = 0
+    settings.SENSEVOICE_EXECUTOR_WORKERS = args.executor_workers
+    settings.log_level = args.log_level
+    settings.inference_server = None
+    register_stub_backend(args.stub_rtf)
+    # 上传的合成WAV由桩客户端读取，不依赖librosa或ffmpeg解码
+    app_main.SenseVoiceClient = StubSenseVoiceClient
+    # 服务日志写入临时目录下的 logs/
+    os.chdir(workdir)
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app_main.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="loadtest-server", daemon=True)
+    thread.start()
+    return f"http://127.0.0.1:{port}", server, thread
+
+
+def _print_summary(report: Dict[str, Any]):
+    def line(name: str, stats: Dict[str, Any]):
+        if not stats.get("count"):
+            print(f"{name:<16}无数据", file=sys.stderr)
+            return
+        print(
+            f"{name:<16}p50 {stats['p50'] * 1000:8.1f}ms  p90 {stats['p90'] * 1000:8.1f}ms  "
+            f"p99 {stats['p99'] * 1000:8.1f}ms  max {stats['max'] * 1000:8.1f}ms",
+            file=sys.stderr
+        )
+
+    print(
+        f"完成 {report['succeeded']} 个，失败 {report['failed']} 个，耗时 {report['elapsed']:.1f}秒，"
+        f"{report['throughput']['requests_per_second']:.2f} 请求/秒，"
+        f"{report['throughput']['audio_seconds_per_second']:.1f} 音频秒/秒",
+        file=sys.stderr
+    )
+    line("首个事件", report["time_to_first_event"])
+    line("事件间隔", report["event_inter_arrival"])
+    line("端到端", report["latency"])
+    line("/health", report["health_latency"])
+    for error, count in report["errors"].items():
+        print(f"错误 x{count}: {error}", file=sys.stderr)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="/transcribe-stream 并发负载测试")
+    parser.add_argument("--url", default=None, help="目标服务地址，为空则在本进程内启动桩模型服务")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发客户端数")
+    parser.add_argument("--requests", type=int, default=32, help="请求总数")
+    parser.add_argument("--duration", type=float, default=60.0, help="每个请求的合成音频时长(秒)")
+    parser.add_argument("--chunk-duration", type=float, default=10.0, help="音频块时长(秒)")
+    parser.add_argument("--language", default="zh", help="语言代码")
+    parser.add_argument("--timeout", type=float, default=600.0, help="单个请求超时(秒)")
+    parser.add_argument("--probe-interval", type=float, default=0.1, help="/health 探测间隔(秒)")
+    parser.add_argument("--stub-rtf", type=float, default=0.02, help="本地服务桩模型每秒音频的模拟推理耗时(秒)")
+    parser.add_argument("--executor-workers", type=int, default=1, help="本地服务的推理执行器工作者数")
+    parser.add_argument("--output", default=None, help="结果JSON输出路径，默认输出到标准输出")
+    parser.add_argument("--log-level", default="WARNING", help="日志级别")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1 or args.requests < 1:
+        parser.error("--concurrency 与 --requests 至少为1")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    workdir = None
+    server = thread = None
+    url = args.url.rstrip("/") if args.url else None
+    cwd = os.getcwd()
+    try:
+        if url is None:
+            workdir = tempfile.mkdtemp(prefix="sensevoice-loadtest-")
+            url, server, thread = _start_local_server(args, workdir)
+        report = asyncio.run(run_load(url, args))
+    finally:
+        if server is not None:
+            server.should_exit = True
+            thread.join(timeout=30)
+        if workdir is not None:
+            os.chdir(cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if report["succeeded"] == 0:
+        for error, count in report["errors"].items():
+            print(f"错误 x{count}: {error}", file=sys.stderr)
+        sys.exit("全部请求失败，未生成延迟报告")
+
+    _print_summary(report)
+    content = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(content + "\n")
+        print(f"结果已写入: {args.output}", file=sys.stderr)
+    else:
+        print(content)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""运行转录流水线基准测试并输出JSON结果
+
+默认使用桩模型与合成音频离线运行，测量模型之外各环节的耗时；指定
+`--backend funasr/onnx` 时加载真实模型，测量端到端实时率。结果中记录
+git提交、Python版本与测试参数，可用 `python -m benchmarks.compare` 对比两次结果。
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import statistics
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+from loguru import logger
+
+from shared.utils import FileManager, SenseVoiceClient
+from shared.utils.asr_backend import SAMPLE_RATE
+from shared.utils.audio_stream import is_ffmpeg_available
+from shared.utils.sensevoice_client import librosa
+
+from .stub import register_stub_backend, synth_speech
+
+
+SCHEMA_VERSION = 1
+CASES = ("load_audio", "preprocess_audio", "chunking", "transcribe_stream", "upload")
+FRAME_SECONDS = 1.0  # chunking用例中模拟解码器输出的帧长(秒)
+
+# 单次运行：返回附加指标（如块数），耗时由调用方统计
+CaseRun = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _measure(run: CaseRun, repeat: int, warmup: int) -> Dict[str, Any]:
+    """执行预热与计时运行，返回耗时统计(秒)与最后一次运行的附加指标"""
+    for _ in range(warmup):
+        await run()
+    timings: List[float] = []
+    extra: Dict[str, Any] = {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        extra = await run()
+        timings.append(time.perf_counter() - started)
+    return {
+        "runs": repeat,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+        "stdev": statistics.stdev(timings) if repeat > 1 else 0.0,
+        **extra
+    }
+
+
+async def _frames(audio: np.ndarray) -> AsyncIterator[np.ndarray]:
+    """按固定帧长输出音频，模拟流式解码器"""
+    step = int(FRAME_SECONDS * SAMPLE_RATE)
+    for start in range(0, len(audio), step):
+        yield audio[start:start + step]
+
+
+def _build_cases(
+    client: SenseVoiceClient,
+    file_manager: FileManager,
+    audio: np.ndarray,
+    wav_path: Path,
+    args: argparse.Namespace
+) -> Dict[str, Tuple[CaseRun, Dict[str, Any]]]:
+    """构建各用例的单次运行函数及其吞吐量计算所需的工作量"""
+    audio_seconds = len(audio) / SAMPLE_RATE
+    upload_size = int(args.upload_mb * 1024 * 1024)
+    # 与Starlette解析multipart时相同，超过1MB的上传数据缓存在临时文件中
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    spooled.write(np.random.default_rng(0).bytes(upload_size))
+
+    async def load_audio() -> Dict[str, Any]:
+        await asyncio.to_thread(client._load_audio, wav_path)
+        return {}
+
+    async def preprocess_audio() -> Dict[str, Any]:
+        client._preprocess_audio(audio)
+        return {}
+
+    async def chunking() -> Dict[str, Any]:
+        chunks = 0
+        async for _ in client._stream_chunks(_frames(audio), args.chunk_duration):
+            chunks += 1
+        return {"chunks": chunks}
+
+    async def transcribe_stream() -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        async for result in client.transcribe_audio_stream(wav_path, chunk_duration=args.chunk_duration):
+            if not result.get("success"):
+                raise RuntimeError(result.get("error"))
+        return {"chunks": result.get("total_chunks", 0)}
+
+    async def upload() -> Dict[str, Any]:
+        from starlette.datastructures import UploadFile
+        spooled.seek(0)
+        file = UploadFile(file=spooled, filename="bench.wav")
+        file_path = await file_manager.save_upload_file_stream(file, file.filename)
+        if file_path is None:
+            raise RuntimeError("上传文件保存失败")
+        file_manager.delete_file(file_path)
+        return {}
+
+    return {
+        "load_audio": (load_audio, {"audio_seconds": audio_seconds}),
+        "preprocess_audio": (preprocess_audio, {"audio_seconds": audio_seconds}),
+        "chunking": (chunking, {"audio_seconds": audio_seconds}),
+        "transcribe_stream": (transcribe_stream, {"audio_seconds": audio_seconds}),
+        "upload": (upload, {"bytes": upload_size})
+    }
+
+
+def _skip_reason(name: str) -> Optional[str]:
+    """用例依赖的音频解码工具不可用时返回跳过原因"""
+    if name == "load_audio" and librosa is None:
+        return "librosa未安装"
+    if name == "transcribe_stream" and librosa is None and not is_ffmpeg_available():
+        return "librosa未安装且ffmpeg不可用，无法解码音频文件"
+    return None
+
+
+def _derive(result: Dict[str, Any], workload: Dict[str, Any]) -> Dict[str, Any]:
+    """按中位耗时计算吞吐量与实时率"""
+    median = result["median"]
+    if "audio_seconds" in workload:
+        result["audio_seconds"] = workload["audio_seconds"]
+        result["rtf"] = median / workload["audio_seconds"]
+        result["audio_seconds_per_second"] = workload["audio_seconds"] / median if median else None
+    if "bytes" in workload:
+        result["bytes"] = workload["bytes"]
+        result["mb_per_second"] = workload["bytes"] / (1024 * 1024) / median if median else None
+    return result
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    """运行选定的基准测试用例"""
+    if args.backend == "stub":
+        register_stub_backend(args.stub_rtf)
+
+    selected = args.cases.split(",") if args.cases else list(CASES)
+    unknown = [name for name in selected if name not in CASES]
+    if unknown:
+        raise ValueError(f"未知的基准测试用例: {', '.join(unknown)}，可选: {', '.join(CASES)}")
+
+    workdir = Path(tempfile.mkdtemp(prefix="sensevoice-bench-"))
+    audio = synth_speech(args.duration)
+    wav_path = workdir / "bench.wav"
+    sf.write(str(wav_path), audio, SAMPLE_RATE)
+
+    client = SenseVoiceClient(
+        model_dir=args.model_dir,
+        device=args.device,
+        quantize=args.quantize,
+        backend=args.backend,
+        vad_segmentation=not args.no_vad,
+        lazy_load=True
+    )
+    file_manager = FileManager(
+        upload_dir=str(workdir / "uploads"),
+        max_file_size=1024 * 1024 * 1024 * 16,
+        allowed_extensions=["wav"]
+    )
+    results: Dict[str, Any] = {}
+    skipped: Dict[str, str] = {}
+    try:
+        await client.load()
+        cases = _build_cases(client, file_manager, audio, wav_path, args)
+        for name in selected:
+            reason = _skip_reason(name)
+            if reason:
+                logger.warning(f"{reason}，跳过 {name}")
+                skipped[name] = reason
+                continue
+            run, workload = cases[name]
+            print(f"运行 {name} ...", file=sys.stderr)
+            results[name] = _derive(await _measure(run, args.repeat, args.warmup), workload)
+    finally:
+        client.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "timestamp": int(time.time()),
+        "git_commit": _git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "ffmpeg": is_ffmpeg_available()
+        },
+        "config": {
+            "backend": args.backend,
+            "model": client.backend.model_dir if args.backend != "stub" else None,
+            "device": client.device,
+            "precision": client.precision,
+            "stub_rtf": args.stub_rtf if args.backend == "stub" else None,
+            "vad_segmentation": not args.no_vad,
+            "duration": args.duration,
+            "chunk_duration": args.chunk_duration,
+            "upload_mb": args.upload_mb,
+            "repeat": args.repeat,
+            "warmup": args.warmup
+        },
+        "results": results,
+        "skipped": skipped
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="转录流水线基准测试")
+    parser.add_argument("--backend", default="stub", choices=["stub", "funasr", "onnx"], help="推理后端，stub为离线桩模型")
+    parser.add_argument("--model-dir", default=None, help="真实模型名称或目录")
+    parser.add_argument("--device", default="cpu", help="推理设备")
+    parser.add_argument("--quantize", action="store_true", help="CPU推理时启用int8量化")
+    parser.add_argument("--no-vad", action="store_true", help="关闭VAD切分，按固定时长切分")
+    parser.add_argument("--stub-rtf", type=float, default=0.02, help="桩模型每秒音频的模拟推理耗时(秒)")
+    parser.add_argument("--duration", type=float, default=120.0, help="合成音频时长(秒)")
+    parser.add_argument("--chunk-duration", type=float, default=30.0, help="音频块时长(秒)")
+    parser.add_argument("--upload-mb", type=float, default=64.0, help="上传用例的数据大小(MB)")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例的计时运行次数")
+    parser.add_argument("--warmup", type=int, default=1, help="每个用例计时前的预热次数")
+    parser.add_argument("--cases", default=None, help=f"逗号分隔的用例，默认全部: {','.join(CASES)}")
+    parser.add_argument("--output", default=None, help="结果JSON输出路径，默认输出到标准输出")
+    parser.add_argument("--log-level", default="WARNING", help="日志级别")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat 至少为1")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    report = asyncio.run(run_benchmarks(args))
+    content = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(content + "\n", encoding="utf-8")
+        print(f"结果已写入: {args.output}", file=sys.stderr)
+    else:
+        print(content)
+
+
+if __name__ == "__main__":
+    main()
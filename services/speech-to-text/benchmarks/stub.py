@@ -0,0 +1,132 @@
+"""基准测试用的桩模型与合成音频
+
+桩模型实现FunASR AutoModel的 `generate` 接口，按音频时长模拟固定的推理耗时，
+无需下载模型或安装PyTorch即可离线测量模型之外各环节的开销。
+"""
+
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from shared.utils.asr_backend import (
+    BACKENDS,
+    SAMPLE_RATE,
+    AudioInput,
+    FunASRBackend,
+    _strip_rich_tags
+)
+from shared.utils.sensevoice_client import SenseVoiceClient
+
+
+VAD_FRAME_MS = 10  # 桩VAD的能量检测帧长(毫秒)
+VAD_THRESHOLD = 0.02  # 桩VAD的帧均方根能量阈值
+VAD_MIN_SILENCE_MS = 300  # 语音段之间的最短静音时长(毫秒)
+
+
+def synth_speech(duration: float, seed: int = 0) -> np.ndarray:
+    """生成合成音频：调幅正弦波“语音”与静音交替，时长比例约为 4:1"""
+    rng = np.random.default_rng(seed)
+    samples = int(duration * SAMPLE_RATE)
+    t = np.arange(samples, dtype=np.float32) / SAMPLE_RATE
+    audio = 0.3 * np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    # 每5秒中最后1秒为静音，便于VAD切分
+    audio[(t % 5.0) >= 4.0] = 0.0
+    audio += 0.002 * rng.standard_normal(samples)
+    return audio.astype(np.float32)
+
+
+def _read_audio(item: AudioInput) -> np.ndarray:
+    if isinstance(item, np.ndarray):
+        return item
+    import soundfile as sf
+    audio, _ = sf.read(str(item), dtype="float32")
+    return audio
+
+
+class StubModel:
+    """模拟识别模型：每秒音频耗时 `rtf` 秒，返回带SenseVoice标签的文本"""
+
+    def __init__(self, rtf: float = 0.02):
+        self.rtf = rtf
+
+    def generate(self, input: List[AudioInput], language: str = "auto", **kwargs: Any) -> List[Dict[str, Any]]:
+        results = []
+        for item in input:
+            duration = len(_read_audio(item)) / SAMPLE_RATE
+            time.sleep(duration * self.rtf)
+            results.append({"text": f"<|{language}|><|NEUTRAL|><|Speech|>桩模型转录{duration:.1f}秒。"})
+        return results
+
+
+class StubVADModel:
+    """模拟VAD模型：按帧能量检测语音段，返回格式与fsmn-vad一致"""
+
+    def generate(self, input: np.ndarray, **kwargs: Any) -> List[Dict[str, Any]]:
+        frame = SAMPLE_RATE * VAD_FRAME_MS // 1000
+        frames = len(input) // frame
+        if frames == 0:
+            return [{"value": []}]
+        energy = np.sqrt(np.mean(input[:frames * frame].reshape(frames, frame) ** 2, axis=1))
+        voiced = np.flatnonzero(energy > VAD_THRESHOLD)
+        segments: List[List[int]] = []
+        max_gap = VAD_MIN_SILENCE_MS // VAD_FRAME_MS
+        for index in voiced:
+            if segments and index - segments[-1][1] <= max_gap:
+                segments[-1][1] = index + 1
+            else:
+                segments.append([index, index + 1])
+        return [{"value": [[start * VAD_FRAME_MS, end * VAD_FRAME_MS] for start, end in segments]}]
+
+
+class StubBackend(FunASRBackend):
+    """基于桩模型的推理后端，VAD结果解析沿用FunASR后端"""
+
+    name = "stub"
+    rtf = 0.02
+
+    @classmethod
+    def check_available(cls):
+        pass
+
+    def load_model(self):
+        self.model = StubModel(self.rtf)
+
+    def load_vad_model(self):
+        self.vad_model = StubVADModel()
+
+    def transcribe(self, inputs: List[AudioInput], language: str, keywords: Optional[str] = None) -> List[str]:
+        results = self.model.generate(input=inputs, language=language, hotword=keywords)
+        return [_strip_rich_tags(result.get("text", "")) for result in results]
+
+    def transcribe_with_timestamps(
+        self,
+        inputs: List[AudioInput],
+        language: str,
+        keywords: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """按字符均分音频时长，模拟词级时间戳"""
+        results = []
+        for item, text in zip(inputs, self.transcribe(inputs, language, keywords)):
+            step = len(_read_audio(item)) / SAMPLE_RATE / max(1, len(text))
+            words = [{"word": char, "start": n * step, "end": (n + 1) * step} for n, char in enumerate(text)]
+            results.append({"text": text, "words": words})
+        return results
+
+
+def register_stub_backend(rtf: float = 0.02):
+    """注册桩模型推理后端（名称为stub），仅线程池执行器可用"""
+    StubBackend.rtf = rtf
+    BACKENDS[StubBackend.name] = StubBackend
+
+
+class StubSenseVoiceClient(SenseVoiceClient):
+    """桩客户端：ffmpeg不可用时用soundfile读取WAV，无需安装librosa即可测量服务端开销"""
+
+    def _load_audio(self, audio_path: Path) -> np.ndarray:
+        import soundfile as sf
+        audio, sr = sf.read(str(audio_path), dtype="float32", always_2d=True)
+        if sr != SAMPLE_RATE:
+            raise ValueError(f"桩客户端仅支持{SAMPLE_RATE}Hz的WAV音频，实际为{sr}Hz")
+        return audio.mean(axis=1)
@@ -16,11 +16,22 @@ class Settings(BaseSettings):
     # 服务器配置
     host: str = Field(default="0.0.0.0", description="服务器地址")
     port: int = Field(default=8000, description="服务器端口")
+    web_workers: int = Field(default=1, description="HTTP工作进程数，大于1时模型由共享推理进程加载一次")
+    inference_server: Optional[str] = Field(default=None, description="共享推理进程地址(Unix Socket)，由启动脚本设置")
+    inference_authkey: Optional[str] = Field(default=None, description="共享推理进程认证密钥，由启动脚本设置")
     
     # SenseVoice本地模型配置
+    SENSEVOICE_BACKEND: str = Field(
+        default="funasr",
+        description="推理后端：funasr(PyTorch), onnx(ONNX Runtime，仅CPU)"
+    )
     SENSEVOICE_MODEL_DIR: Optional[str] = Field(
         default=None,
-        description="SenseVoice模型目录路径，为空则自动下载"
+        description="SenseVoice模型目录路径，为空则自动下载；onnx后端需为导出的ONNX模型目录"
+    )
+    SENSEVOICE_VAD_MODEL_DIR: Optional[str] = Field(
+        default=None,
+        description="VAD模型名称或目录路径，为空则使用fsmn-vad"
     )
     SENSEVOICE_DEVICE: str = Field(
         default="auto",
@@ -28,16 +39,64 @@ class Settings(BaseSettings):
     )
     SENSEVOICE_BATCH_SIZE: int = Field(
         default=1,
-        description="批处理大小"
+        description="批处理大小，大于1时启用跨请求动态批处理"
+    )
+    SENSEVOICE_BATCH_MAX_WAIT_MS: int = Field(
+        default=20,
+        description="动态批处理组批的最大等待时间(毫秒)"
     )
     SENSEVOICE_QUANTIZE: bool = Field(
         default=True,
-        description="是否启用量化以减少内存使用"
+        description="CPU推理时对模型执行动态int8量化，减少推理耗时与内存使用"
     )
     SENSEVOICE_CACHE_DIR: str = Field(
         default="./models",
         description="模型缓存目录"
     )
+    SENSEVOICE_EXECUTOR_TYPE: str = Field(
+        default="thread",
+        description="推理执行器类型：thread(线程池), process(进程池)"
+    )
+    SENSEVOICE_EXECUTOR_WORKERS: int = Field(
+        default=1,
+        description="推理执行器工作线程/进程数"
+    )
+    SENSEVOICE_PARALLEL_CHUNKS: int = Field(
+        default=1,
+        description="单个文件同时推理的音频块数，配合进程池将长音频的音频块分发到多个推理进程"
+    )
+    SENSEVOICE_CPU_AFFINITY: bool = Field(
+        default=False,
+        description="进程池模式下将各推理进程绑定到不同的CPU核组"
+    )
+    SENSEVOICE_INTRA_OP_THREADS: int = Field(
+        default=0,
+        description="单个算子内部的并行线程数，0表示使用推理框架默认值"
+    )
+    SENSEVOICE_INTER_OP_THREADS: int = Field(
+        default=0,
+        description="算子之间的并行线程数，0表示使用推理框架默认值"
+    )
+    SENSEVOICE_INMEMORY_INPUT: bool = Field(
+        default=True,
+        description="直接将内存中的音频数组送入模型，不支持时回退到临时WAV文件"
+    )
+    SENSEVOICE_VAD_SEGMENTATION: bool = Field(
+        default=True,
+        description="使用VAD切分音频并丢弃静音段，关闭时按固定时长切分"
+    )
+    SENSEVOICE_WARMUP_RUNS: int = Field(
+        default=1,
+        description="模型加载后的预热推理轮数，0表示不预热"
+    )
+    SENSEVOICE_WARMUP_DURATION: float = Field(
+        default=5.0,
+        description="预热推理使用的合成音频时长(秒)"
+    )
+    
+    # 实时转录配置
+    live_partial_interval: float = Field(default=0.6, description="实时转录中输出临时结果的间隔(秒)")
+    live_max_segment_duration: float = Field(default=15.0, description="实时转录单个语音段最大时长(秒)")
     
     # 文件存储配置
     upload_dir: str = Field(default="./uploads", description="上传文件目录")
@@ -47,6 +106,23 @@ class Settings(BaseSettings):
         description="允许的文件扩展名"
     )
     
+    # 转录结果缓存配置
+    result_cache_enabled: bool = Field(default=True, description="按音频内容哈希缓存转录结果，重复上传同一文件时直接返回")
+    result_cache_dir: str = Field(default="./uploads/.cache/results", description="转录结果缓存目录")
+    result_cache_max_size: int = Field(default=512 * 1024 * 1024, description="转录结果缓存最大总大小(字节)")
+    
+    # 转录任务队列配置
+    job_db_path: str = Field(default="./uploads/.jobs/jobs.db", description="转录任务数据库路径")
+    job_workers: int = Field(default=1, description="转录任务工作者数")
+    job_max_pending: int = Field(default=1000, description="最大待处理任务数，超出时拒绝新任务")
+    job_retention_time: int = Field(default=86400, description="已结束任务记录保留时间(秒)")
+    job_lease_time: int = Field(default=60, description="任务领取租约时长(秒)，工作进程退出后其处理中的任务在租约过期后重新领取")
+    
+    # 热词表配置
+    hotword_dir: str = Field(default="./uploads/.hotwords", description="热词表存储目录")
+    hotword_cache_size: int = Field(default=64, description="内存中缓存的已编译热词表数量上限")
+    hotword_max_words: int = Field(default=10000, description="单个热词表的关键词数量上限")
+    
     @field_validator('allowed_extensions', mode='before')
     @classmethod
     def parse_allowed_extensions(cls, v):
@@ -58,6 +134,10 @@ class Settings(BaseSettings):
     # 文件清理配置
     file_cleanup_interval: int = Field(default=3600, description="文件清理间隔(秒)")
     file_retention_time: int = Field(default=1800, description="文件保留时间(秒)")
+    file_disk_high_water: float = Field(
+        default=0.0,
+        description="上传目录所在磁盘使用率上限(0-1)，超过时从最早的上传文件开始删除，0表示不限制"
+    )
     
     # 安全配置
     secret_key: str = Field(default="your-super-secret-key-change-this-in-production", description="JWT密钥")
@@ -66,6 +146,11 @@ class Settings(BaseSettings):
     
     # 日志配置
     log_level: str = Field(default="DEBUG", description="日志级别")
+    log_profile: str = Field(
+        default="development",
+        description="日志配置：development(同步输出，记录DEBUG), production(后台线程批量写入)"
+    )
+    log_progress_interval: float = Field(default=5.0, description="上传进度等高频日志的最小输出间隔(秒)")
     log_file: Optional[str] = Field(default=None, description="日志文件路径")
     
     model_config = {
@@ -6,8 +6,10 @@ from .schemas import (
     FileInfo,
     UploadResponse,
     TaskStatus,
+    HotwordListInfo,
     ErrorResponse,
     HealthResponse,
+    ReadinessResponse,
     SystemInfo
 )
 
@@ -17,7 +19,9 @@ __all__ = [
     "FileInfo",
     "UploadResponse",
     "TaskStatus",
+    "HotwordListInfo",
     "ErrorResponse",
     "HealthResponse",
+    "ReadinessResponse",
     "SystemInfo"
 ]
\ No newline at end of file
@@ -10,15 +10,13 @@ class TranscriptionRequest(BaseModel):
     keywords: Optional[str] = Field(None, description="关键词，用逗号分隔")
     language: str = Field(default="zh-CN", description="语言代码")
     enable_punctuation: bool = Field(default=True, description="启用标点符号")
-    enable_word_timestamps: bool = Field(default=True, description="启用词级时间戳")
     
     class Config:
         json_schema_extra = {
             "example": {
                 "keywords": "会议,讨论,项目",
                 "language": "zh-CN",
-                "enable_punctuation": True,
-                "enable_word_timestamps": True
+                "enable_punctuation": True
             }
         }
 
@@ -96,8 +94,13 @@ class UploadResponse(BaseModel):
 class TaskStatus(BaseModel):
     """任务状态模型"""
     task_id: str = Field(..., description="任务ID")
-    status: str = Field(..., description="任务状态")
+    status: str = Field(..., description="任务状态：pending, processing, completed, failed")
+    file_id: Optional[str] = Field(None, description="音频文件ID")
+    file_name: Optional[str] = Field(None, description="文件名")
+    progress: float = Field(default=0.0, description="转录进度(0-1)")
     result: Optional[str] = Field(None, description="任务结果")
+    error: Optional[str] = Field(None, description="错误信息")
+    processing_time: Optional[float] = Field(None, description="处理时间(秒)")
     created_time: datetime = Field(..., description="创建时间")
     updated_time: datetime = Field(..., description="更新时间")
     
@@ -106,13 +109,38 @@ class TaskStatus(BaseModel):
             "example": {
                 "task_id": "task_123456",
                 "status": "completed",
+                "file_id": "1640995200000_audio.wav",
+                "file_name": "audio.wav",
+                "progress": 1.0,
                 "result": "转录完成的文本内容",
+                "error": None,
+                "processing_time": 42.5,
                 "created_time": "2024-01-01T12:00:00",
                 "updated_time": "2024-01-01T12:05:00"
             }
         }
 
 
+class HotwordListInfo(BaseModel):
+    """热词表信息模型"""
+    id: str = Field(..., description="热词表ID，转录请求中以hotword_id引用")
+    name: str = Field(..., description="热词表名称")
+    count: int = Field(..., description="关键词数量（规范化去重后）")
+    created_time: float = Field(..., description="创建时间")
+    words: Optional[List[str]] = Field(None, description="关键词列表，仅查询单个热词表时返回")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": "3f2a9c1e7b6d4e80",
+                "name": "中医基础理论",
+                "count": 512,
+                "created_time": 1640995200.0,
+                "words": None
+            }
+        }
+
+
 class ErrorResponse(BaseModel):
     """错误响应模型"""
     success: bool = Field(default=False, description="是否成功")
@@ -149,6 +177,26 @@ class HealthResponse(BaseModel):
         }
 
 
+class ReadinessResponse(BaseModel):
+    """就绪检查响应模型"""
+    ready: bool = Field(..., description="是否就绪")
+    status: str = Field(..., description="模型状态：loading, warming_up, ready, failed")
+    error: Optional[str] = Field(None, description="加载失败原因")
+    timestamp: int = Field(..., description="时间戳")
+    uptime: float = Field(..., description="运行时间(秒)")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ready": True,
+                "status": "ready",
+                "error": None,
+                "timestamp": 1640995200,
+                "uptime": 35.2
+            }
+        }
+
+
 class SystemInfo(BaseModel):
     """系统信息模型"""
     app_name: str = Field(..., description="应用名称")
@@ -160,6 +208,9 @@ class SystemInfo(BaseModel):
     supported_languages: List[str] = Field(default=[], description="支持的语言")
     model_info: Dict[str, Any] = Field(default={}, description="模型信息")
     device_info: Dict[str, Any] = Field(default={}, description="设备信息")
+    cache_info: Dict[str, Any] = Field(default={}, description="转录结果缓存信息")
+    job_info: Dict[str, Any] = Field(default={}, description="转录任务队列信息")
+    hotword_info: Dict[str, Any] = Field(default={}, description="热词表缓存信息")
     
     class Config:
         json_schema_extra = {
@@ -2,6 +2,15 @@
 
 from .file_utils import FileManager
 from .sensevoice_client import SenseVoiceClient
-from .logger_config import setup_logger, get_access_logger
+from .inference_executor import InferenceExecutor
+from .batch_scheduler import BatchScheduler
+from .result_cache import ResultCache
+from .job_queue import JobStore, JobQueue
+from .live_transcription import LiveTranscriptionSession
+from .asr_backend import ASRBackend, FunASRBackend, ONNXBackend, create_backend
+from .inference_server import RemoteBackend, serve_inference
+from .logger_config import setup_logger, get_access_logger, get_request_logger, RateLimitedLog
+from .access_log import AccessLogMiddleware
+from .hotwords import HotwordRegistry
 
-__all__ = ["FileManager", "SenseVoiceClient", "setup_logger", "get_access_logger"]
\ No newline at end of file
+__all__ = ["FileManager", "SenseVoiceClient", "InferenceExecutor", "BatchScheduler", "ResultCache", "JobStore", "JobQueue", "LiveTranscriptionSession", "ASRBackend", "FunASRBackend", "ONNXBackend", "create_backend", "RemoteBackend", "serve_inference", "setup_logger", "get_access_logger", "get_request_logger", "RateLimitedLog", "AccessLogMiddleware", "HotwordRegistry"]
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""请求日志中间件"""
+
+import json
+import time
+from typing import Any, Dict
+
+from .logger_config import get_request_logger
+
+
+class AccessLogMiddleware:
+    """以JSON行记录每个HTTP请求的方法、路径、状态码、首字节时间、总耗时与响应字节数
+
+    以纯ASGI中间件实现，不缓冲响应体；流式响应（SSE）的总耗时截至最后一个数据块发送完成。
+    """
+
+    def __init__(self, app: Any, exclude_paths: tuple = ("/health", "/ready", "/metrics")):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+        self._logger = get_request_logger()
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        state = {"status": 500, "bytes": 0, "ttfb": None}
+
+        async def send_wrapper(message: Dict[str, Any]):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                state["ttfb"] = time.perf_counter() - started
+            elif message["type"] == "http.response.body":
+                state["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            client = scope.get("client")
+            record = {
+                "ts": round(time.time(), 3),
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": state["status"],
+                "ttfb_ms": round(state["ttfb"] * 1000, 1) if state["ttfb"] is not None else None,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "bytes": state["bytes"],
+                "client": client[0] if client else None
+            }
+            self._logger.info(json.dumps(record, ensure_ascii=False))
@@ -0,0 +1,429 @@
+"""语音识别推理后端模块
+
+SenseVoiceClient 负责音频切分、批处理调度与流式事件组装，具体的模型加载与
+推理由可替换的后端完成：
+- funasr: FunASR的PyTorch AutoModel（默认）
+- onnx: 基于ONNX Runtime的导出模型（funasr-onnx），运行镜像无需安装PyTorch
+"""
+
+import re
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+from loguru import logger
+
+import numpy as np
+
+
+SAMPLE_RATE = 16000  # 模型输入采样率
+DEFAULT_MODEL = "iic/SenseVoiceSmall"
+MAX_VAD_SEGMENT_MS = 30000  # VAD单个语音段最大时长(毫秒)
+
+AudioInput = Union[np.ndarray, str]
+
+
+def _strip_rich_tags(text: str) -> str:
+    """去除SenseVoice输出中的语言、情感、事件等标签（如 <|zh|><|NEUTRAL|>）"""
+    return re.sub(r"<\|[^|]*\|>", "", text).strip()
+
+
+def _parse_word_timestamps(timestamp: Any) -> List[Dict[str, Any]]:
+    """解析SenseVoice输出的词级时间戳 [[词, 起点(秒), 终点(秒)], ...]"""
+    words = []
+    for item in timestamp or []:
+        if not isinstance(item, (list, tuple)) or len(item) != 3:
+            continue
+        # 去除SentencePiece的词首标记与标签
+        word = _strip_rich_tags(str(item[0]).replace("\u2581", " "))
+        if word:
+            words.append({"word": word, "start": float(item[1]), "end": float(item[2])})
+    return words
+
+
+class ASRBackend(ABC):
+    """推理后端接口
+
+    所有推理方法均为阻塞调用，由调用方提交到推理执行器中执行。
+    进程池模式下每个工作进程各构造一个后端实例并调用 `load_model()`，
+    主进程的实例只加载VAD模型。子类缺少任一抽象方法时无法构造。
+    """
+
+    name = "base"
+    cpu_only = False  # 仅支持CPU推理
+    remote = False  # 模型由共享推理进程持有
+    supports_hotwords = True  # 推理时是否使用keywords热词
+
+    def __init__(
+        self,
+        model_dir: Optional[str] = None,
+        vad_model_dir: Optional[str] = None,
+        device: str = "cpu",
+        cache_dir: str = "./models",
+        quantize: bool = False,
+        builtin_vad: bool = False,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0
+    ):
+        """
+        Args:
+            model_dir: 识别模型名称或本地目录
+            vad_model_dir: VAD模型名称或本地目录，为空时使用后端默认模型
+            device: 推理设备
+            cache_dir: 模型缓存目录
+            quantize: 是否使用int8推理
+            builtin_vad: 识别模型内部是否自带VAD切分（未启用独立VAD分段时）
+            intra_op_threads: 单个算子内部的并行线程数，0表示使用默认值
+            inter_op_threads: 算子之间的并行线程数，0表示使用默认值
+        """
+        self.model_dir = model_dir or DEFAULT_MODEL
+        self.vad_model_dir = vad_model_dir
+        self.device = device
+        self.cache_dir = cache_dir
+        self.quantize = quantize
+        self.builtin_vad = builtin_vad
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+
+        self.model: Any = None
+        self.vad_model: Any = None
+        self.precision = "fp32"  # 实际推理精度，启用量化且成功时为int8
+
+    @classmethod
+    @abstractmethod
+    def check_available(cls):
+        """检查后端依赖是否已安装，未安装时抛出ImportError"""
+
+    @abstractmethod
+    def load_model(self):
+        """加载识别模型"""
+
+    @abstractmethod
+    def load_vad_model(self):
+        """加载VAD模型"""
+
+    @abstractmethod
+    def transcribe(self, inputs: List[AudioInput], language: str, keywords: Optional[str] = None) -> List[str]:
+        """转录一批音频（16kHz单声道数组或音频文件路径），按输入顺序返回去除标签后的文本"""
+
+    def transcribe_with_timestamps(
+        self,
+        inputs: List[AudioInput],
+        language: str,
+        keywords: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """转录一批音频并在同一次推理中输出词级时间戳
+
+        返回 {"text": 文本, "words": [{"word", "start", "end"}]} 列表，时间为相对于各输入起点的秒数；
+        不支持时间戳的后端 words 为空列表。
+        """
+        return [{"text": text, "words": []} for text in self.transcribe(inputs, language, keywords)]
+
+    @abstractmethod
+    def vad_segments(self, audio: np.ndarray) -> List[Tuple[int, int]]:
+        """对整段音频执行VAD，返回语音段起止时间(毫秒)"""
+
+    @abstractmethod
+    def stream_vad(self, piece: np.ndarray, cache: Dict[str, Any], is_final: bool, chunk_ms: int) -> List[Tuple[int, int]]:
+        """流式VAD：送入一段连续音频，返回检测到的语音起止点(毫秒)，未检测到的端点为-1"""
+
+    def get_info(self) -> Dict[str, Any]:
+        """获取后端配置信息"""
+        return {
+            "name": self.name,
+            "model": self.model_dir,
+            "hotwords": self.supports_hotwords,
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads
+        }
+
+
+class FunASRBackend(ASRBackend):
+    """FunASR PyTorch推理后端"""
+
+    name = "funasr"
+
+    @classmethod
+    def check_available(cls):
+        try:
+            import torch  # noqa: F401
+            import funasr  # noqa: F401
+        except ImportError:
+            raise ImportError("FunASR或PyTorch未安装，请运行: pip install funasr torch torchaudio")
+
+    def _set_num_threads(self):
+        """设置PyTorch算子内/算子间线程数"""
+        import torch
+        if self.intra_op_threads > 0:
+            torch.set_num_threads(self.intra_op_threads)
+        if self.inter_op_threads > 0:
+            try:
+                torch.set_num_interop_threads(self.inter_op_threads)
+            except RuntimeError as e:
+                # 只能在首次并行计算前设置一次
+                logger.warning(f"设置PyTorch算子间线程数失败: {str(e)}")
+
+    def _quantize_dynamic_int8(self) -> str:
+        """对模型中的线性层执行动态int8量化，返回实际使用的推理精度
+
+        动态量化只将权重离线转换为int8，激活值在推理时按批动态量化，无需校准数据。
+        SenseVoice的计算量主要集中在编码器的线性层，量化后CPU推理耗时与内存占用显著下降。
+        """
+        import torch
+        try:
+            engines = torch.backends.quantized.supported_engines
+            for engine in ("x86", "fbgemm", "qnnpack"):
+                if engine in engines:
+                    torch.backends.quantized.engine = engine
+                    break
+            self.model.model = torch.ao.quantization.quantize_dynamic(
+                self.model.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            logger.info(f"模型已完成动态int8量化，量化引擎: {torch.backends.quantized.engine}")
+            return "int8"
+        except Exception as e:
+            logger.warning(f"动态int8量化失败，使用fp32推理: {str(e)}")
+            return "fp32"
+
+    def load_model(self):
+        from funasr import AutoModel
+
+        self._set_num_threads()
+        model_kwargs = {
+            "model": self.model_dir,
+            "trust_remote_code": True,
+            "device": self.device,
+            "disable_update": True,  # 禁用自动更新检查
+            "cache_dir": self.cache_dir  # 明确指定缓存目录
+        }
+        # 启用VAD分段时由独立的VAD模型统一切分，识别模型无需再做一次VAD
+        if self.builtin_vad:
+            model_kwargs["vad_model"] = self.vad_model_dir or "fsmn-vad"
+            model_kwargs["vad_kwargs"] = {"max_single_segment_time": MAX_VAD_SEGMENT_MS}
+
+        self.model = AutoModel(**model_kwargs)
+        if self.quantize:
+            self.precision = self._quantize_dynamic_int8()
+
+    def load_vad_model(self):
+        from funasr import AutoModel
+
+        self.vad_model = AutoModel(
+            model=self.vad_model_dir or "fsmn-vad",
+            max_single_segment_time=MAX_VAD_SEGMENT_MS,
+            device=self.device,
+            disable_update=True,
+            cache_dir=self.cache_dir
+        )
+
+    def _generate(self, inputs: List[AudioInput], language: str, keywords: Optional[str], **kwargs: Any) -> List[Dict[str, Any]]:
+        """执行模型推理，返回模型原始输出"""
+        generate_kwargs = {
+            "input": inputs,
+            "fs": SAMPLE_RATE,          # 内存数组输入的采样率
+            "language": language,
+            "use_itn": True,
+            "batch_size": len(inputs),
+            "batch_size_s": 100 * len(inputs),  # 每个音频块按100秒预算
+            "signal_type": "linear",   # 线性信号
+            "mode": "offline"          # 离线模式
+        }
+        # 添加关键词支持
+        if keywords and keywords.strip():
+            generate_kwargs["hotword"] = keywords.strip()
+
+        return self.model.generate(**generate_kwargs, **kwargs) or []
+
+    def transcribe(self, inputs: List[AudioInput], language: str, keywords: Optional[str] = None) -> List[str]:
+        from funasr.utils.postprocess_utils import rich_transcription_postprocess
+
+        results = self._generate(inputs, language, keywords)
+        # 使用后处理函数去除标签
+        return [rich_transcription_postprocess(result.get("text", "")) for result in results]
+
+    def transcribe_with_timestamps(
+        self,
+        inputs: List[AudioInput],
+        language: str,
+        keywords: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        if self.builtin_vad:
+            # 模型内置VAD切分时各语音段的时间戳格式不统一，不输出词级时间戳
+            return super().transcribe_with_timestamps(inputs, language, keywords)
+
+        from funasr.utils.postprocess_utils import rich_transcription_postprocess
+
+        # 由CTC输出强制对齐得到词级时间戳，与识别共用同一次编码器前向计算
+        results = self._generate(inputs, language, keywords, output_timestamp=True)
+        return [
+            {
+                "text": rich_transcription_postprocess(result.get("text", "")),
+                "words": _parse_word_timestamps(result.get("timestamp"))
+            }
+            for result in results
+        ]
+
+    def vad_segments(self, audio: np.ndarray) -> List[Tuple[int, int]]:
+        results = self.vad_model.generate(input=audio, fs=SAMPLE_RATE)
+        if not results:
+            return []
+        return [(int(start), int(end)) for start, end in results[0].get("value", [])]
+
+    def stream_vad(self, piece: np.ndarray, cache: Dict[str, Any], is_final: bool, chunk_ms: int) -> List[Tuple[int, int]]:
+        results = self.vad_model.generate(
+            input=piece,
+            cache=cache,
+            is_final=is_final,
+            chunk_size=chunk_ms,
+            disable_pbar=True
+        )
+        if not results:
+            return []
+        return [(int(start), int(end)) for start, end in results[0].get("value", [])]
+
+
+class ONNXBackend(ASRBackend):
+    """ONNX Runtime推理后端
+
+    使用funasr-onnx加载导出的SenseVoiceSmall与fsmn-vad模型。模型目录中需包含
+    `model.onnx`（启用量化时为 `model_quant.onnx`）及配套的配置文件，可通过
+    `funasr-export ++model=iic/SenseVoiceSmall ++quantize=true` 预先导出。
+    funasr-onnx不输出时间戳，该后端只提供语音段级时间戳；SenseVoice的ONNX模型不支持热词，请求中的关键词被忽略。
+    """
+
+    name = "onnx"
+    cpu_only = True
+    supports_hotwords = False
+
+    DEFAULT_VAD_MODEL = "iic/speech_fsmn_vad_zh-cn-16k-common-pytorch"
+
+    _online_vad_model: Any = None
+
+    @classmethod
+    def check_available(cls):
+        try:
+            import onnxruntime  # noqa: F401
+            import funasr_onnx  # noqa: F401
+        except ImportError:
+            raise ImportError("ONNX Runtime后端依赖未安装，请运行: pip install funasr-onnx onnxruntime")
+
+    def _postprocess(self, text: str) -> str:
+        try:
+            from funasr_onnx.utils.postprocess_utils import rich_transcription_postprocess
+        except ImportError:
+            return _strip_rich_tags(text)
+        return rich_transcription_postprocess(text)
+
+    def _configure_session(self, model: Any, model_dir: str):
+        """按配置的线程数重建ONNX Runtime会话
+
+        funasr-onnx只支持设置算子内线程数，设置了算子间线程数时使用并行执行模式重建会话。
+        """
+        if self.inter_op_threads <= 0:
+            return
+        import onnxruntime as ort
+
+        model_file = Path(model_dir) / ("model_quant.onnx" if self.quantize else "model.onnx")
+        session = getattr(getattr(model, "ort_infer", None), "session", None)
+        if session is None or not model_file.is_file():
+            logger.warning(f"无法设置ONNX Runtime算子间线程数，模型文件: {model_file}")
+            return
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        options.intra_op_num_threads = max(0, self.intra_op_threads)
+        options.inter_op_num_threads = self.inter_op_threads
+        options.log_severity_level = 4
+        model.ort_infer.session = ort.InferenceSession(
+            str(model_file), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+    def _resolve_model_dir(self, model: Any, model_dir: str) -> str:
+        """模型按名称自动下载时，取实际加载的本地目录"""
+        return str(getattr(model, "model_dir", None) or model_dir)
+
+    def load_model(self):
+        from funasr_onnx import SenseVoiceSmall
+
+        self.model = SenseVoiceSmall(
+            self.model_dir,
+            batch_size=1,
+            quantize=self.quantize,
+            intra_op_num_threads=max(0, self.intra_op_threads)
+        )
+        self._configure_session(self.model, self._resolve_model_dir(self.model, self.model_dir))
+        self.precision = "int8" if self.quantize else "fp32"
+        logger.warning("ONNX推理后端不支持热词，请求中的关键词与热词表将被忽略")
+
+    def load_vad_model(self):
+        from funasr_onnx import Fsmn_vad, Fsmn_vad_online
+
+        vad_model_dir = self.vad_model_dir or self.DEFAULT_VAD_MODEL
+        # 离线VAD用于整段音频切分，流式VAD用于实时转录
+        self.vad_model = Fsmn_vad(
+            vad_model_dir,
+            quantize=self.quantize,
+            intra_op_num_threads=max(0, self.intra_op_threads),
+            max_end_sil=None
+        )
+        self._online_vad_model = Fsmn_vad_online(
+            vad_model_dir,
+            quantize=self.quantize,
+            intra_op_num_threads=max(0, self.intra_op_threads)
+        )
+
+    def transcribe(self, inputs: List[AudioInput], language: str, keywords: Optional[str] = None) -> List[str]:
+        # 不支持热词（见 supports_hotwords），keywords仅在FunASR后端的热词模型中生效
+        if keywords:
+            logger.debug("ONNX推理后端不支持热词，已忽略本次请求的关键词")
+        if all(isinstance(item, str) for item in inputs):
+            raw_texts = self.model(list(inputs), language=language, use_itn=True)
+        else:
+            # funasr-onnx的批量输入只接受文件路径，内存数组逐个推理
+            raw_texts = []
+            for item in inputs:
+                raw_texts.extend(self.model(item, language=language, use_itn=True))
+        return [self._postprocess(text) for text in raw_texts]
+
+    @staticmethod
+    def _flatten_segments(result: Any) -> List[Tuple[int, int]]:
+        """funasr-onnx的VAD结果按批嵌套为多层列表，展开为 (起点, 终点) 列表"""
+        segments: List[Tuple[int, int]] = []
+        if not isinstance(result, (list, tuple)):
+            return segments
+        if len(result) == 2 and all(isinstance(value, (int, float, np.integer)) for value in result):
+            return [(int(result[0]), int(result[1]))]
+        for item in result:
+            segments.extend(ONNXBackend._flatten_segments(item))
+        return segments
+
+    def vad_segments(self, audio: np.ndarray) -> List[Tuple[int, int]]:
+        return self._flatten_segments(self.vad_model(audio.astype(np.float32, copy=False)))
+
+    def stream_vad(self, piece: np.ndarray, cache: Dict[str, Any], is_final: bool, chunk_ms: int) -> List[Tuple[int, int]]:
+        # funasr-onnx的流式状态保存在param_dict中，直接使用调用方传入的cache
+        cache.setdefault("in_cache", [])
+        cache["is_final"] = is_final
+        return self._flatten_segments(
+            self._online_vad_model(audio_in=piece.astype(np.float32, copy=False), param_dict=cache)
+        )
+
+
+BACKENDS: Dict[str, Type[ASRBackend]] = {
+    FunASRBackend.name: FunASRBackend,
+    ONNXBackend.name: ONNXBackend
+}
+
+
+def get_backend_class(name: str) -> Type[ASRBackend]:
+    """按名称获取推理后端类"""
+    if name not in BACKENDS:
+        raise ValueError(f"不支持的推理后端: {name}，可选: {', '.join(BACKENDS)}")
+    return BACKENDS[name]
+
+
+def create_backend(name: str, **kwargs: Any) -> ASRBackend:
+    """创建推理后端实例（不加载模型）"""
+    backend_cls = get_backend_class(name)
+    backend_cls.check_available()
+    return backend_cls(**kwargs)
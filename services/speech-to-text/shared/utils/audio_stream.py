@@ -0,0 +1,253 @@
+"""音频流式解码模块"""
+
+import os
+import asyncio
+import shutil
+from pathlib import Path
+from typing import AsyncIterator, Optional, List
+from loguru import logger
+
+import numpy as np
+
+
+SAMPLE_RATE = 16000  # 解码输出采样率
+FRAME_SECONDS = 10.0  # 每次产出的音频帧时长(秒)
+BYTES_PER_SAMPLE = 4  # float32
+PCM_BYTES_PER_SAMPLE = 2  # 预解码文件使用s16le存储，体积为float32的一半
+
+# 可从管道顺序解码的格式（m4a等MP4容器的索引可能位于文件末尾，需完整文件）
+STREAMABLE_EXTENSIONS = {"wav", "mp3", "flac", "ogg", "aac"}
+
+
+def is_ffmpeg_available() -> bool:
+    """检查ffmpeg是否可用"""
+    return shutil.which("ffmpeg") is not None
+
+
+async def probe_duration(file_path: Path) -> Optional[float]:
+    """使用ffprobe获取音频时长(秒)，失败时返回None"""
+    if shutil.which("ffprobe") is None:
+        return None
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffprobe", "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            str(file_path),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        stdout, _ = await process.communicate()
+        return float(stdout.decode().strip())
+    except Exception as e:
+        logger.debug(f"获取音频时长失败: {file_path}, 错误: {str(e)}")
+        return None
+
+
+def _build_ffmpeg_command(source: str, sample_rate: int) -> List[str]:
+    """构建解码为单声道float32 PCM的ffmpeg命令"""
+    return [
+        "ffmpeg", "-nostdin", "-hide_banner", "-v", "error",
+        "-i", source,
+        "-vn", "-ac", "1", "-ar", str(sample_rate),
+        "-f", "f32le", "-acodec", "pcm_f32le",
+        "pipe:1"
+    ]
+
+
+async def _read_frames(
+    process: asyncio.subprocess.Process,
+    frame_samples: int
+) -> AsyncIterator[np.ndarray]:
+    """从ffmpeg标准输出按固定大小读取PCM帧"""
+    frame_bytes = frame_samples * BYTES_PER_SAMPLE
+    while True:
+        try:
+            data = await process.stdout.readexactly(frame_bytes)
+        except asyncio.IncompleteReadError as e:
+            data = e.partial
+            # 丢弃末尾不足一个采样点的字节
+            data = data[:len(data) - len(data) % BYTES_PER_SAMPLE]
+            if data:
+                yield np.frombuffer(data, dtype=np.float32)
+            break
+        yield np.frombuffer(data, dtype=np.float32)
+
+
+async def _drain_stderr(process: asyncio.subprocess.Process) -> bytes:
+    """持续读取ffmpeg错误输出，避免管道写满阻塞解码"""
+    return await process.stderr.read()
+
+
+async def _terminate(process: asyncio.subprocess.Process):
+    """结束仍在运行的ffmpeg进程"""
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+
+async def _feed_stdin(process: asyncio.subprocess.Process, byte_stream: AsyncIterator[bytes]):
+    """将接收到的音频字节持续写入ffmpeg标准输入"""
+    try:
+        async for data in byte_stream:
+            if data:
+                process.stdin.write(data)
+                await process.stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        logger.warning("ffmpeg已提前退出，停止写入音频数据")
+    except BaseException:
+        # 上游数据异常（如超出大小限制、客户端断开）时立即终止解码
+        if process.returncode is None:
+            process.kill()
+        raise
+    finally:
+        if not process.stdin.is_closing():
+            process.stdin.close()
+
+
+async def _decode(
+    source: str,
+    byte_stream: Optional[AsyncIterator[bytes]],
+    sample_rate: int,
+    frame_seconds: float
+) -> AsyncIterator[np.ndarray]:
+    """启动ffmpeg并按帧读取解码结果"""
+    process = await asyncio.create_subprocess_exec(
+        *_build_ffmpeg_command(source, sample_rate),
+        stdin=asyncio.subprocess.PIPE if byte_stream is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stderr_task = asyncio.create_task(_drain_stderr(process))
+    feed_task = asyncio.create_task(_feed_stdin(process, byte_stream)) if byte_stream is not None else None
+    try:
+        async for frame in _read_frames(process, int(frame_seconds * sample_rate)):
+            yield frame
+
+        if feed_task is not None:
+            # 抛出上游数据读取过程中的异常
+            await feed_task
+
+        return_code = await process.wait()
+        if return_code != 0:
+            stderr = (await stderr_task).decode(errors="ignore").strip()
+            raise Exception(f"ffmpeg解码失败(退出码 {return_code}): {stderr[-500:]}")
+    finally:
+        await _terminate(process)
+        for task in (feed_task, stderr_task):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+async def decode_audio_stream(
+    file_path: Path,
+    sample_rate: int = SAMPLE_RATE,
+    frame_seconds: float = FRAME_SECONDS
+) -> AsyncIterator[np.ndarray]:
+    """通过ffmpeg管道流式解码音频文件
+
+    边解码边产出固定时长的16kHz单声道float32音频帧，
+    内存占用与文件时长无关。
+
+    Args:
+        file_path: 音频文件路径
+        sample_rate: 输出采样率
+        frame_seconds: 每帧时长(秒)
+
+    Yields:
+        float32音频帧
+    """
+    async for frame in _decode(str(file_path), None, sample_rate, frame_seconds):
+        yield frame
+
+
+async def decode_audio_bytes_stream(
+    byte_stream: AsyncIterator[bytes],
+    sample_rate: int = SAMPLE_RATE,
+    frame_seconds: float = FRAME_SECONDS
+) -> AsyncIterator[np.ndarray]:
+    """通过ffmpeg管道流式解码正在接收的音频字节流
+
+    音频数据边接收边写入ffmpeg标准输入，解码出的音频帧即时产出，
+    使网络接收、解码与推理可以重叠进行。输入格式需支持顺序读取
+    （如WAV、MP3、FLAC、OGG），见 `STREAMABLE_EXTENSIONS`。
+
+    Args:
+        byte_stream: 音频字节流
+        sample_rate: 输出采样率
+        frame_seconds: 每帧时长(秒)
+
+    Yields:
+        float32音频帧
+    """
+    async for frame in _decode("pipe:0", byte_stream, sample_rate, frame_seconds):
+        yield frame
+
+
+async def predecode_to_pcm(
+    file_path: Path,
+    pcm_path: Path,
+    sample_rate: int = SAMPLE_RATE
+) -> bool:
+    """将音频文件预解码为16kHz单声道s16le PCM文件
+
+    先写入临时文件，完成后再重命名，PCM文件存在即表示解码完整。
+
+    Args:
+        file_path: 音频文件路径
+        pcm_path: PCM文件保存路径
+        sample_rate: 输出采样率
+
+    Returns:
+        是否解码成功
+    """
+    temp_path = pcm_path.with_name(f"{pcm_path.name}.tmp")
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-nostdin", "-hide_banner", "-v", "error", "-y",
+            "-i", str(file_path),
+            "-vn", "-ac", "1", "-ar", str(sample_rate),
+            "-f", "s16le", "-acodec", "pcm_s16le",
+            str(temp_path),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise Exception(f"ffmpeg退出码 {process.returncode}: {stderr.decode(errors='ignore').strip()[-500:]}")
+        os.replace(temp_path, pcm_path)
+        logger.info(f"音频预解码完成: {pcm_path.name}, 大小: {pcm_path.stat().st_size / (1024 * 1024):.2f}MB")
+        return True
+    except Exception as e:
+        logger.error(f"音频预解码失败: {file_path}, 错误: {str(e)}")
+        if temp_path.exists():
+            temp_path.unlink()
+        return False
+
+
+def pcm_duration(pcm_path: Path, sample_rate: int = SAMPLE_RATE) -> float:
+    """根据预解码PCM文件大小计算音频时长(秒)"""
+    return pcm_path.stat().st_size / PCM_BYTES_PER_SAMPLE / sample_rate
+
+
+async def read_pcm_stream(
+    pcm_path: Path,
+    sample_rate: int = SAMPLE_RATE,
+    frame_seconds: float = FRAME_SECONDS
+) -> AsyncIterator[np.ndarray]:
+    """按帧读取预解码的s16le PCM文件，无需再次解码
+
+    Yields:
+        float32音频帧
+    """
+    frame_bytes = int(frame_seconds * sample_rate) * PCM_BYTES_PER_SAMPLE
+    with open(pcm_path, "rb") as f:
+        while True:
+            data = await asyncio.to_thread(f.read, frame_bytes)
+            data = data[:len(data) - len(data) % PCM_BYTES_PER_SAMPLE]
+            if not data:
+                break
+            yield np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
@@ -0,0 +1,144 @@
+"""跨请求动态批处理调度模块"""
+
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from loguru import logger
+
+
+BatchRunner = Callable[[Hashable, List[Any]], Awaitable[List[Any]]]
+
+
+class BatchScheduler:
+    """动态批处理调度器
+
+    收集所有并发请求提交的待推理音频块，按最大批大小/最大等待时间组批，
+    同一批中推理参数相同的音频块合并为一次模型调用，再将结果分发回各自的请求。
+    """
+
+    def __init__(
+        self,
+        run_batch: BatchRunner,
+        max_batch_size: int = 8,
+        max_wait_ms: int = 20,
+        max_concurrent_batches: int = 1
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # 运行时统计
+        self._batches = 0
+        self._items = 0
+        self._max_observed_batch = 0
+
+    def _ensure_started(self):
+        """在当前事件循环中启动调度任务"""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                f"批处理调度器已启动，最大批大小: {self.max_batch_size}，"
+                f"最大等待: {self.max_wait * 1000:.0f}ms"
+            )
+
+    async def submit(self, item: Any, group_key: Hashable) -> Any:
+        """提交单个待推理项并等待其结果
+
+        Args:
+            item: 待推理的输入（如音频块）
+            group_key: 推理参数分组键，只有分组键相同的项才会合并推理
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((group_key, item, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Hashable, Any, asyncio.Future]]:
+        """收集一批待推理项：等到第一项后，在最大等待时间内尽量凑满批次"""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # 已排队的项直接取出，无需等待
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        """调度主循环"""
+        while True:
+            # 推理槽位全部占用时不再组批，让新请求在队列中累积成更大的批次
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            asyncio.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch: List[Tuple[Hashable, Any, asyncio.Future]]):
+        """按分组执行推理并分发结果"""
+        try:
+            groups: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = defaultdict(list)
+            for group_key, item, future in batch:
+                # 跳过已取消的请求（如客户端断开连接）
+                if not future.done():
+                    groups[group_key].append((item, future))
+
+            for group_key, entries in groups.items():
+                items = [item for item, _ in entries]
+                self._batches += 1
+                self._items += len(items)
+                self._max_observed_batch = max(self._max_observed_batch, len(items))
+
+                try:
+                    results = await self.run_batch(group_key, items)
+                    if len(results) != len(items):
+                        raise Exception(f"批量推理结果数量不匹配: 输入 {len(items)}，输出 {len(results)}")
+                except Exception as e:
+                    logger.error(f"批量推理失败，批大小: {len(items)}，错误: {str(e)}")
+                    for _, future in entries:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                for (_, future), result in zip(entries, results):
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            self._slots.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取调度器运行状态"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": int(self.max_wait * 1000),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0,
+            "max_observed_batch_size": self._max_observed_batch
+        }
+
+    def close(self):
+        """停止调度任务"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
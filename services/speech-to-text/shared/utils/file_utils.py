@@ -1,16 +1,81 @@
 """文件处理工具模块"""
 
+import io
 import os
 import time
+import errno
+import heapq
+import shutil
+import asyncio
+import hashlib
+import tempfile
+import threading
 import aiofiles
 from pathlib import Path
-from typing import Optional, TYPE_CHECKING
+from typing import Optional, AsyncIterator, Dict, Iterable, List, Set, Tuple, TYPE_CHECKING
 from loguru import logger
 
+from .metrics import UPLOAD_SECONDS, UPLOAD_BYTES, ERRORS
+from .logger_config import RateLimitedLog
+
 if TYPE_CHECKING:
     from fastapi import UploadFile
 
 
+UPLOAD_MIN_BUFFER = 64 * 1024  # 逐块读取上传数据的初始缓冲区大小
+UPLOAD_MAX_BUFFER = 4 * 1024 * 1024  # 逐块读取上传数据的最大缓冲区大小
+COPY_BLOCK_SIZE = 8 * 1024 * 1024  # 批量复制与计算哈希的块大小
+PIN_DIR_NAME = ".pins"  # 上传目录下保存文件使用标记的子目录
+
+
+def _upload_fileno(file: "UploadFile") -> Optional[int]:
+    """获取已落盘的上传临时文件描述符，数据仍在内存中时返回None"""
+    fileobj = file.file
+    # 小文件由SpooledTemporaryFile保存在内存中，取fileno会强制写盘。
+    # 无法确认底层文件已落盘时（如标准库内部实现变化）按内存数据处理，走分块写入
+    if isinstance(fileobj, tempfile.SpooledTemporaryFile):
+        try:
+            inner = getattr(fileobj, "_file", None)
+            if not isinstance(inner, io.IOBase) or isinstance(inner, (io.BytesIO, io.StringIO)):
+                return None
+        except Exception:
+            return None
+    try:
+        fileobj.flush()
+        return fileobj.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _process_alive(pid: int) -> bool:
+    """检查进程是否仍在运行"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _copy_upload(src_fd: int, offset: int, size: int, dest_path: Path) -> str:
+    """将已落盘的上传临时文件整体复制到目标路径，返回内容哈希(sha256)
+
+    按大块读取源文件，每块计算哈希后写入目标文件，源文件只读取一次。
+    """
+    hasher = hashlib.sha256()
+    with open(dest_path, "wb") as out:
+        position = offset
+        while position < offset + size:
+            block = os.pread(src_fd, min(COPY_BLOCK_SIZE, offset + size - position), position)
+            if not block:
+                raise OSError(errno.EIO, "上传临时文件在复制过程中被截断")
+            hasher.update(block)
+            out.write(block)
+            position += len(block)
+    return hasher.hexdigest()
+
+
 class FileManager:
     """文件管理器"""
     
@@ -19,8 +84,28 @@ class FileManager:
         self.max_file_size = max_file_size
         self.allowed_extensions = [ext.lower() for ext in allowed_extensions]
         
+        # 上传过程中计算的文件内容哈希（文件名 -> sha256）
+        self._file_hashes: Dict[str, str] = {}
+        
+        # 本进程中正在使用的文件（文件名 -> 引用计数）。多个工作进程共用上传目录，
+        # 因此同时在标记目录中为每个进程写入标记文件 `<文件名>.<pid>`，清理时跳过所有进程标记的文件
+        self._pinned_files: Dict[str, int] = {}
+        self._pin_dir = self.upload_dir / PIN_DIR_NAME
+        
+        # 过期索引：按写入时间排序的小顶堆 (mtime, 文件名)，清理时只需弹出已过期的条目。
+        # 文件删除后堆中的条目不立即移除，弹出时与 _indexed 中的写入时间不一致即跳过。
+        # 清理在工作线程中执行，索引的读写需持有 _index_lock
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._indexed: Dict[str, float] = {}
+        self._index_lock = threading.Lock()
+        
         # 确保上传目录存在
         self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self._pin_dir.mkdir(exist_ok=True)
+        # 进程号可能与已退出的进程相同，清除其遗留的标记
+        for marker in self._pin_dir.glob(f"*.{os.getpid()}"):
+            marker.unlink(missing_ok=True)
+        self.rebuild_index()
     
     def is_allowed_file(self, filename: str) -> bool:
         """检查文件扩展名是否允许"""
@@ -41,6 +126,159 @@ class FileManager:
         """检查文件大小是否有效"""
         return 0 < file_size <= self.max_file_size
     
+    def resolve_file_id(self, file_id: str) -> Optional[Path]:
+        """将上传接口返回的文件ID解析为上传目录中的文件路径
+        
+        文件ID只能是上传目录下的文件名，包含路径成分或文件不存在时返回None。
+        """
+        if not file_id or file_id != Path(file_id).name or file_id.startswith('.') or not self.is_allowed_file(file_id):
+            logger.warning(f"非法的文件ID: {file_id}")
+            return None
+        
+        file_path = self.upload_dir / file_id
+        if file_path.resolve().parent != self.upload_dir.resolve() or not file_path.is_file():
+            return None
+        return file_path
+    
+    def get_pcm_path(self, file_path: Path) -> Path:
+        """上传文件对应的预解码PCM文件路径"""
+        return file_path.with_name(f"{file_path.name}.pcm")
+    
+    def find_pcm_file(self, file_path: Path) -> Optional[Path]:
+        """获取已完成的预解码PCM文件，不存在时返回None"""
+        pcm_path = self.get_pcm_path(file_path)
+        return pcm_path if pcm_path.is_file() else None
+    
+    def _pin_marker(self, file_id: str) -> Path:
+        """本进程对文件的使用标记路径"""
+        return self._pin_dir / f"{file_id}.{os.getpid()}"
+    
+    def pin_file(self, file_id: str):
+        """标记文件正在被使用，任一进程清理过期文件时跳过"""
+        count = self._pinned_files.get(file_id, 0)
+        if count == 0:
+            self._pin_marker(file_id).touch()
+        self._pinned_files[file_id] = count + 1
+    
+    def unpin_file(self, file_id: str):
+        """取消文件的使用标记"""
+        count = self._pinned_files.get(file_id, 0) - 1
+        if count > 0:
+            self._pinned_files[file_id] = count
+        else:
+            self._pinned_files.pop(file_id, None)
+            self._pin_marker(file_id).unlink(missing_ok=True)
+    
+    def list_pinned_files(self) -> Set[str]:
+        """列出所有进程中正在使用的文件ID，并清除已退出进程遗留的标记"""
+        pinned: Set[str] = set()
+        with os.scandir(self._pin_dir) as it:
+            for entry in it:
+                file_id, _, pid = entry.name.rpartition(".")
+                if not file_id or not pid.isdigit():
+                    continue
+                if not _process_alive(int(pid)):
+                    Path(entry.path).unlink(missing_ok=True)
+                    continue
+                pinned.add(file_id)
+        return pinned
+    
+    @staticmethod
+    def _is_derived_file(name: str) -> bool:
+        """预解码PCM文件及其临时文件随源文件一起删除，不单独索引"""
+        return name.endswith(".pcm") or name.endswith(".tmp")
+    
+    def rebuild_index(self) -> int:
+        """扫描上传目录重建过期索引（启动时执行一次），返回索引的文件数
+        
+        源文件已不存在的预解码文件同样加入索引，过期后清理。
+        """
+        entries: List[Tuple[float, str]] = []
+        with os.scandir(self.upload_dir) as it:
+            for entry in it:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                if self._is_derived_file(entry.name):
+                    source_name = entry.name.removesuffix(".tmp").removesuffix(".pcm")
+                    if (self.upload_dir / source_name).exists():
+                        continue
+                try:
+                    entries.append((entry.stat().st_mtime, entry.name))
+                except OSError:
+                    continue
+        heapq.heapify(entries)
+        with self._index_lock:
+            self._expiry_heap = entries
+            self._indexed = {name: mtime for mtime, name in entries}
+        logger.info(f"上传目录索引已重建，共 {len(entries)} 个文件")
+        return len(entries)
+    
+    def _index_file(self, file_path: Path):
+        """将新保存的文件加入过期索引"""
+        try:
+            mtime = file_path.stat().st_mtime
+        except OSError:
+            return
+        with self._index_lock:
+            self._indexed[file_path.name] = mtime
+            heapq.heappush(self._expiry_heap, (mtime, file_path.name))
+    
+    def create_upload_path(self, filename: str) -> Path:
+        """为上传文件生成唯一的保存路径"""
+        timestamp = int(time.time() * 1000)
+        return self.upload_dir / f"{timestamp}_{filename}"
+    
+    async def tee_upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        save_path: Optional[Path] = None
+    ) -> AsyncIterator[bytes]:
+        """边接收边转发上传数据，可选同时保存到磁盘
+        
+        Args:
+            chunks: 上传数据流
+            filename: 原始文件名（用于日志）
+            save_path: 保存路径，为空则不落盘
+            
+        Raises:
+            ValueError: 数据大小超出限制
+        """
+        total_size = 0
+        hasher = hashlib.sha256()
+        f = await aiofiles.open(save_path, 'wb') if save_path else None
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                total_size += len(chunk)
+                if total_size > self.max_file_size:
+                    logger.warning(f"文件大小超出限制: {filename}, 大小: {total_size} 字节")
+                    raise ValueError(f"文件大小超出限制({self.max_file_size} 字节)")
+                if f:
+                    await f.write(chunk)
+                    hasher.update(chunk)
+                UPLOAD_BYTES.inc(len(chunk))
+                yield chunk
+            
+            if save_path:
+                self._file_hashes[save_path.name] = hasher.hexdigest()
+                await f.close()
+                f = None
+                self._index_file(save_path)
+            logger.info(f"流式接收完成: {filename}, 大小: {total_size / (1024 * 1024):.2f}MB")
+        except BaseException:
+            # 接收失败时清理部分文件
+            if f:
+                await f.close()
+                f = None
+                if save_path.exists():
+                    save_path.unlink()
+            raise
+        finally:
+            if f:
+                await f.close()
+    
     async def save_upload_file(self, file_content: bytes, filename: str) -> Optional[Path]:
         """保存上传的文件"""
         try:
@@ -55,13 +293,12 @@ class FileManager:
                 return None
             
             # 生成唯一文件名
-            timestamp = int(time.time() * 1000)
-            safe_filename = f"{timestamp}_{filename}"
-            file_path = self.upload_dir / safe_filename
+            file_path = self.create_upload_path(filename)
             
             # 保存文件
             async with aiofiles.open(file_path, 'wb') as f:
                 await f.write(file_content)
+            self._index_file(file_path)
             
             logger.info(f"文件保存成功: {file_path}")
             return file_path
@@ -71,7 +308,11 @@ class FileManager:
             return None
     
     async def save_upload_file_stream(self, file: "UploadFile", filename: str) -> Optional[Path]:
-        """流式保存上传的文件"""
+        """流式保存上传的文件
+        
+        Starlette已将较大的上传文件缓存到临时文件中，此时在一个线程中整体复制该文件
+        并计算哈希；数据仍在内存中或无法获取文件描述符时，以逐步增大的缓冲区分块读写。
+        """
         try:
             # 检查文件扩展名
             if not self.is_allowed_file(filename):
@@ -79,53 +320,37 @@ class FileManager:
                 return None
             
             # 生成唯一文件名
-            timestamp = int(time.time() * 1000)
-            safe_filename = f"{timestamp}_{filename}"
-            file_path = self.upload_dir / safe_filename
+            file_path = self.create_upload_path(filename)
             
-            logger.info(f"开始流式接收文件: {filename} -> {safe_filename}")
+            logger.info(f"开始流式接收文件: {filename} -> {file_path.name}")
+            started = time.perf_counter()
             
-            # 流式保存文件
-            total_size = 0
-            chunk_count = 0
-            chunk_size = 8192  # 8KB chunks
-            last_log_size = 0
-            log_interval = 1024 * 1024  # 每1MB输出一次日志
+            fd = _upload_fileno(file)
+            if fd is not None:
+                offset = file.file.tell()
+                total_size = os.fstat(fd).st_size - offset
+                if total_size > self.max_file_size:
+                    logger.warning(f"文件大小超出限制: {filename}, 大小: {total_size} 字节")
+                    return None
+                digest = await asyncio.to_thread(_copy_upload, fd, offset, total_size, file_path)
+            else:
+                digest, total_size = await self._save_buffered(file, filename, file_path)
+                if digest is None:
+                    return None
             
-            async with aiofiles.open(file_path, 'wb') as f:
-                while True:
-                    chunk = await file.read(chunk_size)
-                    if not chunk:
-                        logger.info(f"文件接收完成，共接收 {chunk_count} 个数据块")
-                        break
-                    
-                    chunk_count += 1
-                    total_size += len(chunk)
-                    
-                    # 检查文件大小限制
-                    if total_size > self.max_file_size:
-                        # 删除已写入的部分文件
-                        await f.close()
-                        if file_path.exists():
-                            file_path.unlink()
-                        logger.warning(f"文件大小超出限制: {filename}, 大小: {total_size} 字节")
-                        return None
-                    
-                    await f.write(chunk)
-                    
-                    # 定期输出进度日志
-                    if total_size - last_log_size >= log_interval:
-                        progress_mb = total_size / (1024 * 1024)
-                        logger.info(f"流式接收进度: {progress_mb:.1f}MB ({chunk_count} 块)")
-                        last_log_size = total_size
+            self._file_hashes[file_path.name] = digest
+            self._index_file(file_path)
+            UPLOAD_BYTES.inc(total_size)
+            UPLOAD_SECONDS.observe(time.perf_counter() - started)
             
             final_size_mb = total_size / (1024 * 1024)
             logger.info(f"流式文件保存成功: {file_path}")
-            logger.info(f"文件大小: {total_size} 字节 ({final_size_mb:.2f}MB), 共 {chunk_count} 个数据块")
+            logger.info(f"文件大小: {total_size} 字节 ({final_size_mb:.2f}MB)，{'批量复制' if fd is not None else '分块写入'}")
             return file_path
             
         except Exception as e:
             logger.error(f"流式保存文件失败: {filename}, 错误: {str(e)}")
+            ERRORS.labels(stage="upload").inc()
             # 清理可能的部分文件
             if 'file_path' in locals() and file_path.exists():
                 try:
@@ -135,8 +360,79 @@ class FileManager:
                     pass
             return None
     
+    async def _save_buffered(self, file: "UploadFile", filename: str, file_path: Path) -> Tuple[Optional[str], int]:
+        """分块读取上传文件并写入磁盘，返回 (内容哈希, 大小)，超出大小限制时哈希为空
+        
+        缓冲区从 UPLOAD_MIN_BUFFER 开始，每次读满即翻倍直至 UPLOAD_MAX_BUFFER，
+        减少大文件的读写次数（每次读写都需切换到线程池）。
+        """
+        total_size = 0
+        chunk_size = UPLOAD_MIN_BUFFER
+        progress_log = RateLimitedLog()
+        
+        hasher = hashlib.sha256()
+        
+        async with aiofiles.open(file_path, 'wb') as f:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                
+                total_size += len(chunk)
+                
+                # 检查文件大小限制
+                if total_size > self.max_file_size:
+                    # 删除已写入的部分文件
+                    await f.close()
+                    if file_path.exists():
+                        file_path.unlink()
+                    logger.warning(f"文件大小超出限制: {filename}, 大小: {total_size} 字节")
+                    return None, total_size
+                
+                await f.write(chunk)
+                hasher.update(chunk)
+                
+                if len(chunk) == chunk_size and chunk_size < UPLOAD_MAX_BUFFER:
+                    chunk_size *= 2
+                
+                # 按时间间隔输出进度日志
+                if progress_log.ready():
+                    logger.info(f"流式接收进度: {total_size / (1024 * 1024):.1f}MB")
+        
+        return hasher.hexdigest(), total_size
+    
+    async def get_file_hash(self, file_path: Path) -> Optional[str]:
+        """获取文件内容哈希(sha256)
+        
+        优先使用上传时边写入边计算的结果，否则在线程中读取文件计算。
+        """
+        file_hash = self._file_hashes.get(file_path.name)
+        if file_hash is not None:
+            return file_hash
+        
+        def _compute() -> str:
+            with open(file_path, 'rb') as f:
+                return hashlib.file_digest(f, "sha256").hexdigest()
+        
+        try:
+            file_hash = await asyncio.to_thread(_compute)
+            self._file_hashes[file_path.name] = file_hash
+            return file_hash
+        except Exception as e:
+            logger.error(f"计算文件哈希失败: {file_path}, 错误: {str(e)}")
+            return None
+    
     def delete_file(self, file_path: Path) -> bool:
-        """删除文件"""
+        """删除文件（连同其预解码PCM文件）"""
+        self._file_hashes.pop(file_path.name, None)
+        with self._index_lock:
+            self._indexed.pop(file_path.name, None)
+        pcm_path = self.get_pcm_path(file_path)
+        if pcm_path.exists():
+            try:
+                pcm_path.unlink()
+            except Exception as e:
+                logger.error(f"删除预解码文件失败: {pcm_path}, 错误: {str(e)}")
         try:
             if file_path.exists():
                 file_path.unlink()
@@ -147,25 +443,114 @@ class FileManager:
             logger.error(f"删除文件失败: {file_path}, 错误: {str(e)}")
             return False
     
-    def cleanup_old_files(self, retention_time: int) -> int:
-        """清理过期文件"""
-        current_time = time.time()
+    def _pop_evictable(
+        self,
+        keep_names: Set[str],
+        skipped: List[Tuple[float, str]],
+        cutoff: Optional[float] = None
+    ) -> Optional[str]:
+        """从过期索引中取出最早写入且未被引用的文件名
+        
+        Args:
+            keep_names: 需要保留的文件名，取出时跳过并记入 skipped，由调用方重新放回索引
+            skipped: 被跳过的索引条目
+            cutoff: 不为空时只取写入时间不晚于该时间的文件
+        """
+        with self._index_lock:
+            while self._expiry_heap:
+                mtime, name = self._expiry_heap[0]
+                if cutoff is not None and mtime > cutoff:
+                    return None
+                heapq.heappop(self._expiry_heap)
+                if self._indexed.get(name) != mtime:
+                    # 文件已删除或重新写入
+                    continue
+                if name in keep_names:
+                    skipped.append((mtime, name))
+                    continue
+                del self._indexed[name]
+                return name
+        return None
+    
+    def _reindex_if_exists(self, name: str):
+        """删除失败的文件重新加入索引，下次清理时重试"""
+        file_path = self.upload_dir / name
+        if file_path.exists():
+            self._index_file(file_path)
+    
+    def _prune_file_hashes(self):
+        """移除已不存在的文件的哈希记录
+        
+        仍在过期索引中的文件到期时由 delete_file 移除，这里只检查不在索引中的文件
+        （如删除失败后已被其他进程删除的文件）。
+        """
+        with self._index_lock:
+            indexed = set(self._indexed)
+        for name in list(self._file_hashes):
+            if name not in indexed and not (self.upload_dir / name).exists():
+                self._file_hashes.pop(name, None)
+    
+    def _disk_usage_ratio(self) -> float:
+        """上传目录所在磁盘的使用率"""
+        usage = shutil.disk_usage(self.upload_dir)
+        return usage.used / usage.total if usage.total else 0.0
+    
+    def cleanup_old_files(
+        self,
+        retention_time: int,
+        keep: Optional[Iterable[str]] = None,
+        disk_high_water: float = 0.0
+    ) -> int:
+        """清理过期文件
+        
+        只处理过期索引中已到期的文件，不遍历上传目录；耗时与删除的文件数成正比，
+        可在工作线程中执行。
+        
+        Args:
+            retention_time: 文件保留时间(秒)
+            keep: 额外需要保留的文件ID（如任务数据库中未结束任务引用的文件）
+            disk_high_water: 磁盘使用率上限(0-1)，清理过期文件后仍超过时从最早的文件开始删除，0表示不限制
+        """
         deleted_count = 0
+        evicted_count = 0
+        skipped: List[Tuple[float, str]] = []
         
         try:
-            for file_path in self.upload_dir.iterdir():
-                if file_path.is_file():
-                    file_age = current_time - file_path.stat().st_mtime
-                    if file_age > retention_time:
-                        if self.delete_file(file_path):
-                            deleted_count += 1
+            keep_names = set(keep or ()) | self.list_pinned_files()
+            cutoff = time.time() - retention_time
+            while (name := self._pop_evictable(keep_names, skipped, cutoff)) is not None:
+                if self.delete_file(self.upload_dir / name):
+                    deleted_count += 1
+                else:
+                    self._reindex_if_exists(name)
+            
+            if disk_high_water > 0:
+                usage = self._disk_usage_ratio()
+                while usage > disk_high_water:
+                    name = self._pop_evictable(keep_names, skipped)
+                    if name is None:
+                        logger.warning(f"磁盘使用率 {usage:.1%} 超过上限 {disk_high_water:.1%}，但已无可删除的上传文件")
+                        break
+                    if self.delete_file(self.upload_dir / name):
+                        evicted_count += 1
+                    else:
+                        self._reindex_if_exists(name)
+                    usage = self._disk_usage_ratio()
+                if evicted_count:
+                    logger.warning(f"磁盘使用率超过上限 {disk_high_water:.1%}，提前删除了 {evicted_count} 个最早的上传文件")
             
             logger.info(f"清理完成，删除了 {deleted_count} 个过期文件")
-            return deleted_count
+            return deleted_count + evicted_count
             
         except Exception as e:
             logger.error(f"清理文件时出错: {str(e)}")
-            return deleted_count
+            return deleted_count + evicted_count
+        finally:
+            # 被引用而跳过的文件放回索引，下次清理时重新检查
+            with self._index_lock:
+                for entry in skipped:
+                    heapq.heappush(self._expiry_heap, entry)
+            self._prune_file_hashes()
     
     def get_file_info(self, file_path: Path) -> dict:
         """获取文件信息"""
@@ -0,0 +1,229 @@
+"""热词表管理模块
+
+课程录音常复用同一份术语表，热词表上传一次后以ID引用，无需每个请求都携带并重新解析全部关键词。
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+
+
+# 关键词分隔符：逗号、顿号、分号与换行
+_SEPARATOR_PATTERN = re.compile(r"[,，、;；\r\n]+")
+_ID_PATTERN = re.compile(r"^[0-9a-f]{16}$")
+
+
+def parse_keywords(text: Optional[str]) -> List[str]:
+    """将逗号、换行等分隔的关键词文本拆分为关键词列表"""
+    return _SEPARATOR_PATTERN.split(text) if text else []
+
+
+def normalize_keywords(words: Iterable[str]) -> List[str]:
+    """规范化关键词：全角转半角、合并空白、去除空项，按首次出现顺序去重（英文不区分大小写）"""
+    result = []
+    seen = set()
+    for word in words:
+        word = " ".join(unicodedata.normalize("NFKC", word).split())
+        key = word.casefold()
+        if word and key not in seen:
+            seen.add(key)
+            result.append(word)
+    return result
+
+
+def compile_keywords(words: List[str]) -> Optional[str]:
+    """编译为推理后端的热词参数（FunASR的 hotword：空格分隔的词串，英文词组按单词拆分），无关键词时返回None"""
+    return " ".join(words) or None
+
+
+class HotwordRegistry:
+    """热词表注册中心
+
+    每个热词表以JSON文件保存在存储目录下，多个工作进程可共用。ID由表名与规范化后的关键词确定，
+    重复上传同一热词表得到同一ID。规范化后的关键词与编译后的热词参数按最近使用顺序缓存在内存中，
+    命中缓存时核对文件是否仍存在且修改时间未变，其他进程删除或替换的热词表不会继续被解析。
+    所有方法均为阻塞调用，在事件循环中应通过 `asyncio.to_thread` 调用。
+    """
+
+    def __init__(self, store_dir: str, max_cached: int = 64, max_words: int = 10000):
+        """
+        Args:
+            store_dir: 热词表存储目录
+            max_cached: 内存中缓存的已编译热词表数量上限
+            max_words: 单个热词表的关键词数量上限
+        """
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.max_cached = max(1, max_cached)
+        self.max_words = max_words
+
+        self._lock = threading.Lock()
+        # 热词表ID -> (文件修改时间(纳秒), 关键词列表, 编译后的热词参数)
+        self._compiled: "OrderedDict[str, Tuple[int, List[str], Optional[str]]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _entry_path(self, hotword_id: str) -> Optional[Path]:
+        """热词表文件路径，ID格式不合法时返回None"""
+        if not _ID_PATTERN.match(hotword_id):
+            return None
+        return self.store_dir / f"{hotword_id}.json"
+
+    @staticmethod
+    def _summary(entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": entry["id"],
+            "name": entry["name"],
+            "count": len(entry["words"]),
+            "created_time": entry["created_time"]
+        }
+
+    def register(self, name: str, words: Iterable[str]) -> Dict[str, Any]:
+        """保存热词表，返回热词表信息（不含关键词）"""
+        words = normalize_keywords(words)
+        if not words:
+            raise ValueError("热词表为空")
+        if len(words) > self.max_words:
+            raise ValueError(f"热词数量超出限制: {len(words)} > {self.max_words}")
+
+        payload = json.dumps({"name": name, "words": words}, ensure_ascii=False, sort_keys=True)
+        hotword_id = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+        existing = self.get(hotword_id)
+        if existing is not None:
+            return self._summary(existing)
+
+        entry = {"id": hotword_id, "name": name, "words": words, "created_time": time.time()}
+        entry_path = self._entry_path(hotword_id)
+        temp_path = entry_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_path, entry_path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+        logger.info(f"热词表已保存: {name} ({hotword_id})，关键词数: {len(words)}")
+        return self._summary(entry)
+
+    def get(self, hotword_id: str) -> Optional[Dict[str, Any]]:
+        """读取热词表（含关键词），不存在时返回None"""
+        entry_path = self._entry_path(hotword_id)
+        if entry_path is None:
+            return None
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取热词表失败: {hotword_id}, 错误: {str(e)}")
+            return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """列出全部热词表信息，按创建时间排序"""
+        entries = []
+        for entry_path in self.store_dir.glob("*.json"):
+            entry = self.get(entry_path.stem)
+            if entry is not None:
+                entries.append(self._summary(entry))
+        return sorted(entries, key=lambda entry: entry["created_time"])
+
+    def delete(self, hotword_id: str) -> bool:
+        """删除热词表，不存在时返回False"""
+        entry_path = self._entry_path(hotword_id)
+        with self._lock:
+            self._compiled.pop(hotword_id, None)
+        if entry_path is None:
+            return False
+        try:
+            entry_path.unlink()
+        except FileNotFoundError:
+            return False
+        logger.info(f"热词表已删除: {hotword_id}")
+        return True
+
+    def _load(self, hotword_id: str) -> Tuple[List[str], Optional[str]]:
+        """获取热词表的关键词与编译后的热词参数
+
+        热词表文件存在且修改时间与缓存一致时直接返回缓存，否则重新读取并编译后缓存，
+        超出上限时淘汰最久未使用的热词表。
+
+        Raises:
+            KeyError: 热词表不存在
+        """
+        entry_path = self._entry_path(hotword_id)
+        try:
+            mtime_ns = entry_path.stat().st_mtime_ns if entry_path is not None else None
+        except FileNotFoundError:
+            mtime_ns = None
+        if mtime_ns is None:
+            # 可能已被其他工作进程删除
+            with self._lock:
+                self._compiled.pop(hotword_id, None)
+            raise KeyError(hotword_id)
+
+        with self._lock:
+            cached = self._compiled.get(hotword_id)
+            if cached is not None and cached[0] == mtime_ns:
+                self._compiled.move_to_end(hotword_id)
+                self._hits += 1
+                return cached[1], cached[2]
+            self._misses += 1
+
+        entry = self.get(hotword_id)
+        if entry is None:
+            with self._lock:
+                self._compiled.pop(hotword_id, None)
+            raise KeyError(hotword_id)
+        words, compiled = entry["words"], compile_keywords(entry["words"])
+
+        with self._lock:
+            self._compiled[hotword_id] = (mtime_ns, words, compiled)
+            self._compiled.move_to_end(hotword_id)
+            while len(self._compiled) > self.max_cached:
+                self._compiled.popitem(last=False)
+                self._evictions += 1
+        return words, compiled
+
+    def compile(self, hotword_id: str) -> Optional[str]:
+        """获取热词表编译后的热词参数
+
+        Raises:
+            KeyError: 热词表不存在
+        """
+        return self._load(hotword_id)[1]
+
+    def resolve(self, keywords: Optional[str] = None, hotword_id: Optional[str] = None) -> Optional[str]:
+        """合并热词表与请求中的关键词，返回编译后的热词参数
+
+        按关键词列表合并，热词表中含空格的词组不会被拆开后重复去重。
+
+        Raises:
+            KeyError: 热词表不存在
+        """
+        words, compiled = self._load(hotword_id) if hotword_id else ([], None)
+        if not keywords:
+            return compiled
+        return compile_keywords(normalize_keywords(words + parse_keywords(keywords)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取热词表缓存统计信息"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "cached": len(self._compiled),
+                "max_cached": self.max_cached,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions
+            }
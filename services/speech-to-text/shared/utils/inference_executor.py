@@ -0,0 +1,134 @@
+"""模型推理执行器模块"""
+
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+from .metrics import QUEUE_WAIT_SECONDS, INFERENCE_SECONDS
+
+
+def _timed_call(fn: Callable[..., Any], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Tuple[float, float, Any]:
+    """在工作者中执行任务并返回开始、结束时间，用于区分排队与执行耗时（需可被pickle）"""
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return started, time.time(), result
+
+
+class InferenceExecutor:
+    """模型推理专用执行器
+
+    将阻塞的模型推理提交到独立的线程池或进程池中执行，避免占用事件循环，
+    同时统计排队中和执行中的推理任务数量。
+    """
+
+    SUPPORTED_MODES = ("thread", "process")
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        max_workers: int = 1,
+        initializer: Optional[Callable[..., None]] = None,
+        initargs: Tuple[Any, ...] = ()
+    ):
+        if mode not in self.SUPPORTED_MODES:
+            raise ValueError(f"不支持的推理执行器类型: {mode}，可选: {', '.join(self.SUPPORTED_MODES)}")
+
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self._initializer = initializer
+        self._initargs = initargs
+        self._executor: Optional[Executor] = None
+
+        # 运行时统计（仅在事件循环线程中更新）
+        self._pending = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+
+    def _get_executor(self) -> Executor:
+        """获取底层执行器，首次使用时创建"""
+        if self._executor is None:
+            if self.mode == "process":
+                # 使用spawn避免在已加载torch的进程中fork导致的线程死锁
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self._initializer,
+                    initargs=self._initargs
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="sensevoice-infer",
+                    initializer=self._initializer,
+                    initargs=self._initargs
+                )
+            logger.info(f"推理执行器已创建，类型: {self.mode}，工作者数: {self.max_workers}")
+        return self._executor
+
+    def prestart(self, fn: Callable[[], Any]) -> List[Any]:
+        """预先启动所有工作者（进程池模式下会在此完成各进程的模型加载），返回各次调用结果"""
+        executor = self._get_executor()
+        futures = [executor.submit(fn) for _ in range(self.max_workers)]
+        wait(futures)
+        return [future.result() for future in futures]
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """提交推理任务并等待结果
+
+        调用方被取消时，已开始执行的推理仍会占用工作者直至完成，
+        因此排队计数在底层任务结束时才减少，而不是在调用方退出时。
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+
+        future = executor.submit(_timed_call, fn, args, kwargs)
+        self._pending += 1
+        self._submitted += 1
+        submitted_at = time.time()
+        future.add_done_callback(lambda _: self._call_in_loop(loop, self._task_done))
+        try:
+            started, finished, result = await asyncio.wrap_future(future, loop=loop)
+        except Exception:
+            self._failed += 1
+            raise
+        QUEUE_WAIT_SECONDS.observe(max(0.0, started - submitted_at))
+        INFERENCE_SECONDS.observe(finished - started)
+        self._completed += 1
+        return result
+
+    @staticmethod
+    def _call_in_loop(loop: asyncio.AbstractEventLoop, callback: Callable[[], None]) -> None:
+        """在事件循环线程中执行统计更新（底层任务的完成回调在工作线程中触发）"""
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            # 事件循环已关闭，无需再更新统计
+            pass
+
+    def _task_done(self) -> None:
+        self._pending -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取执行器运行状态"""
+        # 执行器按先进先出调度，同时最多执行max_workers个任务
+        in_flight = min(self._pending, self.max_workers)
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "in_flight": in_flight,
+            "queue_depth": self._pending - in_flight,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed
+        }
+
+    def shutdown(self) -> None:
+        """关闭执行器"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("推理执行器已关闭")
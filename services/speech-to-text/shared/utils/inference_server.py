@@ -0,0 +1,184 @@
+"""共享推理服务模块
+
+多个HTTP工作进程部署时，模型只在一个独立的推理进程中加载一次，各工作进程通过
+本地Unix Socket将推理请求转发给该进程，内存占用不随HTTP工作进程数增长。
+"""
+
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from multiprocessing.managers import BaseManager
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+from loguru import logger
+
+import numpy as np
+
+from .asr_backend import ASRBackend, AudioInput
+
+if TYPE_CHECKING:
+    from .sensevoice_client import SenseVoiceClient
+
+
+MAX_STREAM_SESSIONS = 256  # 推理进程保留的流式VAD会话状态上限，超出时淘汰最久未使用的会话
+CONNECT_TIMEOUT = 1800.0  # 等待推理进程就绪的最长时间(秒)，首次启动时推理进程可能需要下载模型
+
+
+class _InferenceManager(BaseManager):
+    """推理服务的进程间通信管理器"""
+
+
+class InferenceService:
+    """推理进程中对外提供服务的对象
+
+    各HTTP工作进程的调用在推理进程中由独立线程处理，
+    同时执行的模型推理数不超过 `max_concurrency`。
+    """
+
+    def __init__(self, client: "SenseVoiceClient", max_concurrency: int = 1):
+        self.client = client
+        self.backend: ASRBackend = client.backend
+        self._semaphore = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._vad_lock = threading.Lock()
+        self._stream_lock = threading.Lock()
+        # 流式VAD的会话状态保存在推理进程中，工作进程只持有会话ID
+        self._stream_caches: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def info(self) -> Dict[str, Any]:
+        """推理后端信息"""
+        return {
+            "name": self.backend.name,
+            "model_dir": self.backend.model_dir,
+            "device": self.client.device,
+            "precision": self.client.precision,
+            "hotwords": self.backend.supports_hotwords,
+            "vad_loaded": self.backend.vad_model is not None
+        }
+
+    def transcribe(self, inputs: List[AudioInput], language: str, keywords: Optional[str] = None) -> List[str]:
+        with self._semaphore:
+            return self.backend.transcribe(inputs, language, keywords)
+
+    def transcribe_with_timestamps(
+        self,
+        inputs: List[AudioInput],
+        language: str,
+        keywords: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        with self._semaphore:
+            return self.backend.transcribe_with_timestamps(inputs, language, keywords)
+
+    def load_vad_model(self):
+        with self._vad_lock:
+            if self.backend.vad_model is None:
+                logger.info("推理进程正在加载VAD模型")
+                self.backend.load_vad_model()
+
+    def vad_segments(self, audio: np.ndarray) -> List[Tuple[int, int]]:
+        return self.backend.vad_segments(audio)
+
+    def _stream_cache(self, stream_id: str) -> Dict[str, Any]:
+        with self._stream_lock:
+            cache = self._stream_caches.pop(stream_id, None)
+            if cache is None:
+                cache = {}
+                while len(self._stream_caches) >= MAX_STREAM_SESSIONS:
+                    self._stream_caches.popitem(last=False)
+            self._stream_caches[stream_id] = cache
+            return cache
+
+    def stream_vad(self, stream_id: str, piece: np.ndarray, is_final: bool, chunk_ms: int) -> List[Tuple[int, int]]:
+        cache = self._stream_cache(stream_id)
+        try:
+            return self.backend.stream_vad(piece, cache, is_final, chunk_ms)
+        finally:
+            if is_final:
+                with self._stream_lock:
+                    self._stream_caches.pop(stream_id, None)
+
+
+def serve_inference(client: "SenseVoiceClient", address: str, authkey: bytes, max_concurrency: int = 1):
+    """在当前进程中提供推理服务（阻塞），client 需已加载模型"""
+    service = InferenceService(client, max_concurrency)
+    _InferenceManager.register("InferenceService", callable=lambda: service)
+    manager = _InferenceManager(address=address, authkey=authkey)
+    server = manager.get_server()
+    logger.info(f"共享推理服务已启动: {address}，最大并发推理数: {max_concurrency}")
+    server.serve_forever()
+
+
+class RemoteBackend(ASRBackend):
+    """转发到共享推理进程的推理后端
+
+    `name`、`model_dir`、`precision` 与推理进程中的实际后端一致，
+    结果缓存键与单进程部署相同。
+    """
+
+    name = "remote"
+    remote = True
+
+    def __init__(self, address: str, authkey: bytes):
+        super().__init__()
+        self.address = address
+        self.authkey = authkey
+        self._service: Any = None
+
+    @classmethod
+    def check_available(cls):
+        pass
+
+    def _connect(self):
+        """连接推理进程，推理进程尚未启动完成时重试"""
+        _InferenceManager.register("InferenceService")
+        deadline = time.time() + CONNECT_TIMEOUT
+        while True:
+            try:
+                manager = _InferenceManager(address=self.address, authkey=self.authkey)
+                manager.connect()
+                self._service = manager.InferenceService()
+                return
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.time() > deadline:
+                    raise ConnectionError(f"无法连接共享推理服务: {self.address}")
+                time.sleep(0.5)
+
+    def load_model(self):
+        self._connect()
+        info = self._service.info()
+        self.name = info["name"]
+        self.model_dir = info["model_dir"]
+        self.device = info["device"]
+        self.precision = info["precision"]
+        self.supports_hotwords = info["hotwords"]
+        # 模型由推理进程持有，本地仅保留服务代理
+        self.model = self._service
+        if info["vad_loaded"]:
+            self.vad_model = self._service
+        logger.info(f"已连接共享推理服务: {self.address}，推理后端: {self.name}，精度: {self.precision}")
+
+    def load_vad_model(self):
+        self._service.load_vad_model()
+        self.vad_model = self._service
+
+    def transcribe(self, inputs: List[AudioInput], language: str, keywords: Optional[str] = None) -> List[str]:
+        return self._service.transcribe(inputs, language, keywords)
+
+    def transcribe_with_timestamps(
+        self,
+        inputs: List[AudioInput],
+        language: str,
+        keywords: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        return self._service.transcribe_with_timestamps(inputs, language, keywords)
+
+    def vad_segments(self, audio: np.ndarray) -> List[Tuple[int, int]]:
+        return self._service.vad_segments(audio)
+
+    def stream_vad(self, piece: np.ndarray, cache: Dict[str, Any], is_final: bool, chunk_ms: int) -> List[Tuple[int, int]]:
+        stream_id = cache.setdefault("stream_id", uuid.uuid4().hex)
+        return self._service.stream_vad(stream_id, piece, is_final, chunk_ms)
+
+    def get_info(self) -> Dict[str, Any]:
+        info = super().get_info()
+        info["inference_server"] = self.address
+        return info
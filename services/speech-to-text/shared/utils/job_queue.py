@@ -0,0 +1,417 @@
+"""持久化转录任务队列模块"""
+
+import time
+import json
+import uuid
+import sqlite3
+import asyncio
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+from loguru import logger
+
+from .metrics import ACTIVE_STREAMS, ERRORS
+
+if TYPE_CHECKING:
+    from .file_utils import FileManager
+    from .sensevoice_client import SenseVoiceClient
+
+
+# 任务状态
+JOB_PENDING = "pending"
+JOB_PROCESSING = "processing"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+FINISHED_STATUSES = (JOB_COMPLETED, JOB_FAILED)
+
+JOB_POLL_INTERVAL = 5.0  # 空闲时检查数据库中待处理任务的间隔(秒)，用于接管其他进程提交的任务
+JOB_LEASE_TIME = 60.0  # 任务领取租约时长(秒)，处理期间定期续约
+
+
+class JobStore:
+    """基于SQLite的转录任务存储
+
+    任务记录持久化在本地数据库文件中，服务重启后未完成的任务可以继续处理。
+    领取任务时记录租约到期时间，处理中的任务租约过期（如所在工作进程已退出）后可被重新领取。
+    所有方法均为阻塞调用，在事件循环中应通过 `asyncio.to_thread` 调用。
+    """
+
+    _COLUMNS = (
+        "job_id", "status", "file_id", "file_name", "language", "keywords",
+        "chunk_duration", "progress", "result", "chunks", "error", "processing_time",
+        "created_time", "updated_time", "lease_expires"
+    )
+    # 可领取条件，参数依次为：待处理状态、处理中状态、当前时间
+    _CLAIMABLE = "(status = ? OR (status = ? AND (lease_expires IS NULL OR lease_expires < ?)))"
+
+    def __init__(self, db_path: str, lease_time: float = JOB_LEASE_TIME):
+        """
+        Args:
+            db_path: 数据库文件路径
+            lease_time: 任务领取租约时长(秒)
+        """
+        self.db_path = Path(db_path)
+        self.lease_time = lease_time
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            # WAL模式下读写互不阻塞，多个进程可共用同一数据库
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    file_id TEXT NOT NULL,
+                    file_name TEXT,
+                    language TEXT NOT NULL,
+                    keywords TEXT,
+                    chunk_duration REAL NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    result TEXT,
+                    chunks TEXT,
+                    error TEXT,
+                    processing_time REAL,
+                    created_time REAL NOT NULL,
+                    updated_time REAL NOT NULL,
+                    lease_expires REAL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_time)")
+            # 早期版本的数据库没有逐块结果列与租约列
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (("chunks", "TEXT"), ("lease_expires", "REAL")):
+                if column in columns:
+                    continue
+                try:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+                except sqlite3.OperationalError:
+                    # 其他进程已添加
+                    pass
+
+    def create(
+        self,
+        file_id: str,
+        file_name: Optional[str],
+        language: str,
+        keywords: Optional[str],
+        chunk_duration: float
+    ) -> Dict[str, Any]:
+        """创建待处理任务"""
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": JOB_PENDING,
+            "file_id": file_id,
+            "file_name": file_name,
+            "language": language,
+            "keywords": keywords,
+            "chunk_duration": chunk_duration,
+            "progress": 0.0,
+            "result": None,
+            "chunks": None,
+            "error": None,
+            "processing_time": None,
+            "created_time": now,
+            "updated_time": now,
+            "lease_expires": None
+        }
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(self._COLUMNS)}) VALUES ({', '.join('?' * len(self._COLUMNS))})",
+                [job[column] for column in self._COLUMNS]
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """获取任务记录"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def update(self, job_id: str, **fields: Any):
+        """更新任务字段"""
+        fields["updated_time"] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", [*fields.values(), job_id])
+
+    def claim(self, job_id: str) -> bool:
+        """领取待处理或租约已过期的处理中任务并标记为处理中，任务已被其他工作者领取时返回False"""
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"""
+                UPDATE jobs SET status = ?, progress = 0, lease_expires = ?, updated_time = ?
+                WHERE job_id = ? AND {self._CLAIMABLE}
+                """,
+                (JOB_PROCESSING, now + self.lease_time, now, job_id, JOB_PENDING, JOB_PROCESSING, now)
+            )
+        return cursor.rowcount == 1
+
+    def renew_lease(self, job_id: str) -> bool:
+        """延长处理中任务的租约，任务已结束或已被重新排队时返回False"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE job_id = ? AND status = ?",
+                (time.time() + self.lease_time, job_id, JOB_PROCESSING)
+            )
+        return cursor.rowcount == 1
+
+    def list_pending(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """按提交顺序列出可领取的任务（待处理与租约已过期的处理中任务）"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE {self._CLAIMABLE} ORDER BY created_time LIMIT ?",
+                (JOB_PENDING, JOB_PROCESSING, time.time(), -1 if limit is None else limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_active_file_ids(self) -> List[str]:
+        """列出未结束任务引用的文件ID（包括其他进程中的任务）"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT file_id FROM jobs WHERE status NOT IN ({', '.join('?' * len(FINISHED_STATUSES))})",
+                FINISHED_STATUSES
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count_pending(self) -> int:
+        """统计待处理任务数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (JOB_PENDING,)).fetchone()[0]
+
+    def requeue_processing(self) -> int:
+        """将处理中断（如服务重启）的任务重新标记为待处理"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, progress = 0, lease_expires = NULL, updated_time = ? WHERE status = ?",
+                (JOB_PENDING, time.time(), JOB_PROCESSING)
+            )
+        return cursor.rowcount
+
+    def delete_finished(self, before: float) -> int:
+        """删除指定时间之前结束的任务"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(FINISHED_STATUSES))}) AND updated_time < ?",
+                (*FINISHED_STATUSES, before)
+            )
+        return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, int]:
+        """按状态统计任务数"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    """异步转录任务队列
+
+    任务提交后立即返回任务ID，由固定数量的后台工作者按提交顺序依次转录，
+    客户端通过任务ID轮询状态和结果，无需在转录期间保持长连接。
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        sensevoice_client: "SenseVoiceClient",
+        file_manager: "FileManager",
+        workers: int = 1,
+        max_pending: int = 1000,
+        requeue_on_start: bool = True
+    ):
+        """
+        Args:
+            requeue_on_start: 启动时将处理中的任务重新排队。多个进程共用任务数据库时应由启动脚本
+                在工作进程启动前统一执行，避免后启动的进程把其他进程正在处理的任务重新排队；
+                单个工作进程重启时，其遗留任务在租约过期后由任一工作者重新领取
+        """
+        self.store = store
+        self.sensevoice_client = sensevoice_client
+        self.file_manager = file_manager
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.requeue_on_start = requeue_on_start
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        """恢复未完成的任务并启动工作者"""
+        self._queue = asyncio.Queue()
+
+        if self.requeue_on_start:
+            requeued = await asyncio.to_thread(self.store.requeue_processing)
+            if requeued:
+                logger.warning(f"{requeued} 个任务在上次运行中未完成，已重新排队")
+
+        for job in await asyncio.to_thread(self.store.list_pending):
+            self._queue.put_nowait(job["job_id"])
+
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"转录任务队列已启动，工作者数: {self.workers}，待处理任务: {self._queue.qsize()}")
+
+    async def submit(
+        self,
+        file_id: str,
+        file_name: Optional[str],
+        language: str,
+        keywords: Optional[str],
+        chunk_duration: float
+    ) -> Dict[str, Any]:
+        """提交转录任务"""
+        # 任务可能由其他进程领取，未结束前其音频文件由清理任务按数据库中的引用（active_file_ids）保留
+        job = await asyncio.to_thread(self.store.create, file_id, file_name, language, keywords, chunk_duration)
+        self._queue.put_nowait(job["job_id"])
+        logger.info(f"转录任务已提交: {job['job_id']}, 文件: {file_id}")
+        return job
+
+    async def is_full(self) -> bool:
+        """待处理任务数是否已达上限"""
+        return await asyncio.to_thread(self.store.count_pending) >= self.max_pending
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """获取任务记录"""
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def _next_job_id(self) -> Optional[str]:
+        """获取下一个待处理任务ID，本进程队列空闲时从数据库中查找"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), JOB_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pending = await asyncio.to_thread(self.store.list_pending, 1)
+            return pending[0]["job_id"] if pending else None
+
+    async def _worker(self, index: int):
+        """工作者主循环"""
+        while True:
+            job_id = await self._next_job_id()
+            if job_id is None:
+                continue
+            try:
+                await self._process(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"工作者 {index} 处理任务异常: {job_id}, 错误: {str(e)}")
+
+    async def _process(self, job_id: str):
+        """处理单个转录任务"""
+        if not await asyncio.to_thread(self.store.claim, job_id):
+            # 已被其他工作者（或其他进程）领取
+            return
+
+        lease_task = asyncio.create_task(self._renew_lease(job_id), name=f"job-lease-{job_id}")
+        try:
+            await self._run(job_id)
+        finally:
+            lease_task.cancel()
+
+    async def _renew_lease(self, job_id: str):
+        """处理期间定期续约，避免任务被其他工作者重新领取"""
+        while True:
+            await asyncio.sleep(self.store.lease_time / 3)
+            if not await asyncio.to_thread(self.store.renew_lease, job_id):
+                logger.warning(f"转录任务租约续约失败: {job_id}")
+                return
+
+    async def _run(self, job_id: str):
+        """转录已领取的任务并保存结果"""
+        job = await asyncio.to_thread(self.store.get, job_id)
+        file_path = self.file_manager.upload_dir / job["file_id"]
+        start_time = time.time()
+        text = ""
+        # 逐块的文本与时间信息，用于导出字幕
+        chunks: List[Dict[str, Any]] = []
+        error = None
+        logger.info(f"开始处理转录任务: {job_id}, 文件: {job['file_id']}")
+
+        ACTIVE_STREAMS.labels(kind="job").inc()
+        try:
+            if not file_path.is_file():
+                raise FileNotFoundError(f"音频文件不存在或已过期: {job['file_id']}")
+
+            async for result in self.sensevoice_client.transcribe_audio_stream(
+                file_path=file_path,
+                keywords=job["keywords"],
+                language=job["language"],
+                chunk_duration=job["chunk_duration"],
+                audio_hash=await self.file_manager.get_file_hash(file_path),
+                pcm_path=self.file_manager.find_pcm_file(file_path),
+                word_timestamps=True
+            ):
+                if not result.get("success"):
+                    error = result.get("error", "转录失败")
+                    break
+                text = result.get("accumulated_text", text)
+                if "start" in result:
+                    chunks.append({
+                        "text": result["chunk_text"],
+                        "start": result["start"],
+                        "end": result["end"],
+                        "segments": result["segments"],
+                        "words": result.get("words", [])
+                    })
+                if result.get("progress") is not None and not result.get("is_final"):
+                    await asyncio.to_thread(self.store.update, job_id, progress=result["progress"])
+        except Exception as e:
+            error = str(e)
+        finally:
+            ACTIVE_STREAMS.labels(kind="job").dec()
+
+        processing_time = time.time() - start_time
+        if error is None:
+            await asyncio.to_thread(
+                self.store.update, job_id,
+                status=JOB_COMPLETED, progress=1.0, result=text,
+                chunks=json.dumps(chunks, ensure_ascii=False), processing_time=processing_time
+            )
+            logger.info(f"转录任务完成: {job_id}, 耗时: {processing_time:.2f}秒, 文本长度: {len(text)}")
+        else:
+            await asyncio.to_thread(
+                self.store.update, job_id,
+                status=JOB_FAILED, error=error, processing_time=processing_time
+            )
+            ERRORS.labels(stage="job").inc()
+            logger.error(f"转录任务失败: {job_id}, 错误: {error}")
+
+    async def active_file_ids(self) -> List[str]:
+        """未结束任务引用的文件ID（包括其他进程提交或领取的任务），清理文件时需保留"""
+        return await asyncio.to_thread(self.store.list_active_file_ids)
+
+    async def cleanup(self, retention_time: int) -> int:
+        """删除结束时间超过保留时间的任务记录"""
+        return await asyncio.to_thread(self.store.delete_finished, time.time() - retention_time)
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """获取队列运行状态"""
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "jobs": await asyncio.to_thread(self.store.get_stats)
+        }
+
+    async def stop(self):
+        """停止工作者，处理中的任务会在下次启动时重新排队，或在租约过期后被其他工作进程领取"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.store.close()
+        logger.info("转录任务队列已停止")
@@ -0,0 +1,194 @@
+"""实时语音转录会话模块"""
+
+import time
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, TYPE_CHECKING
+from loguru import logger
+
+import numpy as np
+
+from .audio_stream import SAMPLE_RATE
+
+if TYPE_CHECKING:
+    from .sensevoice_client import SenseVoiceClient
+
+
+LIVE_VAD_CHUNK_MS = 200  # 流式VAD每次处理的音频时长(毫秒)
+LIVE_SEGMENT_PADDING = 0.2  # 语音段两侧保留的静音时长(秒)
+LIVE_VAD_LOOKBACK = 1.0  # 无语音时缓冲区保留的音频时长(秒)，VAD检测到的起点可能早于当前位置
+
+
+class LiveTranscriptionSession:
+    """实时转录会话
+
+    接收连续的16kHz单声道音频，使用流式VAD检测语音段：语音进行中按固定间隔
+    对当前语音段推理并产出临时结果(partial)，语音段结束（或达到最大时长）时
+    产出最终结果(final)。音频接收与推理解耦，推理跟不上时自动跳过中间的临时结果，
+    缓冲区只保留尚未转录的音频。
+    """
+
+    def __init__(
+        self,
+        client: "SenseVoiceClient",
+        target_lang: str,
+        keywords: Optional[str] = None,
+        partial_interval: float = 0.6,
+        max_segment_duration: float = 15.0
+    ):
+        self.client = client
+        self.target_lang = target_lang
+        self.keywords = keywords
+        self.partial_samples = int(partial_interval * SAMPLE_RATE)
+        self.max_segment_samples = int(max_segment_duration * SAMPLE_RATE)
+        self.padding = int(LIVE_SEGMENT_PADDING * SAMPLE_RATE)
+
+        # 缓冲区：self._audio[0] 对应会话开始后的第 self._offset 个采样点
+        self._audio = np.zeros(0, dtype=np.float32)
+        self._offset = 0
+        self._vad_position = 0  # 已送入VAD的采样点数
+        self._vad_cache: Dict[str, Any] = {}
+        self._segment_start: Optional[int] = None  # 当前未转录语音的起点
+        self._last_partial_end = 0
+        self._segment_index = 0
+
+        self._incoming: List[np.ndarray] = []
+        self._data_ready = asyncio.Event()
+        self._input_closed = False
+        self._start_time = time.time()
+
+    @property
+    def _audio_end(self) -> int:
+        return self._offset + len(self._audio)
+
+    def push(self, samples: np.ndarray):
+        """追加接收到的音频（float32采样点），不阻塞"""
+        if len(samples):
+            self._incoming.append(samples.astype(np.float32, copy=False))
+            self._data_ready.set()
+
+    def close(self):
+        """音频输入结束，剩余语音转录完成后事件流结束"""
+        self._input_closed = True
+        self._data_ready.set()
+
+    def _slice(self, start: int, end: int) -> np.ndarray:
+        """按会话内的绝对采样点位置取出音频"""
+        return self._audio[max(0, start - self._offset):max(0, end - self._offset)]
+
+    def _trim(self):
+        """丢弃已不再需要的音频"""
+        if self._segment_start is not None:
+            keep_from = self._segment_start - self.padding
+        else:
+            keep_from = self._vad_position - int(LIVE_VAD_LOOKBACK * SAMPLE_RATE)
+        drop = keep_from - self._offset
+        if drop > 0:
+            self._audio = self._audio[drop:]
+            self._offset += drop
+
+    async def _detect(self, is_final: bool) -> List[Tuple[int, int]]:
+        """对新增音频执行流式VAD，返回已结束的语音段"""
+        if self.client.backend.vad_model is None:
+            # 无VAD模型：所有音频视为语音，仅按最大时长切分
+            if self._segment_start is None and self._audio_end > self._vad_position:
+                self._segment_start = self._vad_position
+            self._vad_position = self._audio_end
+            return []
+
+        chunk_samples = LIVE_VAD_CHUNK_MS * SAMPLE_RATE // 1000
+        pieces = []
+        while self._audio_end - self._vad_position >= chunk_samples:
+            pieces.append(self._slice(self._vad_position, self._vad_position + chunk_samples))
+            self._vad_position += chunk_samples
+        if is_final and self._audio_end > self._vad_position:
+            pieces.append(self._slice(self._vad_position, self._audio_end))
+            self._vad_position = self._audio_end
+        if not pieces:
+            return []
+
+        samples_per_ms = SAMPLE_RATE // 1000
+        finished = []
+        for start_ms, end_ms in await asyncio.to_thread(
+            self.client.stream_vad, pieces, self._vad_cache, is_final, LIVE_VAD_CHUNK_MS
+        ):
+            if start_ms >= 0 and self._segment_start is None:
+                self._segment_start = int(start_ms) * samples_per_ms
+            if end_ms >= 0 and self._segment_start is not None:
+                end = int(end_ms) * samples_per_ms
+                if end > self._segment_start:
+                    finished.append((self._segment_start, end))
+                self._segment_start = None
+        return finished
+
+    async def _transcribe(self, start: int, end: int) -> str:
+        """转录指定区间的音频（两侧保留少量静音）"""
+        audio = self._slice(start - self.padding, end + self.padding)
+        if len(audio) == 0:
+            return ""
+        text = await self.client._transcribe_chunk(
+            self.client._preprocess_audio(audio), self.target_lang, self.keywords
+        )
+        return text or ""
+
+    def _event(self, event_type: str, text: str, start: int, end: int) -> Dict[str, Any]:
+        return {
+            "type": event_type,
+            "segment_index": self._segment_index,
+            "text": text,
+            "start": round(start / SAMPLE_RATE, 3),
+            "end": round(end / SAMPLE_RATE, 3),
+            "timestamp": int(time.time())
+        }
+
+    async def _finalize(self, start: int, end: int) -> Dict[str, Any]:
+        """转录完整语音段并产出最终结果"""
+        event = self._event("final", await self._transcribe(start, end), start, end)
+        self._segment_index += 1
+        self._last_partial_end = end
+        return event
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """转录事件流
+
+        Yields:
+            partial: 当前语音段的临时结果，后续会被更新
+            final: 语音段的最终结果
+            end: 输入结束且全部音频已转录
+        """
+        while True:
+            await self._data_ready.wait()
+            self._data_ready.clear()
+
+            if self._incoming:
+                self._audio = np.concatenate([self._audio, *self._incoming])
+                self._incoming = []
+            is_final = self._input_closed
+
+            for start, end in await self._detect(is_final):
+                yield await self._finalize(start, end)
+
+            if is_final:
+                if self._segment_start is not None and self._audio_end > self._segment_start:
+                    yield await self._finalize(self._segment_start, self._audio_end)
+                    self._segment_start = None
+                duration = self._audio_end / SAMPLE_RATE
+                logger.info(
+                    f"实时转录结束，音频时长: {duration:.1f}秒，语音段数: {self._segment_index}，"
+                    f"会话时长: {time.time() - self._start_time:.1f}秒"
+                )
+                yield {"type": "end", "duration": round(duration, 3), "segments": self._segment_index}
+                return
+
+            if self._segment_start is not None:
+                audio_end = self._audio_end
+                if audio_end - self._segment_start >= self.max_segment_samples:
+                    # 语音段过长：先输出已有部分，剩余语音作为新的语音段继续
+                    split = self._segment_start + self.max_segment_samples
+                    yield await self._finalize(self._segment_start, split)
+                    self._segment_start = split
+                elif audio_end - max(self._last_partial_end, self._segment_start) >= self.partial_samples:
+                    text = await self._transcribe(self._segment_start, audio_end)
+                    self._last_partial_end = audio_end
+                    yield self._event("partial", text, self._segment_start, audio_end)
+
+            self._trim()
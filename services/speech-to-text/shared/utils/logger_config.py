@@ -1,39 +1,65 @@
 """日志配置模块"""
 
 import sys
+import time
 from pathlib import Path
+from typing import Optional
 from loguru import logger
 from shared.config import settings
 
 
+LOG_PROFILES = ("development", "production")
+
+
 def setup_logger():
-    """配置日志系统"""
+    """配置日志系统
+
+    development: 控制台彩色输出，app.log 记录全部DEBUG日志，日志在调用线程中同步写入。
+    production: 所有日志经队列由后台线程写入（enqueue），不在事件循环中执行磁盘IO；
+    app.log 只记录 LOG_LEVEL 及以上级别，不输出变量值诊断信息。
+    两种配置下请求日志均以JSON行写入 requests.log。
+    """
+    if settings.log_profile not in LOG_PROFILES:
+        raise ValueError(f"不支持的日志配置: {settings.log_profile}，可选: {', '.join(LOG_PROFILES)}")
+    production = settings.log_profile == "production"
+
     # 移除默认的控制台处理器
     logger.remove()
-    
-    # 添加控制台输出（带颜色）
+
+    # 生产配置下各日志输出共用的参数
+    sink_options = {"enqueue": True, "backtrace": False, "diagnose": False} if production else {}
+
+    # 请求日志只写入 requests.log
+    def not_request(record) -> bool:
+        return "REQUEST" not in record["extra"]
+
+    # 添加控制台输出（开发配置带颜色）
     logger.add(
         sys.stderr,
         level=settings.log_level,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        colorize=True
+        colorize=not production,
+        filter=not_request,
+        **sink_options
     )
-    
+
     # 确保日志目录存在
     log_dir = Path("./logs")
     log_dir.mkdir(exist_ok=True)
-    
-    # 添加应用日志文件（所有级别）
+
+    # 添加应用日志文件（开发配置记录所有级别）
     logger.add(
         log_dir / "app.log",
-        level="DEBUG",
+        level=settings.log_level if production else "DEBUG",
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
         rotation="10 MB",
         retention="7 days",
         compression="zip",
-        encoding="utf-8"
+        encoding="utf-8",
+        filter=not_request,
+        **sink_options
     )
-    
+
     # 添加错误日志文件（只记录ERROR和CRITICAL）
     logger.add(
         log_dir / "error.log",
@@ -42,9 +68,10 @@ def setup_logger():
         rotation="10 MB",
         retention="30 days",
         compression="zip",
-        encoding="utf-8"
+        encoding="utf-8",
+        **sink_options
     )
-    
+
     # 添加访问日志文件（用于记录API访问）
     logger.add(
         log_dir / "access.log",
@@ -54,13 +81,51 @@ def setup_logger():
         retention="7 days",
         compression="zip",
         encoding="utf-8",
-        filter=lambda record: "ACCESS" in record["extra"]
+        filter=lambda record: "ACCESS" in record["extra"],
+        **sink_options
+    )
+
+    # 添加请求日志文件（每行一个JSON对象，由 AccessLogMiddleware 记录）
+    logger.add(
+        log_dir / "requests.log",
+        level="INFO",
+        format="{message}",
+        rotation="50 MB",
+        retention="7 days",
+        compression="zip",
+        encoding="utf-8",
+        filter=lambda record: "REQUEST" in record["extra"],
+        **sink_options
     )
-    
-    logger.info(f"日志系统初始化完成，日志级别: {settings.log_level}")
+
+    logger.info(f"日志系统初始化完成，日志配置: {settings.log_profile}，日志级别: {settings.log_level}")
     logger.info(f"日志文件目录: {log_dir.absolute()}")
 
 
 def get_access_logger():
     """获取访问日志记录器"""
-    return logger.bind(ACCESS=True)
\ No newline at end of file
+    return logger.bind(ACCESS=True)
+
+
+def get_request_logger():
+    """获取请求日志（JSON行）记录器"""
+    return logger.bind(REQUEST=True)
+
+
+class RateLimitedLog:
+    """限制高频日志的输出频率
+
+    用于进度等在热路径中反复输出的日志：距创建或上次输出超过间隔时间 `ready()` 才返回True，
+    短时间内完成的操作不输出进度。
+    """
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = settings.log_progress_interval if interval is None else interval
+        self._last = time.monotonic()
+
+    def ready(self) -> bool:
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            return False
+        self._last = now
+        return True
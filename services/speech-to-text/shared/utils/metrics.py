@@ -0,0 +1,103 @@
+"""运行指标模块
+
+基于prometheus_client提供Prometheus指标，未安装时所有指标为空操作，/metrics 不可用。
+多进程部署时设置 PROMETHEUS_MULTIPROC_DIR（`python -m app.server` 会自动设置），
+各进程的指标写入该目录并在 /metrics 中汇总。
+"""
+
+import os
+from typing import Any, Optional, Tuple
+from loguru import logger
+
+try:
+    from prometheus_client import (
+        REGISTRY,
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        generate_latest,
+        multiprocess
+    )
+except ImportError:
+    logger.warning("prometheus_client未安装，/metrics 不可用，请运行: pip install prometheus-client")
+    Counter = Gauge = Histogram = None
+
+
+# 耗时类指标的分桶(秒)，覆盖单个音频块到数小时音频的整体解码
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+RTF_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class _NoopMetric:
+    """prometheus_client未安装时的空指标"""
+
+    def labels(self, *args: Any, **kwargs: Any) -> "_NoopMetric":
+        return self
+
+    def observe(self, value: float):
+        pass
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def dec(self, amount: float = 1):
+        pass
+
+
+def _histogram(name: str, documentation: str, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+    if Histogram is None:
+        return _NoopMetric()
+    return Histogram(name, documentation, buckets=buckets)
+
+
+def _counter(name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+    if Counter is None:
+        return _NoopMetric()
+    return Counter(name, documentation, labelnames)
+
+
+def _gauge(name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+    if Gauge is None:
+        return _NoopMetric()
+    # 多进程模式下只汇总存活进程的值
+    return Gauge(name, documentation, labelnames, multiprocess_mode="livesum")
+
+
+# 上传
+UPLOAD_SECONDS = _histogram("stt_upload_duration_seconds", "上传文件接收并写入磁盘的耗时")
+UPLOAD_BYTES = _counter("stt_upload_bytes_total", "接收的上传数据字节数")
+
+# 解码与切分
+DECODE_SECONDS = _histogram("stt_decode_seconds", "单个文件等待音频解码输出的累计耗时")
+VAD_SECONDS = _histogram("stt_vad_seconds", "每个切分窗口的VAD耗时")
+
+# 推理
+QUEUE_WAIT_SECONDS = _histogram("stt_inference_queue_wait_seconds", "推理任务在执行器中的排队时间")
+INFERENCE_SECONDS = _histogram("stt_inference_seconds", "单次模型推理调用（一批音频块）的执行耗时")
+CHUNK_SECONDS = _histogram("stt_chunk_inference_seconds", "单个音频块从提交到得到文本的耗时，含排队与组批")
+REAL_TIME_FACTOR = _histogram("stt_real_time_factor", "单个文件的转录耗时与音频时长之比", RTF_BUCKETS)
+
+# 响应
+SSE_BYTES = _histogram("stt_sse_response_bytes", "单个SSE流式响应发送的字节数", BYTES_BUCKETS)
+ACTIVE_STREAMS = _gauge("stt_active_streams", "进行中的转录数", ("kind",))
+ERRORS = _counter("stt_errors_total", "按阶段统计的错误数", ("stage",))
+
+
+def is_metrics_available() -> bool:
+    """prometheus_client是否可用"""
+    return Histogram is not None
+
+
+def render_metrics() -> Optional[Tuple[bytes, str]]:
+    """生成Prometheus文本格式的指标，返回 (内容, Content-Type)，不可用时返回None"""
+    if not is_metrics_available():
+        return None
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,173 @@
+"""转录结果缓存模块"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+
+CACHE_FORMAT_VERSION = 2  # 缓存内容格式版本，格式变化时递增使旧缓存失效
+
+
+class ResultCache:
+    """转录结果磁盘缓存
+
+    以（音频内容哈希、语言、关键词、模型版本等）为键保存逐块转录结果，
+    每个条目为缓存目录下的一个JSON文件。按最近使用顺序淘汰，总大小不超过上限。
+    多个工作进程共用缓存目录时，各进程的内存索引只包含自身写入或读取过的条目，
+    索引未命中时检查磁盘，读取其他进程写入的条目。
+    """
+
+    def __init__(self, cache_dir: str, max_size: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # 键 -> 文件大小，按最近使用排序
+        self._total_size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        self._load_index()
+
+    @staticmethod
+    def make_key(audio_hash: str, **params: Any) -> str:
+        """根据音频哈希与转录参数生成缓存键"""
+        payload = json.dumps(
+            {"audio_hash": audio_hash, "format": CACHE_FORMAT_VERSION, **params},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        """缓存条目文件路径"""
+        return self.cache_dir / f"{key}.json"
+
+    def _load_index(self):
+        """启动时按最后访问时间重建索引"""
+        try:
+            files = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name[:-len(".json")], stat.st_size))
+            for _, key, size in sorted(files):
+                self._entries[key] = size
+                self._total_size += size
+            logger.info(f"结果缓存索引加载完成: {len(self._entries)} 个条目, {self._total_size / (1024 * 1024):.1f}MB")
+            self._evict()
+        except Exception as e:
+            logger.error(f"加载结果缓存索引失败: {str(e)}")
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """读取缓存的逐块转录结果，未命中返回None"""
+        entry_path = self._entry_path(key)
+        with self._lock:
+            indexed = key in self._entries
+            if indexed:
+                self._entries.move_to_end(key)
+
+        if not indexed:
+            # 其他进程写入的条目不在本进程的索引中
+            try:
+                size = entry_path.stat().st_size
+            except OSError:
+                with self._lock:
+                    self._misses += 1
+                return None
+            with self._lock:
+                self._total_size += size - self._entries.get(key, 0)
+                self._entries[key] = size
+                self._entries.move_to_end(key)
+
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            # 更新访问时间，重启后仍保持最近使用顺序
+            os.utime(entry_path)
+        except FileNotFoundError:
+            # 已被其他进程淘汰
+            self._remove(key)
+            with self._lock:
+                self._misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"读取结果缓存失败: {key}, 错误: {str(e)}")
+            self._remove(key)
+            with self._lock:
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._hits += 1
+        if not indexed:
+            # 纳入索引后总大小可能超出上限
+            self._evict()
+        return records
+
+    def put(self, key: str, records: List[Dict[str, Any]]):
+        """写入逐块转录结果"""
+        entry_path = self._entry_path(key)
+        temp_path = entry_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            data = json.dumps(records, ensure_ascii=False).encode("utf-8")
+            if len(data) > self.max_size:
+                logger.debug(f"转录结果超过缓存容量，不缓存: {key}")
+                return
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, entry_path)
+        except Exception as e:
+            logger.warning(f"写入结果缓存失败: {key}, 错误: {str(e)}")
+            if temp_path.exists():
+                temp_path.unlink()
+            return
+
+        with self._lock:
+            self._total_size += len(data) - self._entries.get(key, 0)
+            self._entries[key] = len(data)
+            self._entries.move_to_end(key)
+        self._evict()
+
+    def _remove(self, key: str):
+        """删除单个缓存条目"""
+        with self._lock:
+            size = self._entries.pop(key, None)
+            if size is not None:
+                self._total_size -= size
+        try:
+            self._entry_path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """按最近最少使用顺序淘汰，直到总大小不超过上限"""
+        while True:
+            with self._lock:
+                if self._total_size <= self.max_size or not self._entries:
+                    return
+                key = next(iter(self._entries))
+                self._evictions += 1
+            self._remove(key)
+            logger.debug(f"淘汰结果缓存条目: {key}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "size": self._total_size,
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions
+            }
@@ -2,27 +2,225 @@
 
 import time
 import os
-from typing import Optional, Dict, Any, List
+import math
+import uuid
+import asyncio
+import bisect
+import tempfile
+import multiprocessing
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
 from pathlib import Path
 from loguru import logger
 
+from .inference_executor import InferenceExecutor
+from .batch_scheduler import BatchScheduler
+from .result_cache import ResultCache
+from .live_transcription import LiveTranscriptionSession
+from .asr_backend import ASRBackend, create_backend, get_backend_class
+from .inference_server import RemoteBackend
+from .metrics import DECODE_SECONDS, VAD_SECONDS, CHUNK_SECONDS, REAL_TIME_FACTOR, ERRORS
+from .audio_stream import (
+    decode_audio_stream,
+    decode_audio_bytes_stream,
+    read_pcm_stream,
+    is_ffmpeg_available,
+    probe_duration,
+    pcm_duration
+)
+
+import numpy as np
+
 try:
-    from funasr import AutoModel
-    from funasr.utils.postprocess_utils import rich_transcription_postprocess
+    import librosa
 except ImportError:
-    logger.warning("FunASR未安装，请运行: pip install funasr")
-    AutoModel = None
+    logger.warning("librosa未安装，ffmpeg不可用时无法加载音频，请运行: pip install librosa")
+    librosa = None
 
 try:
     import torch
-    import torchaudio
-    import librosa
-    import numpy as np
 except ImportError:
-    logger.warning("音频处理库未安装，请运行: pip install torch torchaudio librosa")
+    # ONNX Runtime后端无需PyTorch
     torch = None
 
 
+SAMPLE_RATE = 16000  # 模型输入采样率
+VAD_SEGMENT_PADDING = 0.2  # VAD语音段两侧保留的静音时长(秒)
+STREAM_WINDOW_CHUNKS = 4  # 流式切分时每个窗口包含的音频块数
+STREAM_CARRY_GAP = 1.0  # 音频块结束位置距窗口末尾小于该时长(秒)时保留到下一个窗口
+STREAM_MAX_BUFFER_WINDOWS = 3  # 切分缓冲区的最大窗口数，超过后不再保留未完成的音频块
+TIMING_FIELDS = ("start", "end", "segments", "words")  # 事件中的时间信息字段
+
+
+# 进程池模式下，每个工作进程持有一份独立的推理后端实例
+_worker_backend: Optional[ASRBackend] = None
+
+
+def _split_cores(groups: int) -> List[List[int]]:
+    """将当前进程可用的CPU核按连续区间平均分为若干组"""
+    cores = sorted(os.sched_getaffinity(0))
+    groups = max(1, min(groups, len(cores)))
+    size, extra = divmod(len(cores), groups)
+    result = []
+    start = 0
+    for i in range(groups):
+        end = start + size + (1 if i < extra else 0)
+        result.append(cores[start:end])
+        start = end
+    return result
+
+
+def _init_inference_worker(
+    backend_name: str,
+    backend_kwargs: Dict[str, Any],
+    core_groups: Optional[List[List[int]]] = None,
+    worker_counter: Any = None
+):
+    """推理工作进程初始化：在子进程中加载模型
+    
+    提供 core_groups 时，各工作进程按启动顺序绑定到其中一组CPU核，
+    未配置算子内线程数时使用该组的核数，避免多个进程的线程争抢同一批核。
+    """
+    global _worker_backend
+    cores = None
+    if core_groups and worker_counter is not None:
+        with worker_counter.get_lock():
+            index = worker_counter.value
+            worker_counter.value += 1
+        cores = core_groups[index % len(core_groups)]
+        os.sched_setaffinity(0, cores)
+        if not backend_kwargs.get("intra_op_threads"):
+            backend_kwargs = {**backend_kwargs, "intra_op_threads": len(cores)}
+    
+    _worker_backend = create_backend(backend_name, **backend_kwargs)
+    _worker_backend.load_model()
+    logger.info(
+        f"推理工作进程模型加载完成，PID: {os.getpid()}，精度: {_worker_backend.precision}"
+        + (f"，CPU核: {','.join(map(str, cores))}" if cores else "")
+    )
+
+
+def _ping_inference_worker() -> str:
+    """确认推理工作进程已就绪，返回其推理精度"""
+    return _worker_backend.precision if _worker_backend else "fp32"
+
+
+def _transcribe_in_worker(inputs: List[Any], language: str, keywords: Optional[str]) -> List[str]:
+    """在推理工作进程中执行模型推理"""
+    if _worker_backend is None:
+        raise Exception("工作进程模型未初始化")
+    return _worker_backend.transcribe(inputs, language, keywords)
+
+
+def _transcribe_with_timestamps_in_worker(
+    inputs: List[Any],
+    language: str,
+    keywords: Optional[str]
+) -> List[Dict[str, Any]]:
+    """在推理工作进程中执行模型推理并输出词级时间戳"""
+    if _worker_backend is None:
+        raise Exception("工作进程模型未初始化")
+    return _worker_backend.transcribe_with_timestamps(inputs, language, keywords)
+
+
+def _map_words(words: List[Dict[str, Any]], spans: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+    """将相对于音频块的词时间映射为整段音频中的时间
+    
+    音频块由若干语音段拼接而成（其间静音已丢弃），按词在拼接音频中的位置找到所在语音段。
+    """
+    # 各语音段在拼接音频中的起点(秒)
+    offsets = []
+    position = 0.0
+    for start, end in spans:
+        offsets.append(position)
+        position += (end - start) / SAMPLE_RATE
+    
+    def to_absolute(t: float, at_end: bool) -> float:
+        # 恰好落在两段交界处时，词终点归前一段，词起点归后一段
+        index = (bisect.bisect_left(offsets, t) if at_end else bisect.bisect_right(offsets, t)) - 1
+        start, end = spans[max(0, index)]
+        return min(start / SAMPLE_RATE + max(0.0, t - offsets[max(0, index)]), end / SAMPLE_RATE)
+    
+    return [
+        {
+            "word": word["word"],
+            "start": round(to_absolute(word["start"], False), 3),
+            "end": round(to_absolute(word["end"], True), 3)
+        }
+        for word in words
+    ]
+
+
+def _chunk_timing(spans: List[Tuple[int, int]], words: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """音频块在整段音频中的时间范围、语音段与词级时间戳(秒)"""
+    timing: Dict[str, Any] = {
+        "start": round(spans[0][0] / SAMPLE_RATE, 3),
+        "end": round(spans[-1][1] / SAMPLE_RATE, 3),
+        "segments": [
+            {"start": round(start / SAMPLE_RATE, 3), "end": round(end / SAMPLE_RATE, 3)}
+            for start, end in spans
+        ]
+    }
+    if words is not None:
+        timing["words"] = _map_words(words, spans)
+    return timing
+
+
+class _TranscriptBuilder:
+    """将逐块转录文本组装为流式事件，并维护累计文本"""
+    
+    def __init__(self, file_name: str, delta: bool = False):
+        self.file_name = file_name
+        self.delta = delta
+        self.start_time = time.time()
+        # 文本片段列表，避免逐块拼接字符串
+        self.text_parts: List[str] = []
+        self.text_length = 0
+    
+    def build(
+        self,
+        chunk_index: int,
+        chunk_text: str,
+        total_chunks: Optional[int],
+        progress: Optional[float],
+        is_final: bool,
+        timing: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """追加一块文本并生成对应的事件
+        
+        Args:
+            timing: 本块的时间信息（start、end、segments，以及可选的words），见 `_chunk_timing`
+        """
+        text_offset = self.text_length
+        self.text_parts.append(chunk_text)
+        self.text_length += len(chunk_text)
+        
+        result = {
+            "success": True,
+            "chunk_index": chunk_index,
+            "total_chunks": total_chunks,
+            "progress": progress,
+            "chunk_text": chunk_text,
+            "processing_time": time.time() - self.start_time,
+            "is_final": is_final,
+            "file_name": self.file_name,
+            "timestamp": int(time.time())
+        }
+        if timing:
+            result.update(timing)
+        
+        if self.delta:
+            # 增量模式：只携带本块文本在完整文本中的位置，完整文本仅随最后一个事件返回
+            result["text_offset"] = text_offset
+            result["text_length"] = self.text_length
+            if is_final:
+                result["accumulated_text"] = "".join(self.text_parts)
+        else:
+            result["accumulated_text"] = "".join(self.text_parts)
+        
+        return result
+
+
 class SenseVoiceClient:
     """SenseVoice本地模型语音识别客户端"""
     
@@ -32,24 +230,77 @@ class SenseVoiceClient:
         device: str = "auto",
         batch_size: int = 1,
         quantize: bool = True,
-        cache_dir: str = "./models"
+        cache_dir: str = "./models",
+        executor_type: str = "thread",
+        executor_workers: int = 1,
+        inmemory_input: bool = True,
+        batch_max_wait_ms: int = 20,
+        vad_segmentation: bool = True,
+        result_cache: Optional[ResultCache] = None,
+        lazy_load: bool = False,
+        backend: str = "funasr",
+        vad_model_dir: Optional[str] = None,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        inference_server: Optional[str] = None,
+        inference_authkey: Optional[bytes] = None,
+        parallel_chunks: int = 1,
+        cpu_affinity: bool = False
     ):
         self.model_dir = model_dir
-        self.device = self._get_device(device)
+        self.backend_name = backend
+        self.vad_model_dir = vad_model_dir
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        
+        backend_cls = get_backend_class(backend)
+        if backend_cls.cpu_only and device not in ("auto", "cpu"):
+            logger.warning(f"{backend} 推理后端仅支持CPU，忽略推理设备设置: {device}")
+        self.device = "cpu" if backend_cls.cpu_only else self._get_device(device)
         self.batch_size = batch_size
         self.quantize = quantize
         self.cache_dir = Path(cache_dir)
+        self.executor_type = executor_type
+        self.executor_workers = executor_workers
+        self.inmemory_input = inmemory_input
+        self._inmemory_verified = False  # 内存音频输入已成功推理过，之后的失败不再视为不支持数组输入
+        self.batch_max_wait_ms = batch_max_wait_ms
+        self.vad_segmentation = vad_segmentation
+        self.result_cache = result_cache
+        self.parallel_chunks = max(1, parallel_chunks)
+        self.cpu_affinity = cpu_affinity
         
-        if AutoModel is None:
-            raise ImportError("FunASR未安装，请运行: pip install funasr")
+        if inference_server:
+            # 多工作进程部署：推理转发到共享推理进程，本进程不加载模型
+            if self.executor_type == "process":
+                logger.warning("使用共享推理服务时推理执行器固定为线程池")
+            self.executor_type = "thread"
+            self.backend: ASRBackend = RemoteBackend(inference_server, inference_authkey or b"")
+        else:
+            # 推理后端：线程池模式下直接用于推理；进程池模式下主进程只用其加载VAD模型
+            self.backend = create_backend(backend, **self._build_backend_kwargs())
+        self.precision = "fp32"  # 实际推理精度，启用量化且成功时为int8
+        self._vad_load_lock = asyncio.Lock()
+        self.executor: Optional[InferenceExecutor] = None
+        self.batch_scheduler: Optional[BatchScheduler] = None
         
-        if torch is None:
-            raise ImportError("PyTorch未安装，请运行: pip install torch torchaudio")
+        # 加载状态：loading(加载中), warming_up(预热中), ready(就绪), failed(加载失败)
+        self.status = "loading"
+        self.load_error: Optional[str] = None
         
-        # 初始化模型
-        self.model = None
-        self.vad_model = None
-        self._init_models()
+        # 批大小大于1时启用跨请求动态批处理
+        if self.batch_size > 1:
+            self.batch_scheduler = BatchScheduler(
+                run_batch=self._run_scheduled_batch,
+                max_batch_size=self.batch_size,
+                max_wait_ms=self.batch_max_wait_ms,
+                max_concurrent_batches=self.executor_workers
+            )
+        
+        # 延迟加载时由调用方在后台调用 load()，避免阻塞服务启动
+        if not lazy_load:
+            self._init_models()
+            self.status = "ready"
     
     def _get_device(self, device: str) -> str:
         """获取推理设备"""
@@ -62,6 +313,22 @@ class SenseVoiceClient:
                 return "cpu"
         return device
     
+    def _build_backend_kwargs(self) -> Dict[str, Any]:
+        """构建推理后端初始化参数（进程池模式下需可序列化传入工作进程）"""
+        # 动态int8量化只适用于CPU推理
+        quantize = self.quantize and self.device == "cpu"
+        return {
+            "model_dir": self.model_dir,
+            "vad_model_dir": self.vad_model_dir,
+            "device": self.device,
+            "cache_dir": str(self.cache_dir),
+            "quantize": quantize,
+            # 启用VAD分段时由独立的VAD模型统一切分，识别模型无需再做一次VAD
+            "builtin_vad": not self.vad_segmentation,
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads
+        }
+    
     def _init_models(self):
         """初始化SenseVoice模型"""
         try:
@@ -73,28 +340,123 @@ class SenseVoiceClient:
             os.environ.setdefault("HF_HOME", str(self.cache_dir))
             os.environ.setdefault("TRANSFORMERS_CACHE", str(self.cache_dir))
             
-            # 初始化SenseVoice模型
-            model_name = self.model_dir or "iic/SenseVoiceSmall"
-            logger.info(f"正在加载SenseVoice模型: {model_name}")
+            logger.info(f"正在加载SenseVoice模型: {self.backend.model_dir}，推理后端: {self.backend.name}")
             
-            self.model = AutoModel(
-                model=model_name,
-                trust_remote_code=True,
-                vad_model="fsmn-vad",
-                vad_kwargs={"max_single_segment_time": 30000},
-                device=self.device,
-                disable_update=True,  # 禁用自动更新检查
-                cache_dir=str(self.cache_dir)  # 明确指定缓存目录
-            )
+            if self.quantize and self.device != "cpu":
+                logger.info(f"int8量化仅支持CPU推理，当前设备 {self.device} 使用fp32")
             
-            logger.info(f"SenseVoice模型加载成功，设备: {self.device}")
+            if self.executor_type == "process":
+                # 进程池模式：由各工作进程分别加载（并量化）模型，主进程不持有模型
+                initargs: Tuple[Any, ...] = (self.backend_name, self._build_backend_kwargs())
+                if self.cpu_affinity and hasattr(os, "sched_setaffinity"):
+                    # 计数器用于为各工作进程分配不同的CPU核组
+                    initargs += (
+                        _split_cores(self.executor_workers),
+                        multiprocessing.get_context("spawn").Value("i", 0)
+                    )
+                elif self.cpu_affinity:
+                    logger.warning("当前系统不支持设置CPU亲和性，忽略 cpu_affinity")
+                self.executor = InferenceExecutor(
+                    mode="process",
+                    max_workers=self.executor_workers,
+                    initializer=_init_inference_worker,
+                    initargs=initargs
+                )
+                self.precision = self.executor.prestart(_ping_inference_worker)[0]
+            else:
+                self.backend.load_model()
+                self.precision = self.backend.precision
+                self.device = self.backend.device
+                self.executor = InferenceExecutor(
+                    mode=self.executor_type,
+                    max_workers=self.executor_workers
+                )
+            
+            if self.vad_segmentation:
+                logger.info("正在加载VAD模型")
+                self.backend.load_vad_model()
+            
+            logger.info(
+                f"SenseVoice模型加载成功，推理后端: {self.backend.name}，设备: {self.device}，"
+                f"精度: {self.precision}，推理执行器: {self.executor_type}"
+            )
             
         except Exception as e:
             logger.error(f"SenseVoice模型初始化失败: {str(e)}")
             raise
     
+    async def load(self, warmup_runs: int = 0, warmup_duration: float = 5.0):
+        """在后台线程中加载模型并预热，期间服务可正常响应健康检查
+        
+        Args:
+            warmup_runs: 预热推理次数，0表示不预热
+            warmup_duration: 预热音频时长(秒)
+        """
+        try:
+            start_time = time.time()
+            await asyncio.to_thread(self._init_models)
+            logger.info(f"模型加载耗时: {time.time() - start_time:.2f}秒")
+            
+            # 共享推理进程已在启动时完成预热
+            if warmup_runs > 0 and not self.backend.remote:
+                self.status = "warming_up"
+                await self.warmup(warmup_runs, warmup_duration)
+            
+            self.status = "ready"
+        except Exception as e:
+            self.status = "failed"
+            self.load_error = str(e)
+            logger.error(f"SenseVoice模型加载失败: {str(e)}")
+            raise
+    
+    async def warmup(self, runs: int = 1, duration: float = 5.0):
+        """使用合成音频执行预热推理
+        
+        首次推理需要完成算子初始化、内存分配等一次性开销，预热后用户请求即为稳定延迟。
+        每轮为每个推理工作者各提交一次推理，进程池模式下各进程都会被预热。
+        """
+        start_time = time.time()
+        samples = int(duration * SAMPLE_RATE)
+        t = np.arange(samples, dtype=np.float32) / SAMPLE_RATE
+        # 带噪声的调幅正弦波，避免被VAD判为静音
+        rng = np.random.default_rng(0)
+        clip = (0.3 * np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 2 * t))
+                + 0.01 * rng.standard_normal(samples)).astype(np.float32)
+        
+        if self.backend.vad_model is not None:
+            await asyncio.to_thread(self._vad_segments, clip)
+        
+        chunk = self._preprocess_audio(clip)
+        for i in range(runs):
+            await asyncio.gather(*(
+                self._transcribe_batch([chunk], "auto")
+                for _ in range(self.executor.max_workers)
+            ))
+            logger.debug(f"预热推理 {i + 1}/{runs} 完成")
+        
+        logger.info(f"模型预热完成，{runs} 轮，耗时: {time.time() - start_time:.2f}秒")
+    
+    async def _infer(
+        self,
+        inputs: List[Any],
+        target_lang: str,
+        keywords: Optional[str] = None,
+        word_timestamps: bool = False
+    ) -> List[Any]:
+        """在推理执行器中执行模型推理，不阻塞事件循环
+        
+        输出词级时间戳时每项结果为 {"text", "words"}，否则为文本。
+        """
+        if self.executor.mode == "process":
+            fn = _transcribe_with_timestamps_in_worker if word_timestamps else _transcribe_in_worker
+        else:
+            fn = self.backend.transcribe_with_timestamps if word_timestamps else self.backend.transcribe
+        return await self.executor.run(fn, inputs, target_lang, keywords)
+    
     def _load_audio(self, audio_path: Path) -> np.ndarray:
         """加载音频文件"""
+        if librosa is None:
+            raise ImportError("librosa未安装，请运行: pip install librosa")
         try:
             # 使用librosa加载音频，自动转换为16kHz单声道
             audio, sr = librosa.load(str(audio_path), sr=16000, mono=True)
@@ -120,134 +482,639 @@ class SenseVoiceClient:
             logger.error(f"音频预处理失败: {str(e)}")
             raise
     
+    def _vad_segments(self, audio: np.ndarray) -> List[Tuple[int, int]]:
+        """对整段音频执行一次VAD，返回语音段的采样点区间"""
+        samples_per_ms = SAMPLE_RATE // 1000
+        segments = []
+        for start_ms, end_ms in self.backend.vad_segments(audio):
+            start = max(0, int(start_ms) * samples_per_ms)
+            end = min(len(audio), int(end_ms) * samples_per_ms)
+            if end > start:
+                segments.append((start, end))
+        return segments
+    
+    def stream_vad(
+        self,
+        pieces: List[np.ndarray],
+        cache: Dict[str, Any],
+        is_final: bool,
+        chunk_ms: int
+    ) -> List[Tuple[int, int]]:
+        """流式VAD：依次送入连续的音频片段，返回检测到的语音起止点(毫秒)
+        
+        未检测到的端点为-1，例如 (1200, -1) 表示语音开始、尚未结束。
+        同一路音频的各次调用需传入同一个cache。
+        """
+        points = []
+        for i, piece in enumerate(pieces):
+            points.extend(self.backend.stream_vad(piece, cache, is_final and i == len(pieces) - 1, chunk_ms))
+        return points
+    
+    async def _ensure_vad_model(self):
+        """实时转录需要VAD模型，未启用VAD分段时在首次使用时加载"""
+        if self.backend.vad_model is not None:
+            return
+        async with self._vad_load_lock:
+            if self.backend.vad_model is None:
+                try:
+                    logger.info("正在加载VAD模型")
+                    await asyncio.to_thread(self.backend.load_vad_model)
+                except Exception as e:
+                    logger.warning(f"VAD模型加载失败，实时转录将按最大语音段时长切分: {str(e)}")
+    
+    async def create_live_session(
+        self,
+        language: str = "auto",
+        keywords: Optional[str] = None,
+        partial_interval: float = 0.6,
+        max_segment_duration: float = 15.0
+    ) -> LiveTranscriptionSession:
+        """创建实时转录会话
+        
+        Args:
+            language: 语言代码
+            keywords: 关键词，用逗号分隔
+            partial_interval: 语音进行中输出临时结果的间隔(秒)
+            max_segment_duration: 单个语音段最大时长(秒)，超过时强制输出最终结果
+        """
+        await self._ensure_vad_model()
+        return LiveTranscriptionSession(
+            client=self,
+            target_lang=self._map_language(language),
+            keywords=keywords,
+            partial_interval=partial_interval,
+            max_segment_duration=max_segment_duration
+        )
+    
+    def _pack_segments(
+        self,
+        segments: List[Tuple[int, int]],
+        audio_length: int,
+        max_samples: int
+    ) -> List[List[Tuple[int, int]]]:
+        """将语音段打包为接近目标时长的音频块
+        
+        每个语音段两侧保留少量静音以免截断字词，超过目标时长的语音段会被切开，
+        相邻语音段按顺序合并，直到语音总时长达到目标时长。
+        """
+        padding = int(VAD_SEGMENT_PADDING * SAMPLE_RATE)
+        
+        # 两侧补齐后合并重叠的语音段
+        padded: List[Tuple[int, int]] = []
+        for start, end in segments:
+            start, end = max(0, start - padding), min(audio_length, end + padding)
+            if padded and start <= padded[-1][1]:
+                padded[-1] = (padded[-1][0], max(padded[-1][1], end))
+            else:
+                padded.append((start, end))
+        
+        groups: List[List[Tuple[int, int]]] = []
+        current: List[Tuple[int, int]] = []
+        current_length = 0
+        for start, end in padded:
+            # 超长语音段按目标时长切开
+            while end - start > 0:
+                piece_end = min(end, start + max_samples - current_length)
+                current.append((start, piece_end))
+                current_length += piece_end - start
+                start = piece_end
+                if current_length >= max_samples:
+                    groups.append(current)
+                    current, current_length = [], 0
+        if current:
+            groups.append(current)
+        return groups
+    
+    def _segment_window(self, audio: np.ndarray, max_samples: int) -> List[List[Tuple[int, int]]]:
+        """切分一段音频窗口，返回各音频块对应的采样点区间列表"""
+        if not self.vad_segmentation:
+            # 未启用VAD：按固定时长切分
+            return [
+                [(start, min(start + max_samples, len(audio)))]
+                for start in range(0, len(audio), max_samples)
+            ]
+        started = time.perf_counter()
+        segments = self._vad_segments(audio)
+        VAD_SECONDS.observe(time.perf_counter() - started)
+        return self._pack_segments(segments, len(audio), max_samples)
+    
+    def _assemble_chunk(self, audio: np.ndarray, group: List[Tuple[int, int]]) -> np.ndarray:
+        """按采样点区间取出音频块数据"""
+        if len(group) == 1:
+            return audio[group[0][0]:group[0][1]]
+        # 拼接语音段，丢弃其间的静音
+        return np.concatenate([audio[start:end] for start, end in group])
+    
+    async def _stream_chunks(
+        self,
+        frames: AsyncIterator[np.ndarray],
+        chunk_duration: float,
+        stats: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Tuple[np.ndarray, List[Tuple[int, int]]]]:
+        """将流式解码的音频帧切分为待转录的音频块
+        
+        音频帧累积满一个窗口后进行切分（启用VAD时丢弃静音段）；窗口末尾
+        仍在延续的音频块保留到下一个窗口继续切分，避免截断跨窗口的语音。
+        
+        Args:
+            stats: 不为空时写入已解码的音频总采样点数 `total_samples`
+        
+        Yields:
+            (预处理后的音频块数据, 音频块在整段音频中对应的采样点区间列表)
+        """
+        max_samples = max(1, int(chunk_duration * SAMPLE_RATE))
+        window_samples = max_samples * STREAM_WINDOW_CHUNKS
+        carry_gap = int(STREAM_CARRY_GAP * SAMPLE_RATE)
+        
+        buffer = np.zeros(0, dtype=np.float32)
+        buffer_offset = 0  # buffer[0]在整段音频中的采样点位置
+        total_samples = 0
+        speech_samples = 0
+        decode_time = 0.0  # 等待解码输出的累计耗时
+        frame_iter = frames.__aiter__()
+        eof = False
+        
+        try:
+            while not eof:
+                # 在保留的音频之后再累积一个窗口的新音频
+                parts = [buffer]
+                target = len(buffer) + window_samples
+                received = len(buffer)
+                while received < target:
+                    started = time.perf_counter()
+                    frame = await anext(frame_iter, None)
+                    decode_time += time.perf_counter() - started
+                    if frame is None:
+                        eof = True
+                        break
+                    parts.append(frame)
+                    received += len(frame)
+                    total_samples += len(frame)
+                    if stats is not None:
+                        stats["total_samples"] = total_samples
+                buffer = np.concatenate(parts) if len(parts) > 1 else buffer
+                if len(buffer) == 0:
+                    break
+                
+                groups = await asyncio.to_thread(self._segment_window, buffer, max_samples)
+                
+                # 最后一个音频块紧贴窗口末尾时可能尚未完整，保留到下一个窗口
+                carry_from = len(buffer)
+                if (
+                    not eof
+                    and groups
+                    and len(buffer) - groups[-1][-1][1] <= carry_gap
+                    and len(buffer) <= window_samples * STREAM_MAX_BUFFER_WINDOWS
+                ):
+                    carry_from = groups[-1][0][0]
+                    groups = groups[:-1]
+                
+                for group in groups:
+                    speech_samples += sum(end - start for start, end in group)
+                    audio_chunk = self._preprocess_audio(self._assemble_chunk(buffer, group))
+                    yield audio_chunk, [(start + buffer_offset, end + buffer_offset) for start, end in group]
+                
+                buffer = buffer[carry_from:]
+                buffer_offset += carry_from
+        finally:
+            # 提前结束时关闭解码器（终止ffmpeg进程）
+            if hasattr(frame_iter, "aclose"):
+                await frame_iter.aclose()
+        
+        DECODE_SECONDS.observe(decode_time)
+        logger.info(
+            f"音频切分完成: 总时长 {total_samples / SAMPLE_RATE:.1f}秒，"
+            f"送入识别 {speech_samples / SAMPLE_RATE:.1f}秒 ({speech_samples / max(1, total_samples):.1%})"
+        )
+    
+    def _check_texts(self, texts: List[Any], expected: int) -> List[Any]:
+        """校验推理结果数量与输入一致"""
+        if not texts:
+            return [None] * expected
+        if len(texts) != expected:
+            raise Exception(f"推理结果数量不匹配: 输入 {expected}，输出 {len(texts)}")
+        return list(texts)
+    
+    async def _transcribe_batch(
+        self,
+        audio_chunks: List[np.ndarray],
+        target_lang: str,
+        keywords: Optional[str] = None,
+        word_timestamps: bool = False
+    ) -> List[Any]:
+        """在一次模型调用中转录一批音频块
+        
+        优先将内存中的音频数组直接送入模型；推理失败时本批回退为写入临时WAV文件后再推理。
+        只有在内存输入从未成功过、且错误为参数类型错误（TypeError/ValueError）时，
+        才认为模型不接受数组输入并切换为临时文件模式，偶发的推理失败不影响后续请求。
+        """
+        unsupported = False
+        if self.inmemory_input:
+            try:
+                texts = await self._infer(list(audio_chunks), target_lang, keywords, word_timestamps)
+                self._inmemory_verified = True
+                return self._check_texts(texts, len(audio_chunks))
+            except Exception as e:
+                unsupported = not self._inmemory_verified and isinstance(e, (TypeError, ValueError))
+                logger.warning(f"内存音频输入推理失败，本批使用临时文件: {str(e)}")
+        
+        temp_paths: List[Path] = []
+        try:
+            import soundfile as sf
+            for audio_chunk in audio_chunks:
+                temp_chunk_path = Path(tempfile.gettempdir()) / f"temp_chunk_{uuid.uuid4().hex}.wav"
+                temp_paths.append(temp_chunk_path)
+                await asyncio.to_thread(sf.write, str(temp_chunk_path), audio_chunk, 16000)
+            texts = await self._infer([str(path) for path in temp_paths], target_lang, keywords, word_timestamps)
+        finally:
+            # 清理临时文件
+            for temp_chunk_path in temp_paths:
+                if temp_chunk_path.exists():
+                    temp_chunk_path.unlink()
+        
+        if unsupported:
+            # 临时文件可用而内存输入不被接受，后续直接使用临时文件模式
+            logger.warning("模型不支持内存音频输入，已切换为临时文件模式")
+            self.inmemory_input = False
+        
+        return self._check_texts(texts, len(audio_chunks))
+    
+    async def _run_scheduled_batch(self, group_key: Tuple[str, str, bool], audio_chunks: List[np.ndarray]) -> List[Any]:
+        """批处理调度器回调：同一分组的音频块合并推理"""
+        target_lang, keywords, word_timestamps = group_key
+        return await self._transcribe_batch(audio_chunks, target_lang, keywords or None, word_timestamps)
+    
+    async def _transcribe_chunk(
+        self,
+        audio_chunk: np.ndarray,
+        target_lang: str,
+        keywords: Optional[str] = None,
+        word_timestamps: bool = False
+    ) -> Any:
+        """转录单个音频块，启用批处理时与其他请求的音频块合并推理
+        
+        输出词级时间戳时返回 {"text", "words"}（词时间相对于音频块起点），否则返回文本。
+        """
+        started = time.perf_counter()
+        if self.batch_scheduler is not None:
+            group_key = (target_lang, (keywords or "").strip(), word_timestamps)
+            text = await self.batch_scheduler.submit(audio_chunk, group_key)
+        else:
+            text = (await self._transcribe_batch([audio_chunk], target_lang, keywords, word_timestamps))[0]
+        CHUNK_SECONDS.observe(time.perf_counter() - started)
+        return text
+    
+    def _map_language(self, language: str) -> str:
+        """将请求语言代码映射为模型语言参数"""
+        lang_map = {
+            "auto": "auto",
+            "zh": "zh",
+            "zh-CN": "zh",
+            "en": "en", 
+            "ja": "ja",
+            "ko": "ko",
+            "yue": "yue"
+        }
+        return lang_map.get(language, "auto")
+    
+    async def _iter_audio_frames(self, file_path: Path, pcm_path: Optional[Path] = None) -> AsyncIterator[np.ndarray]:
+        """读取音频帧：优先读取预解码PCM文件，其次通过ffmpeg管道流式解码，均不可用时整体加载"""
+        if pcm_path is not None:
+            async for frame in read_pcm_stream(pcm_path):
+                yield frame
+        elif is_ffmpeg_available():
+            async for frame in decode_audio_stream(file_path):
+                yield frame
+        else:
+            logger.warning("ffmpeg不可用，回退为整体加载音频文件")
+            yield await asyncio.to_thread(self._load_audio, file_path)
+    
     async def transcribe_audio_stream(
         self,
         file_path: Path,
         keywords: Optional[str] = None,
         language: str = "auto",
-        chunk_duration: float = 30.0
+        chunk_duration: float = 30.0,
+        delta: bool = False,
+        audio_hash: Optional[str] = None,
+        pcm_path: Optional[Path] = None,
+        word_timestamps: bool = False
     ):
         """流式转录音频文件
         
+        提供音频内容哈希且启用结果缓存时，命中缓存直接回放已有结果，
+        未命中则在转录成功完成后写入缓存。
+        
+        每个事件携带本块在整段音频中的起止时间 `start`/`end` 与语音段 `segments`（秒）；
+        启用词级时间戳时另含 `words`，与识别在同一次推理中得出。
+        
         Args:
             file_path: 音频文件路径
             keywords: 关键词，用逗号分隔，用于提高特定词汇的识别准确率
             language: 语言代码 (auto, zh, en, ja, ko等)
             chunk_duration: 每个音频块的时长（秒）
+            delta: 增量模式，事件只携带本块文本及其偏移，完整文本仅在最后一个事件中返回
+            audio_hash: 音频内容哈希，用于结果缓存
+            pcm_path: 上传时预解码的PCM文件路径，提供时跳过解码
+            word_timestamps: 是否输出词级时间戳
+            
+        Yields:
+            转录结果字典
+        """
+        cache_key = None
+        if self.result_cache is not None and audio_hash:
+            cache_key = self.result_cache.make_key(
+                audio_hash,
+                language=self._map_language(language),
+                keywords=(keywords or "").strip(),
+                chunk_duration=chunk_duration,
+                word_timestamps=word_timestamps,
+                model=self.model_version
+            )
+            records = await asyncio.to_thread(self.result_cache.get, cache_key)
+            if records is not None:
+                logger.info(f"命中转录结果缓存: {file_path.name}")
+                for result in self._replay_records(records, file_path.name, delta):
+                    yield result
+                return
+        
+        logger.info(f"开始流式转录音频文件: {file_path.name}")
+        if pcm_path is not None:
+            total_duration = pcm_duration(pcm_path)
+        elif is_ffmpeg_available():
+            total_duration = await probe_duration(file_path)
+        else:
+            total_duration = None
+        
+        records: Optional[List[Dict[str, Any]]] = [] if cache_key else None
+        completed = False
+        async for result in self._transcribe_frames(
+            frames=self._iter_audio_frames(file_path, pcm_path),
+            file_name=file_path.name,
+            keywords=keywords,
+            language=language,
+            chunk_duration=chunk_duration,
+            total_duration=total_duration,
+            delta=delta,
+            records=records,
+            word_timestamps=word_timestamps
+        ):
+            completed = result.get("success", False) and result.get("is_final", False)
+            yield result
+        
+        # 只缓存完整成功的转录结果
+        if cache_key and completed:
+            await asyncio.to_thread(self.result_cache.put, cache_key, records)
+    
+    async def transcribe_byte_stream(
+        self,
+        byte_stream: AsyncIterator[bytes],
+        file_name: str,
+        keywords: Optional[str] = None,
+        language: str = "auto",
+        chunk_duration: float = 30.0,
+        delta: bool = False,
+        word_timestamps: bool = False
+    ):
+        """流式转录正在接收的音频数据
+        
+        上传数据边接收边经ffmpeg解码，音频足够组成一个音频块时即开始推理，
+        无需等待上传完成。音频总时长未知，中间事件的 `progress` 为空。
+        
+        Args:
+            byte_stream: 音频字节流
+            file_name: 文件名
+            keywords: 关键词，用逗号分隔
+            language: 语言代码
+            chunk_duration: 每个音频块的时长（秒）
+            delta: 增量模式，见 `transcribe_audio_stream`
+            word_timestamps: 是否输出词级时间戳
             
+        Yields:
+            转录结果字典
+        """
+        logger.info(f"开始边上传边转录: {file_name}")
+        async for result in self._transcribe_frames(
+            frames=decode_audio_bytes_stream(byte_stream),
+            file_name=file_name,
+            keywords=keywords,
+            language=language,
+            chunk_duration=chunk_duration,
+            delta=delta,
+            word_timestamps=word_timestamps
+        ):
+            yield result
+    
+    async def _transcribe_frames(
+        self,
+        frames: AsyncIterator[np.ndarray],
+        file_name: str,
+        keywords: Optional[str] = None,
+        language: str = "auto",
+        chunk_duration: float = 30.0,
+        total_duration: Optional[float] = None,
+        delta: bool = False,
+        records: Optional[List[Dict[str, Any]]] = None,
+        word_timestamps: bool = False
+    ):
+        """流式转录音频帧序列
+        
+        解码、切分与推理流水线执行：当前音频块推理的同时读取并切分下一块。
+        音频总时长已知时 `total_chunks` 为估算值，最后一个事件中为实际块数。
+        
         Yields:
             转录结果字典
         """
         try:
-            if self.model is None:
+            if not self.is_model_ready():
                 raise Exception("模型未初始化")
             
-            # 加载和预处理音频
-            logger.info(f"开始流式转录音频文件: {file_path.name}")
-            audio = self._load_audio(file_path)
-            audio = self._preprocess_audio(audio)
+            target_lang = self._map_language(language)
+            total_samples = int(total_duration * SAMPLE_RATE) if total_duration else None
+            estimated_chunks = math.ceil(total_duration / chunk_duration) if total_duration else None
             
-            # 设置语言参数
-            lang_map = {
-                "auto": "auto",
-                "zh": "zh",
-                "zh-CN": "zh",
-                "en": "en", 
-                "ja": "ja",
-                "ko": "ko",
-                "yue": "yue"
-            }
-            target_lang = lang_map.get(language, "auto")
-            
-            # 计算音频块大小
-            sample_rate = 16000
-            chunk_size = int(chunk_duration * sample_rate)
-            total_chunks = (len(audio) + chunk_size - 1) // chunk_size
-            
-            start_time = time.time()
-            accumulated_text = ""
-            
-            # 分块处理音频
-            for i in range(total_chunks):
-                chunk_start = i * chunk_size
-                chunk_end = min((i + 1) * chunk_size, len(audio))
-                audio_chunk = audio[chunk_start:chunk_end]
-                
-                # 保存临时音频块
-                temp_chunk_path = file_path.parent / f"temp_chunk_{i}_{file_path.name}"
-                try:
-                    import soundfile as sf
-                    sf.write(str(temp_chunk_path), audio_chunk, sample_rate)
-                    
-                    # 转录当前块
-                    generate_kwargs = {
-                        "input": [str(temp_chunk_path)],
-                        "language": target_lang,
-                        "use_itn": True,
-                        "batch_size": 1,
-                        "batch_size_s": 100,      # 每批处理100秒
-                        "signal_type": "linear",   # 线性信号
-                        "mode": "offline"          # 离线模式
-                    }
-                    
-                    # 添加关键词支持
-                    if keywords and keywords.strip():
-                        generate_kwargs["hotword"] = keywords.strip()
-                    
-                    chunk_results = self.model.generate(**generate_kwargs)
-                    
-                    if chunk_results and len(chunk_results) > 0:
-                        chunk_text = chunk_results[0].get("text", "")
-                        # 使用后处理函数去除标签
-                        chunk_text = rich_transcription_postprocess(chunk_text)
-                        accumulated_text += chunk_text
-                        
-                        # 计算进度
-                        progress = (i + 1) / total_chunks
-                        processing_time = time.time() - start_time
-                        
-                        yield {
-                            "success": True,
-                            "chunk_index": i,
-                            "total_chunks": total_chunks,
-                            "progress": progress,
-                            "chunk_text": chunk_text,
-                            "accumulated_text": accumulated_text,
-                            "processing_time": processing_time,
-                            "is_final": i == total_chunks - 1,
-                            "file_name": file_path.name,
-                            "timestamp": int(time.time())
-                        }
-                        
-                finally:
-                    # 清理临时文件
-                    if temp_chunk_path.exists():
-                        temp_chunk_path.unlink()
-            
-            total_processing_time = time.time() - start_time
-            logger.info(f"流式转录完成，总耗时: {total_processing_time:.2f}秒，文本长度: {len(accumulated_text)}")
+            stats: Dict[str, Any] = {}
+            builder = _TranscriptBuilder(file_name, delta)
+            chunk_iter = self._stream_chunks(frames, chunk_duration, stats)
+            try:
+                async for result in self._transcribe_chunks(
+                    chunk_iter,
+                    builder,
+                    target_lang,
+                    keywords,
+                    total_samples,
+                    estimated_chunks,
+                    records,
+                    word_timestamps
+                ):
+                    yield result
+            finally:
+                await chunk_iter.aclose()
             
+            # 实时率：转录耗时与音频时长之比
+            audio_duration = stats.get("total_samples", 0) / SAMPLE_RATE
+            if audio_duration > 0:
+                REAL_TIME_FACTOR.observe((time.time() - builder.start_time) / audio_duration)
+        
         except Exception as e:
             error_msg = f"流式转录过程中发生错误: {str(e)}"
-            logger.error(f"流式音频转录失败: {file_path.name}, 错误: {error_msg}")
+            logger.error(f"流式音频转录失败: {file_name}, 错误: {error_msg}")
+            ERRORS.labels(stage="transcribe").inc()
             yield {
                 "success": False,
                 "error": error_msg,
-                "file_name": file_path.name,
+                "file_name": file_name,
                 "timestamp": int(time.time())
             }
-
-
+    
+    async def _transcribe_chunks(
+        self,
+        chunk_iter: AsyncIterator[Tuple[np.ndarray, List[Tuple[int, int]]]],
+        builder: _TranscriptBuilder,
+        target_lang: str,
+        keywords: Optional[str],
+        total_samples: Optional[int],
+        estimated_chunks: Optional[int],
+        records: Optional[List[Dict[str, Any]]] = None,
+        word_timestamps: bool = False
+    ):
+        """逐块推理并生成转录事件
+        
+        最多 `parallel_chunks` 个音频块同时推理（进程池模式下分发到不同的推理进程），
+        事件始终按块顺序产出。
+        
+        Args:
+            records: 不为空时追加每块的转录记录，用于写入结果缓存
+            word_timestamps: 是否输出词级时间戳
+        """
+        chunk_count = 0
+        # 同时推理的音频块：(块序号, 采样点区间, 推理任务)，结果按块顺序产出
+        pending: deque = deque()
+        lookahead = None  # 已切分、尚未提交推理的下一块
+        exhausted = False
+        
+        try:
+            while True:
+                while not exhausted and len(pending) < self.parallel_chunks:
+                    item = lookahead or await anext(chunk_iter, None)
+                    lookahead = None
+                    if item is None:
+                        exhausted = True
+                        break
+                    audio_chunk, spans = item
+                    task = asyncio.create_task(
+                        self._transcribe_chunk(audio_chunk, target_lang, keywords, word_timestamps)
+                    )
+                    pending.append((chunk_count, spans, task))
+                    chunk_count += 1
+                
+                if not pending:
+                    break
+                
+                i, spans, text_task = pending.popleft()
+                try:
+                    if not pending and not exhausted:
+                        # 转录当前块的同时预读下一块，以便判断当前块是否为最后一块
+                        lookahead = await anext(chunk_iter, None)
+                        exhausted = lookahead is None
+                    output = await text_task
+                finally:
+                    if not text_task.done():
+                        text_task.cancel()
+                
+                is_final = exhausted and not pending
+                
+                if output is None:
+                    if not is_final:
+                        continue
+                    # 最后一块推理无结果时仍需发送结束事件，与未检测到语音的情况一致
+                    output = {"text": "", "words": []} if word_timestamps else ""
+                
+                if word_timestamps:
+                    chunk_text = output["text"]
+                    timing = _chunk_timing(spans, output["words"])
+                else:
+                    chunk_text = output
+                    timing = _chunk_timing(spans)
+                
+                # 计算进度
+                if is_final:
+                    progress = 1.0
+                elif total_samples:
+                    progress = min(1.0, spans[-1][1] / total_samples)
+                else:
+                    progress = None
+                
+                if records is not None:
+                    records.append({"chunk_index": i, "chunk_text": chunk_text, **timing})
+                
+                yield builder.build(
+                    chunk_index=i,
+                    chunk_text=chunk_text,
+                    total_chunks=chunk_count if is_final else max(estimated_chunks or 0, chunk_count),
+                    progress=progress,
+                    is_final=is_final,
+                    timing=timing
+                )
+        finally:
+            for _, _, task in pending:
+                if not task.done():
+                    task.cancel()
+        
+        if chunk_count == 0:
+            # 未检测到语音，直接返回空结果
+            logger.info(f"未检测到语音: {builder.file_name}")
+            yield builder.build(chunk_index=0, chunk_text="", total_chunks=0, progress=1.0, is_final=True)
+        
+        total_processing_time = time.time() - builder.start_time
+        logger.info(f"流式转录完成，总耗时: {total_processing_time:.2f}秒，文本长度: {builder.text_length}")
+    
+    def _replay_records(self, records: List[Dict[str, Any]], file_name: str, delta: bool = False):
+        """按流式事件格式回放缓存的逐块转录结果"""
+        builder = _TranscriptBuilder(file_name, delta)
+        if not records:
+            result = builder.build(chunk_index=0, chunk_text="", total_chunks=0, progress=1.0, is_final=True)
+            result["cached"] = True
+            yield result
+            return
+        
+        total_chunks = records[-1]["chunk_index"] + 1
+        for n, record in enumerate(records):
+            result = builder.build(
+                chunk_index=record["chunk_index"],
+                chunk_text=record["chunk_text"],
+                total_chunks=total_chunks,
+                progress=(n + 1) / len(records),
+                is_final=n == len(records) - 1,
+                timing={key: record[key] for key in TIMING_FIELDS if key in record}
+            )
+            result["cached"] = True
+            yield result
+    
+    @property
+    def model_version(self) -> str:
+        """影响转录结果的模型配置标识，用于结果缓存键"""
+        return (
+            f"{self.backend.model_dir}|{self.backend.name}|"
+            f"vad={int(self.vad_segmentation)}|{self.precision}"
+        )
+    
     def get_model_info(self) -> Dict[str, Any]:
         """获取模型信息"""
         try:
             return {
                 "success": True,
                 "model_name": "SenseVoiceSmall",
+                "backend": self.backend.get_info(),
                 "device": self.device,
                 "batch_size": self.batch_size,
                 "quantize": self.quantize,
-                "status": "ready" if self.model is not None else "not_initialized"
+                "precision": self.precision,
+                "inmemory_input": self.inmemory_input,
+                "vad_segmentation": self.vad_segmentation,
+                "status": self.status,
+                "executor": self.executor.get_stats() if self.executor else {},
+                "batching": self.batch_scheduler.get_stats() if self.batch_scheduler else {}
             }
         except Exception as e:
             logger.error(f"获取模型信息失败: {str(e)}")
@@ -257,8 +1124,17 @@ class SenseVoiceClient:
             }
     
     def is_model_ready(self) -> bool:
-        """检查模型是否已准备就绪"""
-        return self.model is not None
+        """检查模型是否已加载并完成预热"""
+        if self.status != "ready" or self.executor is None:
+            return False
+        return self.executor.mode == "process" or self.backend.model is not None
+    
+    def close(self):
+        """释放推理资源"""
+        if self.batch_scheduler:
+            self.batch_scheduler.close()
+        if self.executor:
+            self.executor.shutdown()
     
     def get_supported_languages(self) -> List[str]:
         """获取支持的语言列表"""
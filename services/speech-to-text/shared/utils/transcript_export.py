@@ -0,0 +1,163 @@
+"""转录结果导出模块
+
+将转录任务保存的逐块结果（文本与时间信息）导出为纯文本、SRT/WebVTT字幕或JSON文档。
+导出函数逐段生成内容，可直接作为流式响应体返回，无需写入临时文件。
+"""
+
+import re
+import json
+import hashlib
+from typing import Any, Dict, Iterator, List, Optional
+
+
+EXPORT_FORMAT_VERSION = 1  # 导出内容格式版本，格式变化时递增使客户端缓存失效
+
+# 导出格式及其响应类型
+EXPORT_FORMATS = {
+    "txt": "text/plain; charset=utf-8",
+    "srt": "application/x-subrip; charset=utf-8",
+    "vtt": "text/vtt; charset=utf-8",
+    "json": "application/json"
+}
+SUBTITLE_FORMATS = ("srt", "vtt")  # 需要时间信息的导出格式
+
+MAX_CUE_SECONDS = 7.0  # 单条字幕的最长时长(秒)
+MAX_CUE_CHARS = 32  # 单条字幕的最多字符数
+SENTENCE_END = "。！？；!?;…"  # 字幕在这些标点后断开
+
+# 估算时间时的最小计时单位：连续的字母数字为一个单位，其余每个非空白字符为一个单位
+_UNIT_PATTERN = re.compile(r"[A-Za-z0-9'’]+|\S")
+
+
+def _join_words(words: List[Dict[str, Any]]) -> str:
+    """拼接词文本，相邻的字母数字词之间补空格"""
+    text = ""
+    for word in words:
+        token = word["word"]
+        if text and text[-1].isascii() and text[-1].isalnum() and token[0].isascii() and token[0].isalnum():
+            text += " "
+        text += token
+    return text
+
+
+def _locate(segments: List[Dict[str, float]], offset: float) -> float:
+    """将语音时长上的偏移(秒)映射为整段音频中的时间"""
+    for segment in segments:
+        duration = segment["end"] - segment["start"]
+        if offset <= duration:
+            return segment["start"] + offset
+        offset -= duration
+    return segments[-1]["end"]
+
+
+def _estimate_words(chunk: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """无词级时间戳时，按字数比例将本块文本分配到其语音段上（估算时间）"""
+    units = _UNIT_PATTERN.findall(chunk.get("text") or "")
+    segments = chunk.get("segments") or [{"start": chunk["start"], "end": chunk["end"]}]
+    total_chars = sum(len(unit) for unit in units)
+    speech = sum(segment["end"] - segment["start"] for segment in segments)
+    words = []
+    position = 0
+    for unit in units:
+        start = _locate(segments, speech * position / total_chars)
+        position += len(unit)
+        words.append({"word": unit, "start": start, "end": _locate(segments, speech * position / total_chars)})
+    return words
+
+
+def build_cues(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """将逐块结果切分为字幕条目
+
+    有词级时间戳时按词切分，条目中保留各词时间；否则按字数比例估算时间。
+    条目在句末标点处断开，且不超过最长时长与最多字符数。
+
+    Returns:
+        [{"start", "end", "text"}]，时间为秒
+    """
+    cues: List[Dict[str, Any]] = []
+    for chunk in chunks:
+        words = chunk.get("words")
+        timed = bool(words)
+        if not timed:
+            words = _estimate_words(chunk)
+
+        current: List[Dict[str, Any]] = []
+        for word in words:
+            current.append(word)
+            text = _join_words(current)
+            if (
+                text[-1] in SENTENCE_END
+                or len(text) >= MAX_CUE_CHARS
+                or current[-1]["end"] - current[0]["start"] >= MAX_CUE_SECONDS
+                or word is words[-1]
+            ):
+                cue = {"start": round(current[0]["start"], 3), "end": round(current[-1]["end"], 3), "text": text}
+                if timed:
+                    cue["words"] = current
+                cues.append(cue)
+                current = []
+    return cues
+
+
+def _format_time(seconds: float, separator: str) -> str:
+    """格式化字幕时间 HH:MM:SS,mmm（WebVTT使用 . 分隔毫秒）"""
+    milliseconds = max(0, int(round(seconds * 1000)))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{milliseconds:03d}"
+
+
+def _render_srt(cues: List[Dict[str, Any]]) -> Iterator[str]:
+    for index, cue in enumerate(cues, 1):
+        yield f"{index}\n{_format_time(cue['start'], ',')} --> {_format_time(cue['end'], ',')}\n{cue['text']}\n\n"
+
+
+def _render_vtt(cues: List[Dict[str, Any]]) -> Iterator[str]:
+    yield "WEBVTT\n\n"
+    for cue in cues:
+        yield f"{_format_time(cue['start'], '.')} --> {_format_time(cue['end'], '.')}\n{cue['text']}\n\n"
+
+
+def load_chunks(job: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """读取任务保存的逐块结果，早期版本创建的任务没有逐块结果时返回None"""
+    return json.loads(job["chunks"]) if job.get("chunks") is not None else None
+
+
+def export_transcript(job: Dict[str, Any], fmt: str) -> Iterator[str]:
+    """按格式逐段生成已完成任务的导出内容
+
+    Args:
+        job: 任务记录（见 JobStore）
+        fmt: 导出格式，见 EXPORT_FORMATS；字幕格式要求任务保存了逐块结果
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}，可选: {', '.join(EXPORT_FORMATS)}")
+
+    if fmt == "txt":
+        yield job["result"] or ""
+        return
+
+    chunks = load_chunks(job)
+    if fmt == "json":
+        yield json.dumps(
+            {
+                "task_id": job["job_id"],
+                "file_name": job["file_name"],
+                "language": job["language"],
+                "processing_time": job["processing_time"],
+                "text": job["result"] or "",
+                "segments": build_cues(chunks) if chunks is not None else None
+            },
+            ensure_ascii=False
+        )
+    elif fmt == "srt":
+        yield from _render_srt(build_cues(chunks))
+    else:
+        yield from _render_vtt(build_cues(chunks))
+
+
+def export_etag(job: Dict[str, Any], fmt: str) -> str:
+    """导出内容的ETag：任务结果写入后不再变化，由任务ID、更新时间与格式确定，无需生成内容"""
+    payload = f"{job['job_id']}|{job['updated_time']}|{fmt}|{EXPORT_FORMAT_VERSION}"
+    return f'"{hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]}"'
@@ -0,0 +1,33 @@
+"""测试公共夹具：使用基准测试的桩模型，无需下载模型或安装PyTorch"""
+
+import numpy as np
+import pytest
+
+from benchmarks.stub import register_stub_backend
+from shared.utils.asr_backend import SAMPLE_RATE
+from shared.utils.sensevoice_client import SenseVoiceClient
+
+
+def _make_speech(duration: float, spans) -> np.ndarray:
+    t = np.arange(int(duration * SAMPLE_RATE), dtype=np.float32) / SAMPLE_RATE
+    audio = np.zeros_like(t)
+    for start, end in spans:
+        voiced = (t >= start) & (t < end)
+        audio[voiced] = 0.3 * np.sin(2 * np.pi * 220 * t[voiced])
+    return audio
+
+
+@pytest.fixture
+def make_speech():
+    """生成指定时长的音频，spans 为 [(起点秒, 终点秒)] 的“语音”区间，其余为静音"""
+    return _make_speech
+
+
+@pytest.fixture
+async def stub_client():
+    """已加载桩模型的客户端（启用VAD分段）"""
+    register_stub_backend(rtf=0.0)
+    client = SenseVoiceClient(device="cpu", backend="stub", lazy_load=True)
+    await client.load()
+    yield client
+    client.close()
@@ -0,0 +1,102 @@
+"""BatchScheduler 组批与结果分发测试"""
+
+import asyncio
+
+import pytest
+
+from shared.utils.batch_scheduler import BatchScheduler
+
+
+class RecordingRunner:
+    """记录每次批量推理的输入，返回带分组键的结果"""
+
+    def __init__(self, delay: float = 0.0):
+        self.calls = []
+        self.delay = delay
+
+    async def __call__(self, group_key, items):
+        self.calls.append((group_key, list(items)))
+        await asyncio.sleep(self.delay)
+        return [f"{group_key}:{item}" for item in items]
+
+
+async def test_results_follow_submission():
+    """每个请求拿到自己的结果，同一批内保持提交顺序"""
+    runner = RecordingRunner()
+    scheduler = BatchScheduler(runner, max_batch_size=8, max_wait_ms=50)
+    try:
+        results = await asyncio.gather(*(scheduler.submit(i, "zh") for i in range(5)))
+    finally:
+        scheduler.close()
+
+    assert results == [f"zh:{i}" for i in range(5)]
+    assert runner.calls == [("zh", [0, 1, 2, 3, 4])]
+
+
+async def test_groups_by_key():
+    """推理参数不同的项不会合并到同一次推理中"""
+    runner = RecordingRunner()
+    scheduler = BatchScheduler(runner, max_batch_size=8, max_wait_ms=50)
+    try:
+        results = await asyncio.gather(
+            scheduler.submit("a", "zh"),
+            scheduler.submit("b", "en"),
+            scheduler.submit("c", "zh"),
+            scheduler.submit("d", "en")
+        )
+    finally:
+        scheduler.close()
+
+    assert results == ["zh:a", "en:b", "zh:c", "en:d"]
+    assert sorted(runner.calls) == [("en", ["b", "d"]), ("zh", ["a", "c"])]
+
+
+async def test_respects_max_batch_size():
+    """超过最大批大小时拆分为多批，按提交顺序依次组批"""
+    runner = RecordingRunner()
+    scheduler = BatchScheduler(runner, max_batch_size=3, max_wait_ms=50)
+    try:
+        results = await asyncio.gather(*(scheduler.submit(i, "zh") for i in range(7)))
+    finally:
+        scheduler.close()
+
+    assert results == [f"zh:{i}" for i in range(7)]
+    assert [items for _, items in runner.calls] == [[0, 1, 2], [3, 4, 5], [6]]
+    assert scheduler.get_stats()["max_observed_batch_size"] == 3
+
+
+async def test_failure_propagates_to_batch():
+    """批量推理失败时，同批的所有请求收到同一异常"""
+    async def failing(group_key, items):
+        raise RuntimeError("推理失败")
+
+    scheduler = BatchScheduler(failing, max_batch_size=4, max_wait_ms=50)
+    try:
+        results = await asyncio.gather(
+            scheduler.submit(1, "zh"),
+            scheduler.submit(2, "zh"),
+            return_exceptions=True
+        )
+    finally:
+        scheduler.close()
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+async def test_skips_cancelled_requests():
+    """已取消的请求不再参与推理"""
+    runner = RecordingRunner()
+    scheduler = BatchScheduler(runner, max_batch_size=8, max_wait_ms=100)
+    try:
+        cancelled = asyncio.create_task(scheduler.submit("gone", "zh"))
+        await asyncio.sleep(0)
+        kept = asyncio.create_task(scheduler.submit("kept", "zh"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        assert await kept == "zh:kept"
+    finally:
+        scheduler.close()
+
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    assert runner.calls == [("zh", ["kept"])]
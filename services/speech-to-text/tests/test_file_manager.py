@@ -0,0 +1,177 @@
+"""FileManager 上传保存、过期清理与文件使用标记测试"""
+
+import hashlib
+import io
+import os
+import subprocess
+import tempfile
+import time
+
+import pytest
+from fastapi import UploadFile
+
+from shared.utils.file_utils import PIN_DIR_NAME, FileManager, _upload_fileno
+
+
+RETENTION = 3600
+
+
+@pytest.fixture
+def upload_dir(tmp_path):
+    return tmp_path / "uploads"
+
+
+def _write(directory, name, age=0.0):
+    """写入文件并将修改时间设为 age 秒之前"""
+    path = directory / name
+    path.write_bytes(b"data")
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def _manager(upload_dir):
+    return FileManager(str(upload_dir), max_file_size=1024, allowed_extensions=["wav"])
+
+
+def _exited_pid():
+    process = subprocess.Popen(["true"])
+    process.wait()
+    return process.pid
+
+
+def test_removes_only_expired_files(upload_dir):
+    upload_dir.mkdir()
+    old = _write(upload_dir, "old.wav", age=RETENTION + 10)
+    new = _write(upload_dir, "new.wav")
+    manager = _manager(upload_dir)
+
+    assert manager.cleanup_old_files(RETENTION) == 1
+    assert not old.exists()
+    assert new.exists()
+
+
+def test_removes_derived_pcm_with_source(upload_dir):
+    """预解码PCM文件随源文件一起删除"""
+    upload_dir.mkdir()
+    source = _write(upload_dir, "old.wav", age=RETENTION + 10)
+    pcm = _write(upload_dir, "old.wav.pcm", age=RETENTION + 10)
+    manager = _manager(upload_dir)
+
+    assert manager.cleanup_old_files(RETENTION) == 1
+    assert not source.exists()
+    assert not pcm.exists()
+
+
+def test_keeps_referenced_files(upload_dir):
+    """任务数据库中未结束任务引用的文件保留，下次清理时重新检查"""
+    upload_dir.mkdir()
+    path = _write(upload_dir, "job.wav", age=RETENTION + 10)
+    manager = _manager(upload_dir)
+
+    assert manager.cleanup_old_files(RETENTION, keep=["job.wav"]) == 0
+    assert path.exists()
+    assert manager.cleanup_old_files(RETENTION) == 1
+    assert not path.exists()
+
+
+def test_pinned_files_survive_cleanup(upload_dir):
+    """正在使用的文件在全部取消标记前不会被删除"""
+    upload_dir.mkdir()
+    path = _write(upload_dir, "busy.wav", age=RETENTION + 10)
+    manager = _manager(upload_dir)
+
+    manager.pin_file("busy.wav")
+    manager.pin_file("busy.wav")
+    manager.unpin_file("busy.wav")
+    assert manager.cleanup_old_files(RETENTION) == 0
+    assert path.exists()
+
+    manager.unpin_file("busy.wav")
+    assert not any((upload_dir / PIN_DIR_NAME).iterdir())
+    assert manager.cleanup_old_files(RETENTION) == 1
+    assert not path.exists()
+
+
+def test_pins_from_other_processes(upload_dir):
+    """其他工作进程的使用标记同样生效，已退出进程遗留的标记被清除"""
+    upload_dir.mkdir()
+    live = _write(upload_dir, "live.wav", age=RETENTION + 10)
+    stale = _write(upload_dir, "stale.wav", age=RETENTION + 10)
+    manager = _manager(upload_dir)
+
+    # 父进程代表仍在运行的另一个工作进程
+    (upload_dir / PIN_DIR_NAME / f"live.wav.{os.getppid()}").touch()
+    stale_marker = upload_dir / PIN_DIR_NAME / f"stale.wav.{_exited_pid()}"
+    stale_marker.touch()
+
+    assert manager.list_pinned_files() == {"live.wav"}
+    assert not stale_marker.exists()
+    assert manager.cleanup_old_files(RETENTION) == 1
+    assert live.exists()
+    assert not stale.exists()
+
+
+def test_disk_high_water_evicts_oldest(upload_dir, monkeypatch):
+    """磁盘使用率超过上限时从最早的文件开始删除，跳过正在使用的文件"""
+    upload_dir.mkdir()
+    pinned = _write(upload_dir, "a.wav", age=30)
+    oldest = _write(upload_dir, "b.wav", age=20)
+    newest = _write(upload_dir, "c.wav", age=10)
+    manager = _manager(upload_dir)
+    manager.pin_file("a.wav")
+
+    usage = iter([0.95, 0.5])
+    monkeypatch.setattr(manager, "_disk_usage_ratio", lambda: next(usage))
+
+    assert manager.cleanup_old_files(RETENTION, disk_high_water=0.9) == 1
+    assert not oldest.exists()
+    assert pinned.exists()
+    assert newest.exists()
+
+
+def test_resolve_file_id_rejects_paths(upload_dir):
+    upload_dir.mkdir()
+    _write(upload_dir, "a.wav")
+    manager = _manager(upload_dir)
+
+    assert manager.resolve_file_id("a.wav") == upload_dir / "a.wav"
+    assert manager.resolve_file_id("../a.wav") is None
+    assert manager.resolve_file_id(PIN_DIR_NAME) is None
+    assert manager.resolve_file_id("missing.wav") is None
+
+
+async def test_cleanup_prunes_file_hashes(upload_dir):
+    """已删除文件（包括其他进程删除的文件）的哈希记录在清理时移除"""
+    upload_dir.mkdir()
+    expired = _write(upload_dir, "old.wav", age=RETENTION + 10)
+    foreign = _write(upload_dir, "foreign.wav")
+    kept = _write(upload_dir, "new.wav")
+    manager = _manager(upload_dir)
+    for path in (expired, foreign, kept):
+        await manager.get_file_hash(path)
+
+    # 由其他工作进程上传并删除，不在本进程的过期索引中
+    manager._indexed.pop("foreign.wav")
+    foreign.unlink()
+
+    assert manager.cleanup_old_files(RETENTION) == 1
+    assert set(manager._file_hashes) == {"new.wav"}
+
+
+@pytest.mark.parametrize("size", [1024, 8192])
+async def test_save_upload_in_memory_and_on_disk(upload_dir, size):
+    """内存中的小文件分块写入且不强制落盘，已落盘的上传临时文件整体复制"""
+    spooled = tempfile.SpooledTemporaryFile(max_size=4096)
+    data = os.urandom(size)
+    spooled.write(data)
+    spooled.seek(0)
+    rolled = size > 4096
+    manager = FileManager(str(upload_dir), max_file_size=size, allowed_extensions=["wav"])
+
+    assert (_upload_fileno(UploadFile(spooled)) is not None) == rolled
+    path = await manager.save_upload_file_stream(UploadFile(spooled), "a.wav")
+
+    assert path.read_bytes() == data
+    assert await manager.get_file_hash(path) == hashlib.sha256(data).hexdigest()
+    assert isinstance(spooled._file, io.BytesIO) != rolled
@@ -0,0 +1,53 @@
+"""热词表注册中心的缓存与跨进程一致性测试"""
+
+import json
+import os
+
+import pytest
+
+from shared.utils.hotwords import HotwordRegistry
+
+
+@pytest.fixture
+def store_dir(tmp_path):
+    return tmp_path / "hotwords"
+
+
+def test_resolve_merges_request_keywords(store_dir):
+    registry = HotwordRegistry(str(store_dir))
+    hotword_id = registry.register("论语", ["孔子", "学而"])["id"]
+
+    assert registry.compile(hotword_id) == "孔子 学而"
+    assert registry.resolve("学而，有朋", hotword_id) == "孔子 学而 有朋"
+    assert registry.get_stats()["hits"] == 1
+
+
+def test_deleted_by_other_process(store_dir):
+    """其他工作进程删除热词表后，本进程缓存的热词表不再被解析"""
+    registry = HotwordRegistry(str(store_dir))
+    other = HotwordRegistry(str(store_dir))
+    hotword_id = registry.register("论语", ["孔子"])["id"]
+    assert other.compile(hotword_id) == "孔子"
+
+    assert registry.delete(hotword_id) is True
+
+    with pytest.raises(KeyError):
+        other.resolve(hotword_id=hotword_id)
+    assert other.get_stats()["cached"] == 0
+
+
+def test_replaced_by_other_process(store_dir):
+    """热词表文件被替换（修改时间变化）时重新读取"""
+    registry = HotwordRegistry(str(store_dir))
+    hotword_id = registry.register("论语", ["孔子"])["id"]
+    assert registry.compile(hotword_id) == "孔子"
+
+    entry_path = store_dir / f"{hotword_id}.json"
+    entry = json.loads(entry_path.read_text(encoding="utf-8"))
+    entry["words"] = ["孟子"]
+    entry_path.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+    stat = entry_path.stat()
+    os.utime(entry_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert registry.compile(hotword_id) == "孟子"
+    assert registry.get_stats()["misses"] == 2
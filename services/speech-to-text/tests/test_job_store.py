@@ -0,0 +1,153 @@
+"""JobStore 任务领取、租约与重新排队测试"""
+
+import sqlite3
+
+import pytest
+
+from shared.utils.job_queue import (
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_PENDING,
+    JOB_PROCESSING,
+    JobStore
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    yield store
+    store.close()
+
+
+def _create(store, file_id="a.wav"):
+    return store.create(file_id, file_id, "zh", None, 30.0)
+
+
+def test_claim_once(store):
+    """任务只能被领取一次"""
+    job = _create(store)
+
+    assert store.claim(job["job_id"]) is True
+    assert store.claim(job["job_id"]) is False
+    assert store.get(job["job_id"])["status"] == JOB_PROCESSING
+
+
+def test_claim_across_connections(store, tmp_path):
+    """共用数据库的其他进程（连接）无法再领取已领取的任务"""
+    job = _create(store)
+    other = JobStore(str(tmp_path / "jobs.db"))
+    try:
+        assert other.claim(job["job_id"]) is True
+        assert store.claim(job["job_id"]) is False
+    finally:
+        other.close()
+
+
+def test_list_pending_in_submission_order(store):
+    jobs = [_create(store, f"{n}.wav") for n in range(3)]
+    store.claim(jobs[1]["job_id"])
+
+    assert [job["job_id"] for job in store.list_pending()] == [jobs[0]["job_id"], jobs[2]["job_id"]]
+    assert [job["job_id"] for job in store.list_pending(1)] == [jobs[0]["job_id"]]
+    assert store.count_pending() == 2
+
+
+def test_requeue_processing(store):
+    """处理中断的任务重新排队并重置进度，已结束的任务不受影响"""
+    interrupted = _create(store, "a.wav")
+    finished = _create(store, "b.wav")
+    store.claim(interrupted["job_id"])
+    store.update(interrupted["job_id"], progress=0.5)
+    store.claim(finished["job_id"])
+    store.update(finished["job_id"], status=JOB_COMPLETED, progress=1.0, result="完成")
+
+    assert store.requeue_processing() == 1
+
+    job = store.get(interrupted["job_id"])
+    assert (job["status"], job["progress"]) == (JOB_PENDING, 0.0)
+    assert store.get(finished["job_id"])["status"] == JOB_COMPLETED
+    assert store.claim(interrupted["job_id"]) is True
+
+
+def test_active_file_ids(store):
+    """未结束任务引用的文件需在清理时保留"""
+    _create(store, "a.wav")
+    processing = _create(store, "b.wav")
+    failed = _create(store, "c.wav")
+    store.claim(processing["job_id"])
+    store.update(failed["job_id"], status=JOB_FAILED, error="失败")
+
+    assert sorted(store.list_active_file_ids()) == ["a.wav", "b.wav"]
+
+
+def test_delete_finished(store):
+    finished = _create(store, "a.wav")
+    pending = _create(store, "b.wav")
+    store.update(finished["job_id"], status=JOB_COMPLETED)
+    updated_time = store.get(finished["job_id"])["updated_time"]
+
+    assert store.delete_finished(updated_time) == 0
+    assert store.delete_finished(updated_time + 1) == 1
+    assert store.get(finished["job_id"]) is None
+    assert store.get(pending["job_id"]) is not None
+
+
+def test_migrates_chunks_column(tmp_path):
+    """早期版本的数据库没有逐块结果列与租约列，打开时自动添加"""
+    db_path = tmp_path / "jobs.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute(
+        """
+        CREATE TABLE jobs (
+            job_id TEXT PRIMARY KEY, status TEXT NOT NULL, file_id TEXT NOT NULL, file_name TEXT,
+            language TEXT NOT NULL, keywords TEXT, chunk_duration REAL NOT NULL,
+            progress REAL NOT NULL DEFAULT 0, result TEXT, error TEXT, processing_time REAL,
+            created_time REAL NOT NULL, updated_time REAL NOT NULL
+        )
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    store = JobStore(str(db_path))
+    try:
+        job = _create(store)
+        store.update(job["job_id"], chunks="[]")
+        assert store.get(job["job_id"])["chunks"] == "[]"
+        assert store.claim(job["job_id"]) is True
+    finally:
+        store.close()
+
+
+def test_reclaim_expired_lease(tmp_path):
+    """领取任务的工作进程退出后，租约过期的任务可被其他进程重新领取"""
+    db_path = str(tmp_path / "jobs.db")
+    crashed = JobStore(db_path, lease_time=-1)
+    other = JobStore(db_path)
+    try:
+        job = _create(crashed)
+        assert crashed.claim(job["job_id"]) is True
+        crashed.update(job["job_id"], progress=0.5)
+
+        assert [pending["job_id"] for pending in other.list_pending()] == [job["job_id"]]
+        assert other.claim(job["job_id"]) is True
+        assert other.get(job["job_id"])["progress"] == 0.0
+        # 重新领取后租约有效，不能再次领取
+        assert crashed.claim(job["job_id"]) is False
+        assert other.list_pending() == []
+    finally:
+        crashed.close()
+        other.close()
+
+
+def test_renew_lease(store):
+    job = _create(store)
+
+    assert store.renew_lease(job["job_id"]) is False
+    store.claim(job["job_id"])
+    before = store.get(job["job_id"])["lease_expires"]
+    assert store.renew_lease(job["job_id"]) is True
+    assert store.get(job["job_id"])["lease_expires"] >= before
+    store.update(job["job_id"], status=JOB_COMPLETED)
+    assert store.renew_lease(job["job_id"]) is False
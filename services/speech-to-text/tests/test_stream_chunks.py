@@ -0,0 +1,66 @@
+"""流式切分 `_stream_chunks` 的跨窗口保留测试"""
+
+import numpy as np
+
+from shared.utils.asr_backend import SAMPLE_RATE
+from shared.utils.sensevoice_client import STREAM_WINDOW_CHUNKS
+
+
+CHUNK_DURATION = 5.0
+WINDOW_SECONDS = CHUNK_DURATION * STREAM_WINDOW_CHUNKS
+
+
+async def _frames(audio: np.ndarray, frame_seconds: float = 0.5):
+    step = int(frame_seconds * SAMPLE_RATE)
+    for start in range(0, len(audio), step):
+        yield audio[start:start + step]
+
+
+async def _collect(client, audio: np.ndarray):
+    stats = {}
+    chunks = [item async for item in client._stream_chunks(_frames(audio), CHUNK_DURATION, stats)]
+    return chunks, stats
+
+
+async def test_speech_across_window_is_carried(stub_client, make_speech):
+    """跨越窗口边界的语音段保留到下一个窗口，作为一个整体送入识别"""
+    boundary = WINDOW_SECONDS
+    audio = make_speech(WINDOW_SECONDS + 10, [(boundary - 2, boundary + 1)])
+
+    chunks, stats = await _collect(stub_client, audio)
+    spans = [span for _, group in chunks for span in group]
+
+    assert stats["total_samples"] == len(audio)
+    # 窗口边界处没有切断语音
+    assert all(end != int(boundary * SAMPLE_RATE) for _, end in spans)
+    assert any(
+        start <= (boundary - 2) * SAMPLE_RATE and end >= (boundary + 1) * SAMPLE_RATE
+        for start, end in spans
+    )
+
+
+async def test_chunk_data_matches_spans(stub_client, make_speech):
+    """音频块数据由其采样点区间拼接而成，区间按时间顺序且互不重叠"""
+    audio = make_speech(WINDOW_SECONDS * 2 + 3, [(1, 4), (6, 9), (WINDOW_SECONDS - 1, WINDOW_SECONDS + 2), (30, 33)])
+
+    chunks, _ = await _collect(stub_client, audio)
+    spans = [span for _, group in chunks for span in group]
+
+    for chunk, group in chunks:
+        assert len(chunk) == sum(end - start for start, end in group)
+        assert sum(end - start for start, end in group) <= CHUNK_DURATION * SAMPLE_RATE
+    assert all(prev_end <= start for (_, prev_end), (start, _) in zip(spans, spans[1:]))
+
+
+async def test_fixed_chunks_cover_audio(stub_client, make_speech):
+    """未启用VAD时按固定时长切分，跨窗口保留后各块仍连续覆盖整段音频"""
+    stub_client.vad_segmentation = False
+    audio = make_speech(WINDOW_SECONDS * 2 + 2.5, [(0, WINDOW_SECONDS * 2 + 2.5)])
+
+    chunks, _ = await _collect(stub_client, audio)
+    spans = [span for _, group in chunks for span in group]
+
+    assert spans[0][0] == 0
+    assert spans[-1][1] == len(audio)
+    assert all(prev_end == start for (_, prev_end), (start, _) in zip(spans, spans[1:]))
+    assert all(end - start <= CHUNK_DURATION * SAMPLE_RATE for start, end in spans)
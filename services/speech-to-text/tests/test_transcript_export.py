@@ -0,0 +1,145 @@
+"""转录结果导出（字幕切分与SRT/WebVTT格式）测试"""
+
+import json
+
+import pytest
+
+from shared.utils.transcript_export import (
+    MAX_CUE_CHARS,
+    MAX_CUE_SECONDS,
+    build_cues,
+    export_etag,
+    export_transcript
+)
+
+
+def _words(text: str, start: float = 0.0, step: float = 0.25):
+    return [
+        {"word": char, "start": start + n * step, "end": start + (n + 1) * step}
+        for n, char in enumerate(text)
+    ]
+
+
+def _job(chunks, result="", **fields):
+    job = {
+        "job_id": "job1",
+        "file_name": "lecture.wav",
+        "language": "zh",
+        "processing_time": 1.5,
+        "result": result,
+        "chunks": json.dumps(chunks, ensure_ascii=False) if chunks is not None else None,
+        "updated_time": 100.0
+    }
+    job.update(fields)
+    return job
+
+
+def test_cues_split_at_sentence_end():
+    """字幕在句末标点处断开，时间取自词级时间戳"""
+    text = "今天讲论语。下面开始！"
+    chunk = {"text": text, "start": 0.0, "end": 2.75, "words": _words(text)}
+
+    cues = build_cues([chunk])
+
+    assert [cue["text"] for cue in cues] == ["今天讲论语。", "下面开始！"]
+    assert (cues[0]["start"], cues[0]["end"]) == (0.0, 1.5)
+    assert (cues[1]["start"], cues[1]["end"]) == (1.5, 2.75)
+    assert [word["word"] for word in cues[1]["words"]] == list("下面开始！")
+
+
+def test_cues_respect_max_chars():
+    """没有标点的长句按最多字符数切分"""
+    text = "学" * (MAX_CUE_CHARS * 2 + 5)
+    chunk = {"text": text, "start": 0.0, "end": 10.0, "words": _words(text, step=0.01)}
+
+    cues = build_cues([chunk])
+
+    assert [len(cue["text"]) for cue in cues] == [MAX_CUE_CHARS, MAX_CUE_CHARS, 5]
+    assert "".join(cue["text"] for cue in cues) == text
+
+
+def test_cues_respect_max_duration():
+    """语速较慢时按最长时长切分"""
+    text = "慢" * 10
+    chunk = {"text": text, "start": 0.0, "end": 20.0, "words": _words(text, step=2.0)}
+
+    cues = build_cues([chunk])
+
+    assert len(cues) > 1
+    assert all(cue["end"] - cue["start"] <= MAX_CUE_SECONDS + 2.0 for cue in cues)
+    assert "".join(cue["text"] for cue in cues) == text
+
+
+def test_cues_join_latin_words_with_spaces():
+    """相邻的英文词之间补空格"""
+    words = [
+        {"word": "hello", "start": 0.0, "end": 0.4},
+        {"word": "world", "start": 0.5, "end": 0.9},
+        {"word": ".", "start": 0.9, "end": 1.0}
+    ]
+
+    cues = build_cues([{"text": "hello world.", "start": 0.0, "end": 1.0, "words": words}])
+
+    assert [cue["text"] for cue in cues] == ["hello world."]
+
+
+def test_cues_estimated_over_speech_segments():
+    """没有词级时间戳时按字数比例分配到语音段上，跳过静音"""
+    chunk = {
+        "text": "一二三四",
+        "start": 10.0,
+        "end": 16.0,
+        "segments": [{"start": 10.0, "end": 12.0}, {"start": 14.0, "end": 16.0}]
+    }
+
+    cues = build_cues([chunk])
+
+    assert len(cues) == 1
+    assert (cues[0]["start"], cues[0]["end"]) == (10.0, 16.0)
+    assert "words" not in cues[0]
+
+
+def test_export_srt():
+    chunks = [
+        {"text": "第一句。", "start": 0.0, "end": 1.0, "words": _words("第一句。")},
+        {"text": "第二句。", "start": 3661.5, "end": 3662.5, "words": _words("第二句。", start=3661.5)}
+    ]
+
+    content = "".join(export_transcript(_job(chunks), "srt"))
+
+    assert content == (
+        "1\n00:00:00,000 --> 00:00:01,000\n第一句。\n\n"
+        "2\n01:01:01,500 --> 01:01:02,500\n第二句。\n\n"
+    )
+
+
+def test_export_vtt():
+    chunks = [{"text": "你好。", "start": 0.0, "end": 0.75, "words": _words("你好。")}]
+
+    content = "".join(export_transcript(_job(chunks), "vtt"))
+
+    assert content == "WEBVTT\n\n00:00:00.000 --> 00:00:00.750\n你好。\n\n"
+
+
+def test_export_json_and_txt():
+    chunks = [{"text": "你好。", "start": 0.0, "end": 0.75, "words": _words("你好。")}]
+    job = _job(chunks, result="你好。")
+
+    document = json.loads("".join(export_transcript(job, "json")))
+
+    assert document["text"] == "你好。"
+    assert document["segments"][0]["text"] == "你好。"
+    assert "".join(export_transcript(job, "txt")) == "你好。"
+
+
+def test_export_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        list(export_transcript(_job([]), "docx"))
+
+
+def test_export_etag_changes_with_format_and_update():
+    job = _job([])
+
+    assert export_etag(job, "srt") == export_etag(dict(job), "srt")
+    assert export_etag(job, "srt") != export_etag(job, "vtt")
+    assert export_etag(job, "srt") != export_etag(_job([], updated_time=200.0), "srt")